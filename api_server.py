@@ -0,0 +1,273 @@
+"""공동 편집 프로젝트용 HTTP API 서버 (Streamlit 없이 대량 읽기/쓰기)
+
+실행: uvicorn api_server:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from utils.collaboration_manager import create_collaboration_manager
+from utils.excel_handler import ExcelHandler
+
+PROJECT_DIR = os.environ.get("EXCEL_WEB_PROJECT_DIR", "shared_projects")
+EXPORT_CHUNK_ROWS = 10000
+# 이 크기를 넘는 xlsx 내보내기 결과는 메모리 대신 임시 파일에 씀
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+app = FastAPI(title="웹 엑셀 편집기 API")
+collaboration_manager = create_collaboration_manager(PROJECT_DIR)
+
+
+class CreateProjectRequest(BaseModel):
+    filename: str
+    sheets: Dict[str, List[Dict[str, Any]]]
+
+
+class CellPatch(BaseModel):
+    row: int
+    column: str
+    value: Any = None
+
+
+class SheetPatchRequest(BaseModel):
+    cells: List[CellPatch] = Field(default_factory=list)
+    append_rows: List[Dict[str, Any]] = Field(default_factory=list)
+    user_id: Optional[str] = None
+
+
+class BatchOperation(BaseModel):
+    op: str  # "create" | "read" | "patch"
+    project_id: Optional[str] = None
+    sheet: Optional[str] = None
+    start: int = 0
+    stop: Optional[int] = None
+    columns: Optional[List[str]] = None
+    filename: Optional[str] = None
+    sheets: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    cells: List[CellPatch] = Field(default_factory=list)
+    append_rows: List[Dict[str, Any]] = Field(default_factory=list)
+    user_id: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+def _load_project(project_id: str) -> Dict:
+    """프로젝트 데이터 로드 (없으면 404)"""
+    project_data = collaboration_manager.get_project_data(project_id)
+    if not project_data:
+        raise HTTPException(status_code=404, detail=f"프로젝트를 찾을 수 없습니다: {project_id}")
+    return project_data
+
+
+def _load_sheet(project_id: str, sheet_name: str) -> pd.DataFrame:
+    """시트 로드 (없으면 404)"""
+    excel_data = _load_project(project_id)["excel_data"]
+    if sheet_name not in excel_data:
+        raise HTTPException(status_code=404, detail=f"시트를 찾을 수 없습니다: {sheet_name}")
+    return excel_data[sheet_name]
+
+
+def _select_columns(df: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+    """컬럼 선택 (없으면 전체)"""
+    if columns:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"존재하지 않는 컬럼: {', '.join(missing)}")
+        df = df[columns]
+    return df
+
+
+def _read_rows(project_id: str, sheet_name: str, start: int, stop: Optional[int],
+               columns: Optional[List[str]]) -> Tuple[pd.DataFrame, int]:
+    """시트의 행 범위와 전체 행 수 (스냅샷에서 범위에 해당하는 부분만 로드)"""
+    result = collaboration_manager.get_sheet_rows(project_id, sheet_name, start, stop)
+    if result is None:
+        # 프로젝트/시트가 없으면 404, 범위 읽기를 지원하지 않는 경우 전체 로드 후 자름
+        df = _load_sheet(project_id, sheet_name)
+        result = (df.iloc[start:stop], len(df))
+    rows, total_rows = result
+    return _select_columns(rows, columns), total_rows
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON 직렬화 가능한 레코드 (NaN -> None)"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _create_project(filename: str, sheets: Dict[str, List[Dict[str, Any]]]) -> Dict:
+    excel_data = {sheet_name: pd.DataFrame(records) for sheet_name, records in sheets.items()}
+    project_id = collaboration_manager.create_project(excel_data, filename)
+    return {"project_id": project_id, "version": 1}
+
+
+def _patch_sheet(project_id: str, sheet_name: str, cells: List[CellPatch],
+                 append_rows: List[Dict[str, Any]], user_id: Optional[str]) -> Dict:
+    try:
+        version = collaboration_manager.patch_sheet(
+            project_id,
+            sheet_name,
+            cells=[cell.model_dump() for cell in cells],
+            append_rows=append_rows,
+            user_id=user_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"프로젝트를 찾을 수 없습니다: {project_id}")
+    return {"project_id": project_id, "sheet": sheet_name, "version": version}
+
+
+@app.get("/projects")
+def list_projects():
+    """프로젝트 목록"""
+    return collaboration_manager.list_projects()
+
+
+@app.post("/projects", status_code=201)
+def create_project(request: CreateProjectRequest):
+    """JSON 레코드로 새 프로젝트 생성"""
+    return _create_project(request.filename, request.sheets)
+
+
+@app.get("/projects/{project_id}")
+def get_project(project_id: str):
+    """프로젝트 메타데이터와 시트 구성"""
+    project_data = _load_project(project_id)
+    return {
+        "metadata": project_data["metadata"],
+        "sheets": {
+            sheet_name: {"rows": len(df), "columns": [str(column) for column in df.columns]}
+            for sheet_name, df in project_data["excel_data"].items()
+        }
+    }
+
+
+@app.get("/projects/{project_id}/sheets/{sheet_name}")
+def read_sheet_range(
+    project_id: str,
+    sheet_name: str,
+    start: int = Query(0, ge=0),
+    stop: Optional[int] = Query(None, ge=0),
+    columns: Optional[str] = Query(None, description="쉼표로 구분한 컬럼 목록")
+):
+    """시트의 행 범위 읽기 (스냅샷에서 범위에 해당하는 부분만 로드)"""
+    selected, total_rows = _read_rows(project_id, sheet_name, start, stop, columns.split(",") if columns else None)
+    return {
+        "sheet": sheet_name,
+        "start": start,
+        "total_rows": total_rows,
+        "rows": _records(selected)
+    }
+
+
+@app.patch("/projects/{project_id}/sheets/{sheet_name}")
+def patch_sheet(project_id: str, sheet_name: str, request: SheetPatchRequest):
+    """셀 일괄 수정 / 행 추가 (한 번의 잠금, 한 번의 버전 증가)"""
+    return _patch_sheet(project_id, sheet_name, request.cells, request.append_rows, request.user_id)
+
+
+@app.post("/batch")
+def run_batch(request: BatchRequest):
+    """여러 작업을 한 번의 요청으로 실행 (작업별 결과/오류 반환)"""
+    results = []
+    for operation in request.operations:
+        try:
+            if operation.op in ("read", "patch") and (not operation.project_id or not operation.sheet):
+                raise HTTPException(status_code=400, detail="project_id와 sheet가 필요합니다.")
+            if operation.op == "create":
+                if not operation.filename or operation.sheets is None:
+                    raise HTTPException(status_code=400, detail="filename과 sheets가 필요합니다.")
+                result = _create_project(operation.filename, operation.sheets)
+            elif operation.op == "read":
+                rows, _ = _read_rows(
+                    operation.project_id, operation.sheet, operation.start, operation.stop, operation.columns
+                )
+                result = {"rows": _records(rows)}
+            elif operation.op == "patch":
+                result = _patch_sheet(
+                    operation.project_id, operation.sheet, operation.cells, operation.append_rows, operation.user_id
+                )
+            else:
+                raise HTTPException(status_code=400, detail=f"지원하지 않는 작업: {operation.op}")
+            results.append({"ok": True, "result": result})
+        except HTTPException as e:
+            results.append({"ok": False, "status": e.status_code, "error": e.detail})
+    return {"results": results}
+
+
+def _iter_csv(df: pd.DataFrame) -> Iterator[bytes]:
+    """CSV를 행 묶음 단위로 생성"""
+    yield df.iloc[:0].to_csv(index=False).encode("utf-8-sig")
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        yield df.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(index=False, header=False).encode("utf-8")
+
+
+def _iter_file(spool, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """임시 파일을 처음부터 나눠 읽고 다 보내면 닫음"""
+    try:
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+@app.get("/projects/{project_id}/export")
+def export_project(
+    project_id: str,
+    format: str = Query("xlsx", pattern="^(xlsx|csv)$"),
+    sheet: Optional[str] = None
+):
+    """프로젝트 내보내기 (xlsx: 전체 시트, csv: 시트 하나)"""
+    project_data = _load_project(project_id)
+    excel_data = project_data["excel_data"]
+
+    if format == "csv":
+        sheet_name = sheet or next(iter(excel_data), None)
+        if sheet_name not in excel_data:
+            raise HTTPException(status_code=404, detail=f"시트를 찾을 수 없습니다: {sheet_name}")
+        return StreamingResponse(
+            _iter_csv(excel_data[sheet_name]),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'{project_id}_{sheet_name}.csv')}"}
+        )
+
+    # 완성된 xlsx를 한 번에 bytes로 들고 있지 않고 임시 파일에서 나눠 보냄
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    try:
+        ExcelHandler.write_excel(excel_data, spool)
+    except BaseException:
+        spool.close()
+        raise
+    return StreamingResponse(
+        _iter_file(spool),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="{project_id}.xlsx"'}
+    )
+
+
+@app.get("/health")
+def health():
+    return Response(content="ok", media_type="text/plain")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api_server:app",
+        host=os.environ.get("EXCEL_WEB_API_HOST", "127.0.0.1"),
+        port=int(os.environ.get("EXCEL_WEB_API_PORT", "8000")),
+        workers=int(os.environ.get("EXCEL_WEB_API_WORKERS", "1"))
+    )
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
 from utils.excel_handler import ExcelHandler
-from utils.data_manager import DataManager
+from utils.data_manager import DataManager, shared_collaboration_manager
+from utils.query_engine import parse_filter_expression
+from utils.aggregation_engine import AGGREGATIONS
+from utils.maintenance import MaintenanceJob
+from utils.reader_engines import supported_extensions
+from utils.sheet_diff import render_diff_frame
+from utils.validation import ValidationError
 import io
+import json
+import os
 import time
 
 # 페이지 설정
@@ -12,6 +20,68 @@ st.set_page_config(
     layout="wide"
 )
 
+# 부분 재실행 주기 (초)
+PRESENCE_REFRESH_SECONDS = 15
+PROJECT_LIST_REFRESH_SECONDS = 30
+AUTO_SYNC_SECONDS = 30
+
+@st.cache_resource
+def start_maintenance_job():
+    """프로세스당 한 번 저장소 정리 작업 시작"""
+    return MaintenanceJob.from_env(shared_collaboration_manager()).start(float(os.environ.get("EXCEL_WEB_MAINTENANCE_INTERVAL", "600")))
+
+def start_fragment_run():
+    """프래그먼트만 다시 실행될 때는 이전 실행의 조회 캐시를 비움"""
+    if not st.session_state.get("in_full_run"):
+        DataManager.reset_run_cache()
+
+@st.fragment(run_every=PRESENCE_REFRESH_SECONDS)
+def show_presence_panel():
+    """활성 사용자 / 자동 동기화 (이 부분만 주기적으로 다시 실행)"""
+    start_fragment_run()
+    if not st.session_state.is_collaborative:
+        return
+    
+    DataManager.send_heartbeat()
+    
+    # 30초마다 서버 버전만 확인하고, 새 버전이 있을 때만 전체 화면을 다시 그림
+    if 'last_sync_time' not in st.session_state:
+        st.session_state.last_sync_time = time.time()
+    if time.time() - st.session_state.last_sync_time > AUTO_SYNC_SECONDS:
+        st.session_state.last_sync_time = time.time()
+        if DataManager.has_remote_changes() and DataManager.sync_collaborative_data():
+            st.rerun(scope="app")
+    
+    active_users = DataManager.get_active_users()
+    if active_users:
+        st.subheader("🟢 활성 사용자")
+        for user in active_users:
+            user_display = user["user_id"][:8]
+            if user["user_id"] == st.session_state.user_id:
+                user_display += " (나)"
+            st.text(f"• {user_display}")
+        st.caption(f"마지막 업데이트: {time.strftime('%H:%M:%S')}")
+
+@st.fragment(run_every=PROJECT_LIST_REFRESH_SECONDS)
+def show_project_list():
+    """최근 프로젝트 목록 (이 부분만 주기적으로 다시 실행)"""
+    start_fragment_run()
+    st.subheader("📋 프로젝트 목록")
+    projects = DataManager.list_projects()
+    
+    if projects:
+        for project in projects[:5]:  # 최근 5개만 표시
+            with st.expander(f"📁 {project['filename'][:20]}..."):
+                st.text(f"ID: {project['project_id']}")
+                st.text(f"수정: {project['last_modified'][:16]}")
+                st.text(f"활성 사용자: {project['active_users_count']}명")
+                if st.button(f"참여", key=f"join_{project['project_id']}"):
+                    if DataManager.join_collaborative_project(project['project_id']):
+                        st.success("참여 완료!")
+                        st.rerun(scope="app")
+    else:
+        st.info("생성된 프로젝트가 없습니다.")
+
 def show_collaboration_sidebar():
     """공동 편집 관련 사이드바"""
     st.sidebar.header("👥 공동 편집")
@@ -22,14 +92,8 @@ def show_collaboration_sidebar():
         st.sidebar.info(f"👤 사용자 ID: {st.session_state.user_id[:8]}...")
         
         # 활성 사용자 표시
-        active_users = DataManager.get_active_users()
-        if active_users:
-            st.sidebar.subheader("🟢 활성 사용자")
-            for user in active_users:
-                user_display = user["user_id"][:8]
-                if user["user_id"] == st.session_state.user_id:
-                    user_display += " (나)"
-                st.sidebar.text(f"• {user_display}")
+        with st.sidebar:
+            show_presence_panel()
         
         # 동기화 버튼
         if st.sidebar.button("🔄 데이터 동기화"):
@@ -67,22 +131,259 @@ def show_collaboration_sidebar():
                 st.sidebar.error("프로젝트 ID를 입력하세요.")
     
     # 프로젝트 목록
-    st.sidebar.subheader("📋 프로젝트 목록")
+    with st.sidebar:
+        show_project_list()
+
+def show_search_sidebar():
+    """전체 프로젝트 검색 사이드바"""
+    st.sidebar.subheader("🔍 전체 검색")
+    query = st.sidebar.text_input("검색어", key="search_query", placeholder="모든 프로젝트의 셀 내용 검색")
+    if not query.strip():
+        return
+    
     collaboration_manager = st.session_state.collaboration_manager
-    projects = collaboration_manager.list_projects()
+    hits = collaboration_manager.search(query, limit=50)
+    if not hits:
+        st.sidebar.info("검색 결과가 없습니다.")
+        return
     
-    if projects:
-        for project in projects[:5]:  # 최근 5개만 표시
-            with st.sidebar.expander(f"📁 {project['filename'][:20]}..."):
-                st.text(f"ID: {project['project_id']}")
-                st.text(f"수정: {project['last_modified'][:16]}")
-                st.text(f"활성 사용자: {project['active_users_count']}명")
-                if st.button(f"참여", key=f"join_{project['project_id']}"):
-                    if DataManager.join_collaborative_project(project['project_id']):
-                        st.success("참여 완료!")
+    st.sidebar.caption(f"{len(hits)}건 (최대 50건 표시)")
+    for i, hit in enumerate(hits):
+        with st.sidebar.expander(f"📄 {hit['filename'][:20]} / {hit['sheet']} / {hit['row'] + 1}행"):
+            st.text(f"프로젝트: {hit['project_id']}")
+            st.text(f"열: {hit['column']}")
+            st.text(f"값: {hit['value'][:100]}")
+            if hit['project_id'] != st.session_state.project_id:
+                if st.button("참여", key=f"search_join_{i}_{hit['project_id']}"):
+                    if DataManager.join_collaborative_project(hit['project_id']):
+                        st.session_state.current_sheet = hit['sheet']
                         st.rerun()
+
+@st.fragment
+def show_query_panel():
+    """필터 / 정렬 / 상위 N개 조회 패널 (조건을 바꾸면 이 부분만 다시 실행)"""
+    start_fragment_run()
+    current_data = DataManager.get_current_data()
+    with st.expander("🔎 필터 / 정렬"):
+        sheet_name = st.session_state.current_sheet
+        filter_text = st.text_area(
+            "필터 (한 줄에 하나, 예: 가격 >= 1000)",
+            key=f"query_filters_{sheet_name}",
+            help="연산자: ==, !=, >, >=, <, <=, contains, in (in은 쉼표로 구분)"
+        )
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            sort_by = st.multiselect("정렬 컬럼", list(current_data.columns), key=f"query_sort_{sheet_name}")
+        with col2:
+            descending = st.checkbox("내림차순", key=f"query_desc_{sheet_name}")
+        with col3:
+            top_n = st.number_input("상위 N개 (0=전체)", min_value=0, value=0, step=10, key=f"query_top_{sheet_name}")
+        
+        if not filter_text.strip() and not sort_by and not top_n:
+            return
+        
+        try:
+            filters = [parse_filter_expression(line) for line in filter_text.splitlines() if line.strip()]
+            result = st.session_state.query_engine.run_query(
+                sheet_name,
+                current_data,
+                st.session_state.current_version,
+                filters=filters,
+                sort_by=sort_by,
+                ascending=not descending,
+                top_n=int(top_n) or None
+            )
+        except ValueError as e:
+            st.error(f"❌ 조회 오류: {str(e)}")
+            return
+        
+        st.caption(f"{len(result)}행 / 전체 {len(current_data)}행")
+        st.dataframe(result, use_container_width=True)
+
+@st.fragment
+def show_aggregation_panel():
+    """그룹별 집계 / 피벗 패널 (조건을 바꾸면 이 부분만 다시 실행)"""
+    start_fragment_run()
+    current_data = DataManager.get_current_data()
+    with st.expander("📊 피벗 / 그룹 집계"):
+        sheet_name = st.session_state.current_sheet
+        columns = list(current_data.columns)
+        col1, col2 = st.columns(2)
+        with col1:
+            group_by = st.multiselect("그룹 기준 (행)", columns, key=f"agg_group_{sheet_name}")
+            pivot_column = st.selectbox("피벗 기준 (열)", ["(없음)"] + columns, key=f"agg_pivot_{sheet_name}")
+        with col2:
+            values = st.multiselect("값 컬럼", columns, key=f"agg_values_{sheet_name}")
+            funcs = st.multiselect("집계 방식", AGGREGATIONS, default=["sum"], key=f"agg_funcs_{sheet_name}")
+        
+        if not (group_by or pivot_column != "(없음)") or not values or not funcs:
+            st.info("그룹 기준과 값 컬럼을 선택하세요.")
+            return
+        
+        try:
+            result = st.session_state.aggregation_engine.aggregate(
+                sheet_name,
+                current_data,
+                st.session_state.current_version,
+                group_by=group_by,
+                values=values,
+                funcs=funcs,
+                pivot_column=None if pivot_column == "(없음)" else pivot_column
+            )
+        except ValueError as e:
+            st.error(f"❌ 집계 오류: {str(e)}")
+            return
+        
+        st.dataframe(result, use_container_width=True)
+
+def show_sync_diff_panel(current_data):
+    """마지막 동기화에서 바뀐 내용 표시"""
+    diff = DataManager.get_sync_diff(st.session_state.current_sheet)
+    if diff is None:
+        return
+    
+    with st.expander(f"🧾 변경 내역 (버전 {st.session_state.previous_version} → {st.session_state.current_version})"):
+        if not diff.has_changes:
+            st.info("이 시트에는 변경된 내용이 없습니다.")
+            return
+        
+        summary = diff.summary()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("추가된 행", summary["inserted_rows"])
+        with col2:
+            st.metric("삭제된 행", summary["deleted_rows"])
+        with col3:
+            st.metric("수정된 행", summary["modified_rows"])
+        with col4:
+            st.metric("바뀐 셀", summary["changed_cells"])
+        
+        if diff.added_columns or diff.removed_columns:
+            st.caption(f"추가된 열: {', '.join(diff.added_columns) or '-'} | 삭제된 열: {', '.join(diff.removed_columns) or '-'}")
+        
+        if diff.inserted_rows or diff.modified_rows:
+            st.markdown("**추가(초록) / 수정(노랑)** (최대 500행)")
+            st.dataframe(render_diff_frame(current_data, diff), use_container_width=True)
+        
+        if diff.deleted_rows:
+            st.markdown("**삭제된 행**")
+            previous = st.session_state.previous_excel_data[st.session_state.current_sheet]
+            st.dataframe(previous.reset_index(drop=True).iloc[diff.deleted_rows[:500]], use_container_width=True)
+
+@st.fragment
+def show_data_editor():
+    """데이터 정보 / 편집기 / 미리보기 (편집할 때는 이 부분만 다시 실행)"""
+    start_fragment_run()
+    current_data = DataManager.get_current_data()
+    
+    # 데이터 정보
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("행 수", len(current_data))
+    with col2:
+        st.metric("열 수", len(current_data.columns))
+    with col3:
+        st.metric("시트 수", len(st.session_state.excel_data))
+    with col4:
+        if st.session_state.is_collaborative:
+            active_users_count = len(DataManager.get_active_users())
+            st.metric("활성 사용자", active_users_count)
+    
+    # 데이터 편집기 표시
+    st.markdown("### 📝 데이터 편집")
+    if st.session_state.is_collaborative:
+        st.markdown("🤝 **공동 편집 모드**: 변경사항이 자동으로 다른 사용자들과 동기화됩니다.")
     else:
-        st.sidebar.info("생성된 프로젝트가 없습니다.")
+        st.markdown("셀을 클릭하여 직접 편집할 수 있습니다.")
+    
+    if st.session_state.pop("save_notice", None):
+        st.success("✅ 변경사항이 저장되고 동기화되었습니다!")
+    validation_notice = st.session_state.pop("validation_notice", None)
+    if validation_notice:
+        st.error(f"❌ {validation_notice}")
+    
+    show_validation_status(st.session_state.current_sheet)
+    
+    # 실행 취소 / 다시 실행 (내 수정만 대상)
+    undo_manager = st.session_state.undo_manager
+    col1, col2, _ = st.columns([1, 1, 6])
+    with col1:
+        undo_clicked = st.button("↩️ 실행 취소", disabled=not undo_manager.can_undo, key="undo_edit")
+    with col2:
+        redo_clicked = st.button("↪️ 다시 실행", disabled=not undo_manager.can_redo, key="redo_edit")
+    if undo_clicked or redo_clicked:
+        try:
+            if DataManager.undo_last_edit() if undo_clicked else DataManager.redo_last_edit():
+                st.rerun(scope="app")
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+    
+    # Streamlit data_editor 사용 (AgGrid 대신)
+    edited_df = st.data_editor(
+        current_data,
+        use_container_width=True,
+        num_rows="dynamic",
+        key=f"data_editor_{st.session_state.current_sheet}_{st.session_state.current_version}_{st.session_state.editor_revision}"
+    )
+    
+    # 변경사항 자동 저장
+    if not edited_df.equals(current_data):
+        try:
+            DataManager.update_sheet_data(st.session_state.current_sheet, edited_df)
+        except ValidationError as e:
+            # 거부된 편집 내용이 편집기에 남지 않도록 키를 바꿔서 다시 그림
+            st.session_state.validation_notice = str(e)
+            st.session_state.editor_revision += 1
+            st.rerun(scope="app")
+        
+        if st.session_state.is_collaborative:
+            # 버전이 바뀌어 편집기 키가 달라지므로 화면 전체를 한 번 다시 그림
+            st.session_state.save_notice = True
+            st.rerun(scope="app")
+        else:
+            st.success("✅ 변경사항이 저장되었습니다!")
+    
+    # 데이터 미리보기
+    with st.expander("🔍 데이터 미리보기 (처음 10행)"):
+        st.dataframe(edited_df.head(10))
+
+def show_validation_status(sheet_name: str):
+    """검증 규칙 위반 현황과 규칙 편집 (바뀐 셀만 다시 검사한 결과 사용)"""
+    validation = DataManager.get_validation(sheet_name)
+    if validation is not None and validation.total:
+        st.warning(f"⚠️ 검증 규칙 위반 {validation.total}건")
+        with st.expander("🚫 위반 목록"):
+            st.dataframe(validation.violations(), use_container_width=True, hide_index=True)
+    
+    config = DataManager.get_validation_config()
+    with st.expander("✅ 검증 규칙"):
+        st.caption(
+            '컬럼별 규칙 (JSON): type(number/integer/text/date/bool), required, min, max, pattern, allowed, unique '
+            '— 예: {"나이": {"type": "integer", "min": 0}, "이메일": {"pattern": ".+@.+", "unique": true}}'
+        )
+        sheet_rules = (config.get("rules") or {}).get(sheet_name, {})
+        rules_text = st.text_area(
+            "규칙",
+            value=json.dumps(sheet_rules, ensure_ascii=False, indent=2) if sheet_rules else "",
+            key=f"validation_rules_{sheet_name}"
+        )
+        reject_invalid = st.checkbox(
+            "규칙 위반 시 저장 거부",
+            value=bool(config.get("reject_invalid")),
+            help="켜면 위반 건수를 늘리는 수정은 저장되지 않습니다 (기존 위반은 허용)",
+            key=f"validation_reject_{sheet_name}"
+        )
+        if st.button("💾 규칙 저장", key=f"validation_save_{sheet_name}"):
+            try:
+                column_rules = json.loads(rules_text) if rules_text.strip() else {}
+                if not isinstance(column_rules, dict):
+                    raise ValueError("규칙은 {컬럼: {...}} 형식이어야 합니다.")
+                if DataManager.set_validation_rules(sheet_name, column_rules, reject_invalid):
+                    st.rerun(scope="app")
+                else:
+                    st.error("❌ 규칙을 저장하지 못했습니다.")
+            except ValueError as e:
+                st.error(f"❌ 규칙 오류: {str(e)}")
 
 def main():
     st.title("📊 웹 엑셀 편집기 (공동 편집)")
@@ -90,20 +391,18 @@ def main():
     
     # 세션 상태 초기화
     DataManager.initialize_session_state()
+    start_maintenance_job()
     
-    # 자동 새로고침을 위한 플레이스홀더
-    if st.session_state.is_collaborative:
-        # 30초마다 자동 동기화
-        if 'last_sync_time' not in st.session_state:
-            st.session_state.last_sync_time = time.time()
-        
-        current_time = time.time()
-        if current_time - st.session_state.last_sync_time > 30:
-            if DataManager.sync_collaborative_data():
-                st.session_state.last_sync_time = current_time
-                st.rerun()
-            st.session_state.last_sync_time = current_time
-    
+    # 전체 실행 동안에는 프래그먼트들이 같은 조회 캐시를 공유
+    DataManager.reset_run_cache()
+    st.session_state.in_full_run = True
+    try:
+        show_page()
+    finally:
+        st.session_state.in_full_run = False
+
+def show_page():
+    """전체 화면 (파일/시트/프로젝트가 바뀔 때 다시 실행)"""
     # 사이드바 - 파일 업로드 및 관리
     with st.sidebar:
         st.header("📁 파일 관리")
@@ -111,15 +410,17 @@ def main():
         # 파일 업로드
         uploaded_file = st.file_uploader(
             "엑셀 파일을 업로드하세요",
-            type=['xlsx', 'xls'],
-            help="Excel 파일만 업로드 가능합니다"
+            type=[extension.lstrip('.') for extension in supported_extensions()],
+            help="Excel / CSV / Parquet 파일을 업로드할 수 있습니다 (큰 파일은 설치된 가장 빠른 엔진으로 읽음)"
         )
         
-        if uploaded_file is not None:
+        # 같은 파일은 한 번만 읽음 (재실행마다 다시 읽으면 편집 내용과 캐시가 초기화됨)
+        if uploaded_file is not None and st.session_state.get('uploaded_file_id') != uploaded_file.file_id:
             try:
                 # 엑셀 파일 읽기
                 excel_data = ExcelHandler.read_excel(uploaded_file)
                 DataManager.save_excel_data(excel_data, uploaded_file.name)
+                st.session_state.uploaded_file_id = uploaded_file.file_id
                 st.success(f"✅ '{uploaded_file.name}' 파일이 업로드되었습니다!")
                 
             except Exception as e:
@@ -164,6 +465,9 @@ def main():
         
         # 공동 편집 관련 UI
         show_collaboration_sidebar()
+        
+        # 전체 검색
+        show_search_sidebar()
     
     # 메인 영역 - 데이터 표시 및 편집
     if st.session_state.file_uploaded:
@@ -185,65 +489,18 @@ def main():
                             st.success("동기화 완료!")
                             st.rerun()
             
-            # 데이터 정보
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("행 수", len(current_data))
-            with col2:
-                st.metric("열 수", len(current_data.columns))
-            with col3:
-                st.metric("시트 수", len(st.session_state.excel_data))
-            with col4:
-                if st.session_state.is_collaborative:
-                    active_users_count = len(DataManager.get_active_users())
-                    st.metric("활성 사용자", active_users_count)
+            # 데이터 정보 / 편집기
+            show_data_editor()
             
-            # 데이터 편집기 표시
-            st.markdown("### 📝 데이터 편집")
+            # 마지막 동기화 변경 내역
             if st.session_state.is_collaborative:
-                st.markdown("🤝 **공동 편집 모드**: 변경사항이 자동으로 다른 사용자들과 동기화됩니다.")
-            else:
-                st.markdown("셀을 클릭하여 직접 편집할 수 있습니다.")
-            
-            # Streamlit data_editor 사용 (AgGrid 대신)
-            edited_df = st.data_editor(
-                current_data,
-                use_container_width=True,
-                num_rows="dynamic",
-                key=f"data_editor_{st.session_state.current_sheet}_{st.session_state.current_version}"
-            )
-            
-            # 변경사항 자동 저장
-            if not edited_df.equals(current_data):
-                DataManager.update_sheet_data(st.session_state.current_sheet, edited_df)
-                
-                if st.session_state.is_collaborative:
-                    st.success("✅ 변경사항이 저장되고 동기화되었습니다!")
-                    time.sleep(1)  # 잠시 대기 후 새로고침
-                    st.rerun()
-                else:
-                    st.success("✅ 변경사항이 저장되었습니다!")
+                show_sync_diff_panel(current_data)
             
-            # 실시간 활동 표시
-            if st.session_state.is_collaborative:
-                with st.expander("👥 실시간 공동 편집 상태"):
-                    active_users = DataManager.get_active_users()
-                    if active_users:
-                        st.markdown("**현재 활성 사용자:**")
-                        for user in active_users:
-                            user_display = user["user_id"][:8]
-                            if user["user_id"] == st.session_state.user_id:
-                                st.markdown(f"- 🟢 {user_display} (나)")
-                            else:
-                                st.markdown(f"- 🔵 {user_display}")
-                        
-                        st.markdown(f"**마지막 업데이트:** {time.strftime('%Y-%m-%d %H:%M:%S')}")
-                    else:
-                        st.info("현재 활성 사용자가 없습니다.")
+            # 필터 / 정렬
+            show_query_panel()
             
-            # 데이터 미리보기
-            with st.expander("🔍 데이터 미리보기 (처음 10행)"):
-                st.dataframe(current_data.head(10))
+            # 피벗 / 그룹 집계
+            show_aggregation_panel()
         
         else:
             st.warning("⚠️ 선택된 시트의 데이터가 없습니다.")
@@ -288,7 +545,7 @@ def main():
         3. **두 번째 창에서** 생성된 프로젝트 ID로 참여하세요
         4. **양쪽 창에서** 데이터를 편집해보세요 - 실시간으로 동기화됩니다!
         
-        💡 **팁**: 30초마다 자동 동기화되며, 수동으로 "새로고침" 버튼을 클릭할 수도 있습니다.
+        💡 **팁**: 다른 사용자의 변경사항은 30초 안에 자동으로 반영되며, 수동으로 "새로고침" 버튼을 클릭할 수도 있습니다.
         """)
 
 if __name__ == "__main__":
@@ -0,0 +1,207 @@
+"""여러 엑셀 파일을 한 번에 공동 편집 프로젝트로 가져오거나 내보내는 명령줄 도구
+
+사용 예:
+    python batch_cli.py --workers 8 import ./workbooks
+    python batch_cli.py export ./exported --format csv
+중단된 작업은 같은 명령을 다시 실행하면 상태 파일을 보고 완료된 항목을 건너뜀
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+from utils.collaboration_manager import create_collaboration_manager
+from utils.excel_handler import ExcelHandler
+from utils.reader_engines import supported_extensions
+
+# 설치된 읽기 엔진으로 읽을 수 있는 형식 (대소문자 구분 없음)
+WORKBOOK_EXTENSIONS = set(supported_extensions())
+
+
+def _import_project_id(path: str) -> str:
+    """워크북 경로로 정한 프로젝트 ID (중단 후 다시 실행해도 같은 ID라서 중복 생성되지 않음)"""
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+
+
+def _find_workbooks(source: str) -> List[str]:
+    """디렉토리 아래의 읽을 수 있는 워크북 경로 (확장자 대소문자 무시)"""
+    return sorted(
+        os.path.abspath(os.path.join(root, name))
+        for root, _, files in os.walk(source)
+        for name in files
+        if os.path.splitext(name)[1].lower() in WORKBOOK_EXTENSIONS
+    )
+
+
+def _import_workbook(path: str, project_dir: str) -> Dict:
+    """워크북 하나를 읽어서 프로젝트 생성 (작업 프로세스에서 실행)
+
+    프로젝트를 만든 뒤 상태 파일에 기록하기 전에 중단됐다면, 다시 실행할 때 이미 있는 프로젝트를 완료로 처리
+    """
+    started = time.time()
+    manager = create_collaboration_manager(project_dir)
+    project_id = _import_project_id(path)
+    if manager.get_project_version(project_id) > 0:
+        project_data = manager.get_project_data(project_id)
+        excel_data = project_data["excel_data"] if project_data else {}
+    else:
+        excel_data = ExcelHandler.read_excel(path)
+        manager.create_project(excel_data, os.path.basename(path), project_id=project_id)
+    return {
+        "key": os.path.abspath(path),
+        "project_id": project_id,
+        "rows": sum(len(df) for df in excel_data.values()),
+        "bytes": os.path.getsize(path),
+        "seconds": time.time() - started
+    }
+
+
+def _export_project(project_id: str, project_dir: str, output_dir: str, file_format: str) -> Dict:
+    """프로젝트 하나를 xlsx 또는 시트별 CSV로 저장 (작업 프로세스에서 실행)"""
+    started = time.time()
+    project_data = create_collaboration_manager(project_dir).get_project_data(project_id)
+    if not project_data:
+        raise ValueError(f"프로젝트를 찾을 수 없습니다: {project_id}")
+
+    excel_data = project_data["excel_data"]
+    basename = f"{project_id}_{os.path.splitext(project_data['metadata'].get('filename', ''))[0]}"
+    written = 0
+
+    if file_format == "xlsx":
+        target = os.path.join(output_dir, f"{basename}.xlsx")
+        with open(target, "wb") as f:
+            f.write(ExcelHandler.dataframe_to_excel(excel_data))
+        written = os.path.getsize(target)
+    else:
+        target_dir = os.path.join(output_dir, basename)
+        os.makedirs(target_dir, exist_ok=True)
+        for sheet_name, df in excel_data.items():
+            target = os.path.join(target_dir, f"{str(sheet_name).replace(os.sep, '_')}.csv")
+            df.to_csv(target, index=False, encoding="utf-8-sig")
+            written += os.path.getsize(target)
+
+    return {
+        "key": project_id,
+        "project_id": project_id,
+        "rows": sum(len(df) for df in excel_data.values()),
+        "bytes": written,
+        "seconds": time.time() - started
+    }
+
+
+def _load_state(state_file: str) -> Set[str]:
+    """완료된 항목 키 목록 (한 줄에 JSON 하나)"""
+    done = set()
+    if not os.path.exists(state_file):
+        return done
+    with open(state_file, "r") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["key"])
+            except (ValueError, KeyError):
+                # 중단 중에 잘린 마지막 줄은 무시
+                continue
+    return done
+
+
+def _run(tasks: List[str], submit, state_file: str, workers: int) -> int:
+    """작업 풀에서 실행하면서 진행 상황 출력 / 상태 파일 기록 / 처리량 요약"""
+    done = _load_state(state_file)
+    pending = [task for task in tasks if task not in done]
+    skipped = len(tasks) - len(pending)
+    if skipped:
+        print(f"이전 실행에서 완료된 {skipped}개 항목을 건너뜁니다.")
+    if not pending:
+        print("처리할 항목이 없습니다.")
+        return 0
+
+    started = time.time()
+    total_rows = total_bytes = failures = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(state_file, "a") as state:
+        futures = {submit(executor, task): task for task in pending}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            task = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{completed}/{len(pending)}] ❌ {task}: {e}", file=sys.stderr)
+                continue
+
+            state.write(json.dumps(result, ensure_ascii=False) + "\n")
+            state.flush()
+            total_rows += result["rows"]
+            total_bytes += result["bytes"]
+            print(f"[{completed}/{len(pending)}] ✅ {task} -> {result['project_id']} "
+                  f"({result['rows']}행, {result['seconds']:.2f}s)")
+
+    elapsed = max(time.time() - started, 1e-9)
+    succeeded = len(pending) - failures
+    print("\n=== 요약 ===")
+    print(f"성공: {succeeded}  실패: {failures}  건너뜀: {skipped}")
+    print(f"소요 시간: {elapsed:.1f}s  (작업 프로세스 {workers}개)")
+    print(f"처리량: {succeeded / elapsed:.1f} 파일/s, {total_rows / elapsed:,.0f} 행/s, "
+          f"{total_bytes / elapsed / 1024 / 1024:.2f} MB/s")
+    return 1 if failures else 0
+
+
+def import_command(args) -> int:
+    """디렉토리의 워크북들을 프로젝트로 가져오기"""
+    paths = _find_workbooks(args.source)
+    print(f"{len(paths)}개 워크북을 '{args.project_dir}'로 가져옵니다.")
+    state_file = args.state_file or os.path.join(args.source, ".batch_import_state.jsonl")
+    return _run(
+        paths,
+        lambda executor, path: executor.submit(_import_workbook, path, args.project_dir),
+        state_file,
+        args.workers
+    )
+
+
+def export_command(args) -> int:
+    """프로젝트들을 xlsx / CSV로 내보내기"""
+    os.makedirs(args.output, exist_ok=True)
+    project_ids = args.projects or [project["project_id"] for project in create_collaboration_manager(args.project_dir).list_projects()]
+    print(f"{len(project_ids)}개 프로젝트를 '{args.output}'로 내보냅니다. (형식: {args.format})")
+    state_file = args.state_file or os.path.join(args.output, f".batch_export_{args.format}_state.jsonl")
+    return _run(
+        project_ids,
+        lambda executor, project_id: executor.submit(
+            _export_project, project_id, args.project_dir, args.output, args.format
+        ),
+        state_file,
+        args.workers
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="엑셀 프로젝트 일괄 가져오기/내보내기")
+    parser.add_argument("--project-dir", default="shared_projects", help="프로젝트 저장 디렉토리")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="작업 프로세스 수")
+    parser.add_argument("--state-file", default=None, help="재시작용 상태 파일 경로")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="워크북 디렉토리를 프로젝트로 가져오기")
+    import_parser.add_argument("source", help="워크북(.xlsx, .xls, .csv, .parquet 등)이 있는 디렉토리")
+    import_parser.set_defaults(func=import_command)
+
+    export_parser = subparsers.add_parser("export", help="프로젝트를 파일로 내보내기")
+    export_parser.add_argument("output", help="저장할 디렉토리")
+    export_parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    export_parser.add_argument("--projects", nargs="*", help="내보낼 프로젝트 ID (기본: 전체)")
+    export_parser.set_defaults(func=export_command)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
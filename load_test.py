@@ -0,0 +1,225 @@
+"""동시 공동 편집자 부하 테스트
+
+가상 사용자 N명이 앱과 같은 순서(참여 -> 하트비트 / 동기화 / 편집 / 목록 조회 반복)로
+CollaborationManager를 직접 호출하고, N을 늘려가며 처리량 / 지연 시간 / 잠금 대기 / 유실된 수정을 보고함
+
+사용 예:
+    python load_test.py --users 1,2,4,8,16 --duration 20
+    python load_test.py --users 8 --mode process --edit-mode patch --engine sqlite
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.collaboration_manager import STORAGE_ENGINES, create_collaboration_manager
+
+SHEET_NAME = "부하테스트"
+OPERATIONS = ["heartbeat", "sync", "edit", "list"]
+DEFAULT_WEIGHTS = [0.3, 0.3, 0.25, 0.15]
+
+
+def _make_workbook(rows: int) -> Dict[str, pd.DataFrame]:
+    """사용자 i가 i번째 행의 value 셀을 편집하는 테스트용 시트"""
+    return {
+        SHEET_NAME: pd.DataFrame({
+            "user": [f"u{i}" for i in range(rows)],
+            "value": [""] * rows,
+            "payload": [uuid.uuid4().hex * 4 for _ in range(rows)]
+        })
+    }
+
+
+def run_user(project_dir: str, engine: str, project_id: str, user_index: int, duration: float,
+             edit_mode: str, think_seconds: float, seed: int) -> Dict:
+    """가상 사용자 한 명의 작업 반복 (스레드 또는 프로세스에서 실행)
+
+    DataManager와 같이 세션 복사본(excel_data)과 버전(current_version)을 유지하며,
+    full 모드는 앱처럼 워크북 전체를 덮어쓰고 patch 모드는 자기 셀만 수정함
+    """
+    rng = random.Random(seed)
+    manager = create_collaboration_manager(project_dir, engine)
+    user_id = manager._generate_user_id()
+    latencies: Dict[str, List[float]] = {operation: [] for operation in ["join"] + OPERATIONS}
+    errors = 0
+    lost_updates = 0
+
+    started = time.perf_counter()
+    manager.join_project(project_id, user_id)
+    project_data = manager.get_project_data(project_id)
+    latencies["join"].append(time.perf_counter() - started)
+    excel_data = project_data["excel_data"]
+    current_version = project_data["metadata"]["version"]
+    last_token = None
+    unverified = False
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        operation = rng.choices(OPERATIONS, DEFAULT_WEIGHTS)[0]
+        op_started = time.perf_counter()
+        try:
+            if operation == "heartbeat":
+                manager.join_project(project_id, user_id)
+            elif operation == "sync":
+                server_data = manager.get_project_data(project_id)
+                if server_data and server_data["metadata"]["version"] > current_version:
+                    server_value = server_data["excel_data"][SHEET_NAME].at[user_index, "value"]
+                    if unverified and server_value != last_token:
+                        # 마지막 수정이 다른 사용자의 오래된 복사본에 덮어써짐
+                        lost_updates += 1
+                        # 이미 센 손실은 종료 후 최종 확인에서 다시 세지 않음
+                        last_token = None
+                    unverified = False
+                    excel_data = server_data["excel_data"]
+                    current_version = server_data["metadata"]["version"]
+            elif operation == "edit":
+                token = f"{user_id}:{uuid.uuid4().hex[:8]}"
+                if edit_mode == "patch":
+                    version = manager.patch_sheet(
+                        project_id, SHEET_NAME, cells=[{"row": user_index, "column": "value", "value": token}],
+                        user_id=user_id
+                    )
+                    success = version is not None
+                else:
+                    df = excel_data[SHEET_NAME].copy()
+                    df.at[user_index, "value"] = token
+                    excel_data = {**excel_data, SHEET_NAME: df}
+                    success = manager.update_project_data(project_id, excel_data, user_id)
+                if success:
+                    current_version += 1
+                    last_token = token
+                    unverified = True
+                else:
+                    errors += 1
+            else:
+                manager.list_projects()
+        except Exception:
+            errors += 1
+        latencies[operation].append(time.perf_counter() - op_started)
+        if think_seconds:
+            time.sleep(rng.uniform(0, 2 * think_seconds))
+
+    return {
+        "user_index": user_index,
+        "last_token": last_token,
+        "latencies": latencies,
+        "lock_stats": dict(manager.lock_stats),
+        "errors": errors,
+        "lost_updates": lost_updates
+    }
+
+
+def run_level(args, users: int) -> Dict:
+    """동시 사용자 N명으로 한 번 실행"""
+    project_dir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        manager = create_collaboration_manager(project_dir, args.engine)
+        project_id = manager.create_project(_make_workbook(max(args.rows, users)), "load_test.xlsx")
+        jobs = [
+            (project_dir, args.engine, project_id, i, args.duration, args.edit_mode, args.think_ms / 1000, args.seed + i)
+            for i in range(users)
+        ]
+
+        started = time.perf_counter()
+        if args.mode == "process":
+            with ProcessPoolExecutor(max_workers=users) as executor:
+                results = list(executor.map(run_user, *zip(*jobs)))
+        else:
+            results = [None] * users
+            threads = [
+                threading.Thread(target=lambda i=i: results.__setitem__(i, run_user(*jobs[i])))
+                for i in range(users)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - started
+
+        # 각 사용자의 마지막 수정이 최종 데이터에 남아 있는지 확인
+        final_df = manager.get_project_data(project_id)["excel_data"][SHEET_NAME]
+        final_lost = sum(
+            1 for result in results
+            if result["last_token"] is not None and final_df.at[result["user_index"], "value"] != result["last_token"]
+        )
+        return _summarize(users, elapsed, results, final_lost)
+    finally:
+        shutil.rmtree(project_dir, ignore_errors=True)
+
+
+def _summarize(users: int, elapsed: float, results: List[Dict], final_lost: int) -> Dict:
+    """사용자별 결과 합산"""
+    latencies = {
+        operation: np.array([value for result in results for value in result["latencies"][operation]])
+        for operation in ["join"] + OPERATIONS
+    }
+    total_ops = sum(len(values) for operation, values in latencies.items() if operation != "join")
+    lock_acquisitions = sum(result["lock_stats"]["acquisitions"] for result in results)
+    lock_wait = sum(result["lock_stats"]["wait_seconds"] for result in results)
+    return {
+        "users": users,
+        "ops": total_ops,
+        "throughput": total_ops / elapsed,
+        "edits": len(latencies["edit"]),
+        "latency_ms": {
+            operation: (
+                float(np.percentile(values, 50) * 1000),
+                float(np.percentile(values, 99) * 1000)
+            )
+            for operation, values in latencies.items() if len(values)
+        },
+        "lock_wait_total_s": lock_wait,
+        "lock_wait_mean_ms": lock_wait / lock_acquisitions * 1000 if lock_acquisitions else 0.0,
+        "lock_wait_max_ms": max((result["lock_stats"]["max_wait_seconds"] for result in results), default=0.0) * 1000,
+        "lost_updates": sum(result["lost_updates"] for result in results) + final_lost,
+        "errors": sum(result["errors"] for result in results)
+    }
+
+
+def _print_report(summaries: List[Dict]):
+    print()
+    header = f"{'N':>4} {'ops/s':>9} {'edits':>7} {'edit p50/p99 ms':>18} {'sync p50/p99 ms':>18} " \
+             f"{'lock wait mean/max ms':>22} {'lost':>6} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for summary in summaries:
+        edit = summary["latency_ms"].get("edit", (0.0, 0.0))
+        sync = summary["latency_ms"].get("sync", (0.0, 0.0))
+        print(
+            f"{summary['users']:>4} {summary['throughput']:>9.1f} {summary['edits']:>7} "
+            f"{edit[0]:>8.1f}/{edit[1]:<9.1f} {sync[0]:>8.1f}/{sync[1]:<9.1f} "
+            f"{summary['lock_wait_mean_ms']:>10.1f}/{summary['lock_wait_max_ms']:<11.1f} "
+            f"{summary['lost_updates']:>6} {summary['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 공동 편집자 부하 테스트")
+    parser.add_argument("--users", default="1,2,4,8", help="동시 사용자 수 목록 (쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=10, help="단계별 실행 시간 (초)")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--edit-mode", choices=["full", "patch"], default="full",
+                        help="full: 앱처럼 워크북 전체 저장, patch: 자기 셀만 수정")
+    parser.add_argument("--engine", choices=STORAGE_ENGINES, default="file")
+    parser.add_argument("--rows", type=int, default=1000, help="테스트 시트 행 수")
+    parser.add_argument("--think-ms", type=float, default=0, help="작업 사이 평균 대기 시간 (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    summaries = []
+    for users in [int(value) for value in args.users.split(",")]:
+        print(f"동시 사용자 {users}명 실행 중... ({args.mode}, {args.edit_mode}, {args.engine})")
+        summaries.append(run_level(args, users))
+    _print_report(summaries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""읽기 엔진별 파일 로드 시간 비교 (내 파일로 측정)
+
+사용 예:
+    python reader_benchmark.py 매출.xlsx 고객.csv
+    python reader_benchmark.py ./workbooks --engines calamine,openpyxl --repeat 5
+디렉토리를 주면 안의 지원 형식 파일을 모두 측정함
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+from utils.reader_engines import (
+    READER_ENGINES,
+    available_engines,
+    detect_extension,
+    read_workbook,
+    select_engine,
+    supported_extensions,
+)
+
+
+def _collect_paths(sources: List[str]) -> List[str]:
+    """파일 경로와 디렉토리(안의 지원 형식 파일, 확장자 대소문자 무시)를 펼친 목록"""
+    extensions = set(supported_extensions())
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(
+                os.path.join(root, name)
+                for root, _, files in os.walk(source)
+                for name in files
+                if os.path.splitext(name)[1].lower() in extensions
+            ))
+        else:
+            paths.append(source)
+    return paths
+
+
+def _best_of(repeat: int, run):
+    """repeat번 실행한 가장 짧은 시간 (초)과 마지막 결과"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run_benchmark(paths: List[str], engines: List[str], repeat: int) -> List[Dict]:
+    """파일마다 읽을 수 있는 설치된 엔진으로 로드 시간 측정"""
+    results = []
+    for path in paths:
+        extension = detect_extension(path)
+        size = os.path.getsize(path)
+        selected = select_engine(extension, size) if available_engines(extension) else None
+        for engine in available_engines(extension):
+            if engines and engine not in engines:
+                continue
+            try:
+                seconds, excel_data = _best_of(repeat, lambda: read_workbook(path, engine))
+                results.append({
+                    "path": path,
+                    "bytes": size,
+                    "engine": engine,
+                    "selected": engine == selected,
+                    "rows": sum(len(df) for df in excel_data.values()),
+                    "seconds": seconds,
+                    "error": None
+                })
+            except Exception as e:
+                results.append({
+                    "path": path, "bytes": size, "engine": engine, "selected": engine == selected,
+                    "rows": 0, "seconds": None, "error": str(e)
+                })
+    return results
+
+
+def _print_report(results: List[Dict]):
+    header = f"{'파일':<32} {'크기 MB':>8} {'엔진':<12} {'행 수':>10} {'로드 s':>8} {'행/s':>12}"
+    print()
+    print(header)
+    print("-" * (len(header) + 8))
+    for result in results:
+        name = os.path.basename(result["path"])[:32]
+        engine = result["engine"] + (" *" if result["selected"] else "")
+        if result["error"]:
+            print(f"{name:<32} {result['bytes'] / 1024 / 1024:>8.2f} {engine:<12} 오류: {result['error']}")
+            continue
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+        print(
+            f"{name:<32} {result['bytes'] / 1024 / 1024:>8.2f} {engine:<12} "
+            f"{result['rows']:>10,} {result['seconds']:>8.3f} {rate:>12,.0f}"
+        )
+    print("\n* 자동 선택되는 엔진")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="읽기 엔진 벤치마크")
+    parser.add_argument("sources", nargs="+", help="측정할 파일 또는 디렉토리")
+    parser.add_argument("--engines", default="", help="비교할 엔진 (쉼표 구분, 기본값: 설치된 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (가장 짧은 시간 사용)")
+    args = parser.parse_args()
+
+    engines = [value for value in args.engines.split(",") if value]
+    unknown = [value for value in engines if value not in READER_ENGINES]
+    if unknown:
+        parser.error(f"알 수 없는 엔진: {', '.join(unknown)}")
+
+    paths = _collect_paths(args.sources)
+    if not paths:
+        parser.error("측정할 파일이 없습니다.")
+    installed = [name for name, engine in READER_ENGINES.items() if engine.is_available()]
+    print(f"{len(paths)}개 파일, 설치된 엔진: {', '.join(installed)}")
+    _print_report(run_benchmark(paths, engines, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
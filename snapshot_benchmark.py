@@ -0,0 +1,129 @@
+"""스냅샷 저장 형식별 크기 / 저장 시간 / 로드 시간 비교
+
+사용 예:
+    python snapshot_benchmark.py --rows 200000
+    python snapshot_benchmark.py --source 매출.xlsx --levels 1,3,9,19
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.excel_handler import ExcelHandler
+from utils.snapshot_store import (
+    SNAPSHOT_FORMATS,
+    read_sheet_rows,
+    read_snapshot,
+    snapshot_filename,
+    write_snapshot,
+    zstandard,
+)
+
+
+def _make_workbook(rows: int, seed: int) -> Dict[str, pd.DataFrame]:
+    """숫자 / 문자열 / 날짜 열이 섞인 테스트용 시트"""
+    rng = np.random.default_rng(seed)
+    return {
+        "벤치마크": pd.DataFrame({
+            "id": np.arange(rows),
+            "amount": rng.normal(1000, 250, rows).round(2),
+            "quantity": rng.integers(1, 100, rows),
+            "region": rng.choice(["서울", "부산", "대구", "인천", "광주"], rows),
+            "memo": [f"note-{value}" for value in rng.integers(0, rows, rows)],
+            "ordered_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+        })
+    }
+
+
+def _path_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def _best_of(repeat: int, run) -> float:
+    """repeat번 실행한 가장 짧은 시간 (초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(excel_data: Dict[str, pd.DataFrame], formats: List[str], levels: List[int],
+                  repeat: int, range_rows: int) -> List[Dict]:
+    """형식(압축은 레벨별)마다 저장 후 전체 로드 / 행 범위 로드 시간 측정"""
+    sheet_name, sheet = max(excel_data.items(), key=lambda item: len(item[1]))
+    start = max(len(sheet) // 2 - range_rows // 2, 0)
+    cases = [
+        (snapshot_format, level)
+        for snapshot_format in formats
+        for level in (levels if snapshot_format == "compressed" else [None])
+    ]
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="snapshot_benchmark_")
+    try:
+        for version, (snapshot_format, level) in enumerate(cases, start=1):
+            path = os.path.join(workdir, snapshot_filename(version, snapshot_format))
+            write_seconds = _best_of(1, lambda: write_snapshot(path, excel_data, level or 0))
+            results.append({
+                "format": snapshot_format,
+                "level": level,
+                "bytes": _path_size(path),
+                "write_s": write_seconds,
+                "load_s": _best_of(repeat, lambda: read_snapshot(path)),
+                "range_s": _best_of(repeat, lambda: read_sheet_rows(path, sheet_name, start, start + range_rows))
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _print_report(results: List[Dict], range_rows: int):
+    baseline = next((result["bytes"] for result in results if result["format"] == "json"), None)
+    print()
+    header = f"{'형식':<12} {'레벨':>4} {'크기 MB':>9} {'비율':>6} {'저장 s':>8} {'전체 로드 s':>11} {f'{range_rows}행 로드 s':>13}"
+    print(header)
+    print("-" * (len(header) + 8))
+    for result in results:
+        ratio = f"{result['bytes'] / baseline:.2f}" if baseline else "-"
+        level = "-" if result["level"] is None else result["level"]
+        print(
+            f"{result['format']:<12} {level:>4} {result['bytes'] / 1024 / 1024:>9.2f} {ratio:>6} "
+            f"{result['write_s']:>8.3f} {result['load_s']:>11.3f} {result['range_s']:>13.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스냅샷 저장 형식 벤치마크")
+    parser.add_argument("--source", help="측정에 사용할 엑셀 파일 (없으면 테스트 데이터 생성)")
+    parser.add_argument("--rows", type=int, default=100000, help="테스트 데이터 행 수")
+    parser.add_argument("--formats", default=",".join(SNAPSHOT_FORMATS), help="비교할 형식 (쉼표 구분)")
+    parser.add_argument("--levels", default="1,3,9", help="압축 레벨 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="로드 반복 횟수 (가장 짧은 시간 사용)")
+    parser.add_argument("--range-rows", type=int, default=1000, help="행 범위 로드 크기")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    formats = [value for value in args.formats.split(",") if value]
+    unknown = [value for value in formats if value not in SNAPSHOT_FORMATS]
+    if unknown:
+        parser.error(f"지원하지 않는 형식: {', '.join(unknown)}")
+
+    excel_data = ExcelHandler.read_excel(args.source) if args.source else _make_workbook(args.rows, args.seed)
+    print(f"{sum(len(df) for df in excel_data.values()):,}행, 압축 방식: {'zstd' if zstandard else 'zlib'}")
+    results = run_benchmark(
+        excel_data, formats, [int(value) for value in args.levels.split(",")], args.repeat, args.range_rows
+    )
+    _print_report(results, args.range_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from utils.change_bus import InProcessChangeBus
+from utils.distributed_store import ObjectStoreCollaborationManager
+from utils.object_store import MemoryObjectStore
+
+SHEET = "시트"
+ROWS = 4
+EDITS_PER_ROW = 10
+
+
+@pytest.fixture
+def managers(tmp_path):
+    """같은 저장소와 버스를 공유하는 서버 두 대"""
+    object_store = MemoryObjectStore("test")
+    change_bus = InProcessChangeBus("test")
+    first = ObjectStoreCollaborationManager(object_store, change_bus, str(tmp_path / "a"))
+    second = ObjectStoreCollaborationManager(object_store, change_bus, str(tmp_path / "b"))
+    yield first, second
+    first.close()
+    second.close()
+
+
+def _create(manager):
+    return manager.create_project(
+        {SHEET: pd.DataFrame({"user": [f"u{i}" for i in range(ROWS)], "value": [""] * ROWS})}, "test.xlsx"
+    )
+
+
+def test_concurrent_commits_from_two_managers_keep_every_edit(managers):
+    project_id = _create(managers[0])
+    versions = []
+    versions_lock = threading.Lock()
+
+    def edit(manager, row):
+        for i in range(EDITS_PER_ROW):
+            version = manager.patch_sheet(
+                project_id, SHEET, cells=[{"row": row, "column": "value", "value": f"{row}:{i}"}]
+            )
+            with versions_lock:
+                versions.append(version)
+
+    # 행마다 스레드 하나, 두 매니저가 번갈아 담당
+    threads = [threading.Thread(target=edit, args=(managers[row % 2], row)) for row in range(ROWS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = ROWS * EDITS_PER_ROW
+    assert sorted(versions) == list(range(2, total + 2))
+    for manager in managers:
+        project_data = manager.get_project_data(project_id)
+        assert project_data["metadata"]["version"] == total + 1
+        assert project_data["excel_data"][SHEET]["value"].tolist() == [
+            f"{row}:{EDITS_PER_ROW - 1}" for row in range(ROWS)
+        ]
+
+
+def test_commit_invalidates_other_managers_cache(managers):
+    writer, reader = managers
+    project_id = _create(writer)
+    assert reader.get_project_data(project_id)["metadata"]["version"] == 1
+    assert reader._cache[project_id][0] == 1
+
+    writer.patch_sheet(project_id, SHEET, cells=[{"row": 0, "column": "value", "value": "새 값"}])
+
+    assert project_id not in reader._cache
+    project_data = reader.get_project_data(project_id)
+    assert project_data["metadata"]["version"] == 2
+    assert project_data["excel_data"][SHEET].at[0, "value"] == "새 값"
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from utils.sheet_diff import diff_sheets
+
+
+def _sheet_with_blank_run() -> pd.DataFrame:
+    """가운데에 빈 행 300개가 이어진 시트 (같은 해시가 200행 이상에서 1%를 넘음)"""
+    return pd.DataFrame({"이름": [f"앞{i}" for i in range(50)] + [""] * 300 + [f"뒤{i}" for i in range(50)]})
+
+
+def test_inserts_inside_repeated_rows():
+    old = _sheet_with_blank_run()
+    new = pd.concat([
+        old.iloc[:150], pd.DataFrame({"이름": ["X"]}),
+        old.iloc[150:250], pd.DataFrame({"이름": ["Y"]}),
+        old.iloc[250:]
+    ], ignore_index=True)
+    # 앞뒤 행도 바꿔서 같은 구간 건너뛰기 없이 전체를 정렬하게 함
+    new.loc[0, "이름"] = "첫 행"
+    new.loc[401, "이름"] = "끝 행"
+
+    diff = diff_sheets(old, new)
+
+    assert diff.inserted_rows == [150, 251]
+    assert diff.deleted_rows == []
+    assert diff.modified_rows == [(0, 0), (399, 401)]
+
+
+def test_delete_inside_repeated_rows():
+    old = _sheet_with_blank_run()
+    old.loc[200, "이름"] = "가운데"
+    new = old.drop(index=[200]).reset_index(drop=True)
+    new.loc[0, "이름"] = "첫 행"
+    new.loc[398, "이름"] = "끝 행"
+
+    diff = diff_sheets(old, new)
+
+    assert diff.deleted_rows == [200]
+    assert diff.inserted_rows == []
+    assert diff.modified_rows == [(0, 0), (399, 398)]
+
+
+def test_insert_row_and_clear_int_cell():
+    old = pd.DataFrame({"수량": range(1, 11), "이름": list("가나다라마바사아자차")})
+    new = pd.concat([pd.DataFrame({"수량": [99], "이름": ["새"]}), old], ignore_index=True)
+    # 셀을 비우면 int 열이 float 열로 바뀜
+    new.loc[5, "수량"] = None
+
+    diff = diff_sheets(old, new)
+
+    assert new["수량"].dtype == "float64"
+    assert diff.inserted_rows == [0]
+    assert diff.deleted_rows == []
+    assert diff.modified_rows == [(4, 5)]
+    assert len(diff.changed_cells) == 1
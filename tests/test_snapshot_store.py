@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from utils.snapshot_store import SNAPSHOT_FORMATS, read_sheet_rows, read_snapshot, snapshot_filename, write_snapshot
+
+
+def _sheet():
+    """시간대가 있는 날짜(빈 값 포함) / 정수 / 문자열 열"""
+    return pd.DataFrame({
+        "시각": pd.to_datetime(["2024-01-01 10:00", None, "2024-07-01 09:30"]).tz_localize("Asia/Seoul"),
+        "수량": [1, 2, 3],
+        "이름": ["가", "나", "다"]
+    })
+
+
+@pytest.mark.parametrize("snapshot_format", SNAPSHOT_FORMATS)
+def test_round_trip_keeps_timezone_and_empty_sheets(tmp_path, snapshot_format):
+    excel_data = {"시트": _sheet(), "빈 시트": _sheet().iloc[:0]}
+    path = str(tmp_path / snapshot_filename(2, snapshot_format))
+    write_snapshot(path, excel_data)
+
+    loaded = read_snapshot(path)
+    for sheet_name, expected in excel_data.items():
+        # columnar의 숫자 열은 매핑된 배열(memmap)이므로 복사해서 비교
+        pd.testing.assert_frame_equal(loaded[sheet_name].copy(), expected, check_index_type=False, obj=sheet_name)
+
+    # 빈 값만 있는 범위도 시간대 유지
+    rows, total = read_sheet_rows(path, "시트", 1, 2)
+    assert total == 3
+    assert rows["시각"].dtype == excel_data["시트"]["시각"].dtype
+    assert rows["시각"].isna().all()
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from utils.undo_manager import UndoManager
+
+
+def _history():
+    """행 삭제 -> 셀 수정(int 열이 float이 됨) -> 행 추가 순서의 시트 버전들"""
+    first = pd.DataFrame({"수량": [1, 2, 3, 4, 5], "이름": ["가", "나", "다", "라", "마"]})
+    deleted = first.drop(index=[2]).reset_index(drop=True)
+    edited = deleted.astype({"수량": "float64"})
+    edited.loc[0, "수량"] = 2.5
+    appended = pd.concat([edited, pd.DataFrame({"수량": [7.0], "이름": ["바"]})], ignore_index=True)
+    return [first, deleted, edited, appended]
+
+
+def test_undo_redo_round_trip_keeps_values_and_dtypes():
+    versions = _history()
+    manager = UndoManager()
+    for old_df, new_df in zip(versions, versions[1:]):
+        manager.record("시트", old_df, new_df)
+
+    current = versions[-1]
+    for expected in reversed(versions[:-1]):
+        _, current = manager.undo({"시트": current})
+        pd.testing.assert_frame_equal(current, expected)
+    assert not manager.can_undo
+
+    for expected in versions[1:]:
+        _, current = manager.redo({"시트": current})
+        pd.testing.assert_frame_equal(current, expected)
+    assert not manager.can_redo
+
+
+def test_undo_after_other_user_changed_rows_is_rejected():
+    versions = _history()
+    manager = UndoManager()
+    manager.record("시트", versions[0], versions[1])
+
+    changed = pd.concat([versions[1], versions[1].iloc[:1]], ignore_index=True)
+    with pytest.raises(ValueError):
+        manager.undo({"시트": changed})
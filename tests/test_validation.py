@@ -0,0 +1,68 @@
+import random
+
+import pandas as pd
+import pytest
+
+from utils.validation import ValidationError, enforce_rules
+
+CONFIG = {
+    "reject_invalid": True,
+    "rules": {"시트": {
+        "수량": {"type": "number", "min": 0, "max": 10, "required": True},
+        "코드": {"pattern": "[a-c]+", "allowed": ["a", "b", "cc"]},
+        "번호": {"unique": True, "required": True}
+    }}
+}
+VALUES = {"수량": [1, 5, 11, -1, None, "x"], "코드": ["a", "b", "cc", "d", None], "번호": [1, 2, 3, None, "k"]}
+
+
+def _violations(old_data, new_data, changes=None):
+    try:
+        enforce_rules(CONFIG, old_data, new_data, changes)
+    except ValidationError as e:
+        return e.violations
+    return {}
+
+
+def _changed_cells(old_df: pd.DataFrame, new_df: pd.DataFrame):
+    return [
+        (position, column, old_df.at[position, column], new_df.at[position, column])
+        for column in new_df.columns
+        for position in range(len(new_df))
+        if not (pd.isna(old_df.at[position, column]) and pd.isna(new_df.at[position, column]))
+        and old_df.at[position, column] != new_df.at[position, column]
+    ]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_changed_cells_match_full_scan(seed):
+    rng = random.Random(seed)
+    rows = rng.randint(1, 10)
+    old_df = pd.DataFrame({column: [rng.choice(values) for _ in range(rows)] for column, values in VALUES.items()},
+                          dtype=object)
+    new_df = old_df.copy()
+    for _ in range(rng.randint(1, 4)):
+        column = rng.choice(list(VALUES))
+        new_df.at[rng.randrange(rows), column] = rng.choice(VALUES[column])
+
+    changes = {"시트": _changed_cells(old_df, new_df)}
+    assert _violations({"시트": old_df}, {"시트": new_df}, changes) == _violations({"시트": old_df}, {"시트": new_df})
+
+
+def test_previous_data_is_loaded_only_for_structural_changes():
+    df = pd.DataFrame({"수량": [1, 2], "코드": ["a", "b"], "번호": [1, 2]})
+    loaded = []
+
+    def previous():
+        loaded.append(True)
+        return {"시트": df}
+
+    assert _violations(previous, {"시트": df}, {"시트": [(0, "수량", 1, 2)]}) == {}
+    assert _violations(previous, {"시트": df}, {"다른 시트": None}) == {}
+    assert not loaded
+
+    appended = pd.concat([df, pd.DataFrame({"수량": [20], "코드": ["a"], "번호": [1]})], ignore_index=True)
+    assert set(_violations(previous, {"시트": appended}, {"시트": None})) == {
+        ("시트", "수량", "range"), ("시트", "번호", "unique")
+    }
+    assert loaded
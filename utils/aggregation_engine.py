@@ -0,0 +1,223 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from utils.query_engine import hash_key
+
+AGGREGATIONS = ["sum", "count", "mean", "min", "max"]
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """합계 계산용 숫자 변환 (숫자가 아니면 None)"""
+    if hash_key(value) is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _GroupState:
+    """집계 설정 하나에 대한 그룹별 합계/개수 (점진적 갱신 가능)"""
+
+    def __init__(self, df: pd.DataFrame, version: int, keys: List[str], values: List[str], funcs: List[str]):
+        self.df = df
+        self.version = version
+        self.keys = keys
+        self.values = values
+        self.funcs = funcs
+        self.rows: Dict[tuple, int] = {}
+        self.sums: Dict[str, Dict[tuple, float]] = {column: {} for column in values}
+        self.numeric_counts: Dict[str, Dict[tuple, int]] = {column: {} for column in values}
+        self.counts: Dict[str, Dict[tuple, int]] = {column: {} for column in values}
+        self.extremes: Optional[pd.DataFrame] = None
+        self.result: Optional[pd.DataFrame] = None
+        self._build()
+
+    def _build(self):
+        """최초 한 번 groupby로 그룹별 상태 생성"""
+        frame = self.df[self.keys].copy()
+        named = {"rows": (self.keys[0], "size")}
+        for i, column in enumerate(self.values):
+            frame[f"__num_{i}"] = pd.to_numeric(self.df[column], errors="coerce")
+            frame[f"__cnt_{i}"] = self.df[column].notna()
+            named[f"sum_{i}"] = (f"__num_{i}", "sum")
+            named[f"num_{i}"] = (f"__num_{i}", "count")
+            named[f"cnt_{i}"] = (f"__cnt_{i}", "sum")
+        grouped = frame.groupby(self.keys, dropna=False, sort=False).agg(**named)
+
+        for group, row in zip(grouped.index, grouped.itertuples(index=False)):
+            key = self._normalize(group)
+            row = row._asdict()
+            self.rows[key] = int(row["rows"])
+            for i, column in enumerate(self.values):
+                self.sums[column][key] = float(row[f"sum_{i}"])
+                self.numeric_counts[column][key] = int(row[f"num_{i}"])
+                self.counts[column][key] = int(row[f"cnt_{i}"])
+
+    def _normalize(self, group: Any) -> tuple:
+        if not isinstance(group, tuple):
+            group = (group,)
+        return tuple(hash_key(value) for value in group)
+
+    def apply_changes(self, df: pd.DataFrame, changes: List[Tuple[int, str, Any, Any]], version: int):
+        """변경된 셀이 속한 행만 이전 그룹에서 빼고 새 그룹에 더함"""
+        changed_rows: Dict[int, Dict[str, Any]] = {}
+        for position, column, old_value, _ in changes:
+            if column in self.keys or column in self.values:
+                changed_rows.setdefault(position, {})[column] = old_value
+
+        for position, old_cells in changed_rows.items():
+            new_row = df.iloc[position]
+            old_key = tuple(hash_key(old_cells.get(column, new_row[column])) for column in self.keys)
+            new_key = tuple(hash_key(new_row[column]) for column in self.keys)
+            self._add_row(old_key, {column: old_cells.get(column, new_row[column]) for column in self.values}, -1)
+            self._add_row(new_key, {column: new_row[column] for column in self.values}, 1)
+            if old_key != new_key or any(column in self.values for column in old_cells):
+                # 최소/최대는 값을 빼는 방식으로 갱신할 수 없으므로 다시 계산
+                self.extremes = None
+
+        if changed_rows:
+            self.result = None
+        self.df = df
+        self.version = version
+
+    def _add_row(self, key: tuple, row_values: Dict[str, Any], sign: int):
+        rows = self.rows.get(key, 0) + sign
+        if rows <= 0:
+            self.rows.pop(key, None)
+            for column in self.values:
+                self.sums[column].pop(key, None)
+                self.numeric_counts[column].pop(key, None)
+                self.counts[column].pop(key, None)
+            return
+        self.rows[key] = rows
+        for column, value in row_values.items():
+            number = _to_number(value)
+            if number is not None:
+                self.sums[column][key] = self.sums[column].get(key, 0.0) + sign * number
+                self.numeric_counts[column][key] = self.numeric_counts[column].get(key, 0) + sign
+            if hash_key(value) is not None:
+                self.counts[column][key] = self.counts[column].get(key, 0) + sign
+
+    def to_frame(self) -> pd.DataFrame:
+        """현재 상태를 (그룹 키) x (값 컬럼, 집계) 형태의 DataFrame으로 변환"""
+        if self.result is not None:
+            return self.result
+
+        groups = list(self.rows)
+        index = pd.MultiIndex.from_tuples(groups, names=self.keys) if groups else pd.MultiIndex.from_tuples([], names=self.keys)
+        data = {}
+        extremes = self._extremes() if {"min", "max"} & set(self.funcs) else {}
+        for column in self.values:
+            for func in self.funcs:
+                if func == "sum":
+                    series = [self.sums[column].get(key, 0.0) for key in groups]
+                elif func == "count":
+                    series = [self.counts[column].get(key, 0) for key in groups]
+                elif func == "mean":
+                    series = [
+                        self.sums[column].get(key, 0.0) / self.numeric_counts[column][key]
+                        if self.numeric_counts[column].get(key) else float("nan")
+                        for key in groups
+                    ]
+                else:
+                    series = [extremes.get((column, func), {}).get(key) for key in groups]
+                data[(column, func)] = series
+
+        result = pd.DataFrame(data, index=index)
+        result.columns = pd.MultiIndex.from_tuples(list(data), names=["값", "집계"]) if data else result.columns
+        if len(self.keys) == 1:
+            result.index = result.index.get_level_values(0)
+        try:
+            result = result.sort_index(na_position="last")
+        except TypeError:
+            pass
+        self.result = result
+        return self.result
+
+    def _extremes(self) -> Dict[Tuple[str, str], Dict[tuple, Any]]:
+        """최소/최대값 (변경으로 무효화된 경우에만 groupby로 다시 계산)"""
+        if self.extremes is None:
+            columns = {column: pd.to_numeric(self.df[column], errors="coerce") for column in self.values}
+            frame = pd.concat([self.df[self.keys], pd.DataFrame(columns)], axis=1)
+            frame.columns = self.keys + [f"__val_{column}" for column in self.values]
+            grouped = frame.groupby(self.keys, dropna=False, sort=False)
+            self.extremes = pd.concat([grouped.min(), grouped.max()], axis=1, keys=["min", "max"])
+
+        extremes: Dict[Tuple[str, str], Dict[tuple, Any]] = {}
+        for func in ("min", "max"):
+            for column in self.values:
+                series = self.extremes[(func, f"__val_{column}")]
+                extremes[(column, func)] = {self._normalize(group): value for group, value in series.items()}
+        return extremes
+
+
+class AggregationEngine:
+    """그룹별 집계 / 피벗 결과를 시트 버전별로 캐시"""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[tuple, _GroupState]] = {}
+        self._lock = threading.RLock()
+
+    def aggregate(
+        self,
+        sheet_name: str,
+        df: pd.DataFrame,
+        version: int,
+        group_by: Sequence[str],
+        values: Sequence[str],
+        funcs: Sequence[str] = ("sum",),
+        pivot_column: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """그룹별 집계 (pivot_column을 주면 해당 컬럼 값을 열로 펼침)"""
+        keys = list(group_by) + ([pivot_column] if pivot_column else [])
+        for column in keys + list(values):
+            if column not in df.columns:
+                raise ValueError(f"존재하지 않는 컬럼: {column}")
+        for func in funcs:
+            if func not in AGGREGATIONS:
+                raise ValueError(f"지원하지 않는 집계: {func}")
+        if not keys:
+            raise ValueError("그룹 기준 컬럼을 하나 이상 선택하세요.")
+        if not values or not funcs:
+            raise ValueError("집계할 값 컬럼과 집계 방식을 선택하세요.")
+
+        spec = (tuple(keys), tuple(values), tuple(funcs))
+        with self._lock:
+            states = self._states.setdefault(sheet_name, {})
+            state = states.get(spec)
+            if state is None or state.version != version or state.df is not df:
+                state = _GroupState(df, version, keys, list(values), list(funcs))
+                states[spec] = state
+            result = state.to_frame()
+
+        if pivot_column:
+            if not group_by:
+                return result.T
+            result = result.unstack(pivot_column)
+        return result
+
+    def apply_changes(self, sheet_name: str, df: pd.DataFrame, changes: Optional[List[Tuple[int, str, Any, Any]]], version: int):
+        """셀 변경 내역을 캐시된 집계에 반영 (구조 변경이면 캐시 폐기)"""
+        with self._lock:
+            states = self._states.get(sheet_name)
+            if not states:
+                return
+            if changes is None:
+                del self._states[sheet_name]
+                return
+            for spec, state in list(states.items()):
+                if state.df.shape != df.shape:
+                    del states[spec]
+                    continue
+                state.apply_changes(df, changes, version)
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        """캐시 삭제"""
+        with self._lock:
+            if sheet_name is None:
+                self._states.clear()
+            else:
+                self._states.pop(sheet_name, None)
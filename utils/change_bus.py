@@ -0,0 +1,197 @@
+"""서버(레플리카) 사이의 프로젝트 잠금과 변경 알림
+
+- memory://<이름>: 같은 프로세스 안에서만 공유 (테스트용)
+- file://<디렉토리>: 같은 호스트의 여러 프로세스 (FileLock, 알림 없음)
+- redis://...: 여러 서버 (redis 패키지 필요, 잠금은 만료 시간이 있는 Redis 잠금, 알림은 pub/sub)
+
+알림은 캐시를 빨리 비우기 위한 힌트일 뿐이고, 최신 여부는 항상 저장소의 메타데이터 버전으로 확인함
+"""
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict, List
+from urllib.parse import urlparse
+
+from filelock import FileLock, Timeout
+
+CHANGE_CHANNEL = "excel-web:changes"
+# 잠금을 잡은 서버가 죽어도 이 시간이 지나면 풀림 (초), 잡고 있는 동안은 이 시간의 1/3마다 연장
+LOCK_LEASE_SECONDS = 60
+
+
+class ChangeBus(ABC):
+    """프로젝트 잠금 + 변경 알림 인터페이스"""
+
+    url = ""
+
+    @abstractmethod
+    def lock(self, name: str, timeout: float = 30) -> ContextManager[None]:
+        """이름별 배타 잠금 (timeout 초 안에 얻지 못하면 TimeoutError, 0이면 기다리지 않음)"""
+
+    @abstractmethod
+    def publish(self, event: Dict):
+        """변경 알림 전송"""
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """변경 알림 수신 콜백 등록"""
+
+    @abstractmethod
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        """subscribe로 등록한 콜백 해제 (등록되지 않은 콜백은 무시)"""
+
+
+class InProcessChangeBus(ChangeBus):
+    """프로세스 안에서만 동작하는 잠금/알림 (같은 이름이면 공유)"""
+
+    _shared: Dict[str, "InProcessChangeBus"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = ""):
+        self.url = f"memory://{name}"
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._subscribers: List[Callable[[Dict], None]] = []
+
+    @classmethod
+    def shared(cls, name: str) -> "InProcessChangeBus":
+        with cls._shared_lock:
+            if name not in cls._shared:
+                cls._shared[name] = cls(name)
+            return cls._shared[name]
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30):
+        with self._locks_guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        acquired = lock.acquire(blocking=False) if timeout == 0 else lock.acquire(timeout=timeout)
+        if not acquired:
+            raise TimeoutError(f"잠금 대기 시간 초과: {name}")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def publish(self, event: Dict):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"변경 알림 처리 오류: {e}")
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+
+class FileChangeBus(ChangeBus):
+    """같은 호스트의 프로세스끼리 FileLock으로 잠금 (알림은 전달하지 않음)"""
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+        self.url = f"file://{self.directory}"
+        os.makedirs(self.directory, exist_ok=True)
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30):
+        try:
+            with FileLock(os.path.join(self.directory, f"{name.replace(':', '_')}.lock"), timeout=timeout):
+                yield
+        except Timeout:
+            raise TimeoutError(f"잠금 대기 시간 초과: {name}")
+
+    def publish(self, event: Dict):
+        pass
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        pass
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        pass
+
+
+class RedisChangeBus(ChangeBus):
+    """Redis 잠금 + pub/sub 알림 (여러 서버용)"""
+
+    def __init__(self, url: str, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("Redis 변경 알림을 사용하려면 redis 패키지가 필요합니다.") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.url = url
+        # 콜백별 (pubsub, 수신 스레드)
+        self._listeners: Dict[Callable[[Dict], None], tuple] = {}
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30):
+        lock = self.client.lock(f"excel-web:lock:{name}", timeout=LOCK_LEASE_SECONDS, blocking_timeout=timeout)
+        if not lock.acquire(blocking=timeout != 0):
+            raise TimeoutError(f"잠금 대기 시간 초과: {name}")
+        # 커밋이 임대 시간보다 오래 걸려도 다른 서버가 잠금을 얻지 못하도록 잡고 있는 동안 연장
+        released = threading.Event()
+        renewer = threading.Thread(
+            target=self._renew_lease, args=(lock, name, released), name=f"lock-lease:{name}", daemon=True
+        )
+        renewer.start()
+        try:
+            yield
+        finally:
+            released.set()
+            renewer.join()
+            try:
+                lock.release()
+            except Exception as e:
+                # 연장하지 못해 임대 시간이 지나 이미 풀린 경우
+                print(f"잠금 해제 오류: {e}")
+
+    @staticmethod
+    def _renew_lease(lock, name: str, released: threading.Event):
+        """잠금을 놓을 때까지 임대 시간을 처음 길이로 다시 설정"""
+        while not released.wait(LOCK_LEASE_SECONDS / 3):
+            try:
+                lock.reacquire()
+            except Exception as e:
+                print(f"잠금 임대 연장 오류 ({name}): {e}")
+                return
+
+    def publish(self, event: Dict):
+        self.client.publish(CHANGE_CHANNEL, json.dumps(event))
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        def handle(message):
+            try:
+                callback(json.loads(message["data"]))
+            except Exception as e:
+                print(f"변경 알림 처리 오류: {e}")
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANGE_CHANNEL: handle})
+        self._listeners[callback] = (pubsub, pubsub.run_in_thread(sleep_time=1, daemon=True))
+
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        listener = self._listeners.pop(callback, None)
+        if listener is None:
+            return
+        pubsub, thread = listener
+        thread.stop()
+        pubsub.close()
+
+
+def create_change_bus(url: str) -> ChangeBus:
+    """URL에 맞는 변경 알림 버스 생성 (memory://, file://, redis://)"""
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return InProcessChangeBus.shared(parsed.netloc + parsed.path)
+    if parsed.scheme == "file":
+        return FileChangeBus(parsed.netloc + parsed.path)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisChangeBus(url)
+    raise ValueError(f"지원하지 않는 변경 알림 버스: {url}")
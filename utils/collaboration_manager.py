@@ -1,26 +1,114 @@
 import json
 import os
+import threading
 import time
 import hashlib
 from datetime import datetime
 from filelock import FileLock
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import uuid
+import tempfile
+from contextlib import contextmanager
+from utils.search_index import get_shared_index
+from utils.snapshot_store import (
+    DEFAULT_COMPRESSION_LEVEL,
+    SNAPSHOT_FORMATS,
+    parse_snapshot_version,
+    read_sheet_rows,
+    read_snapshot,
+    remove_snapshot,
+    snapshot_filename,
+    write_snapshot,
+)
+from utils.validation import ValidationError, enforce_rules, parse_rules
+
+STORAGE_ENGINES = ["file", "sqlite", "object"]
+
+# 데이터 스냅샷은 버전마다 새 파일로 쓰고, 최근 몇 개만 남김
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_RETENTION = 3
+
+def _fsync_dir(path: str):
+    """디렉토리 엔트리(rename) 내구성 보장 (지원하지 않는 OS는 무시)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_json(path: str, data, **json_kwargs):
+    """임시 파일에 쓰고 fsync 후 rename (읽는 쪽은 이전 또는 새 파일 전체만 보게 됨)"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, **json_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+def create_collaboration_manager(project_dir: str = "shared_projects", engine: str = None) -> "CollaborationManager":
+    """저장 엔진 설정(EXCEL_WEB_STORAGE_ENGINE: file | sqlite | object)에 맞는 CollaborationManager 생성
+
+    object 엔진은 EXCEL_WEB_OBJECT_STORE(file:// | memory:// | s3://)와
+    EXCEL_WEB_CHANGE_BUS(memory:// | file:// | redis://)를 사용 (기본값은 project_dir 아래 로컬 디렉토리)
+    """
+    engine = engine or os.environ.get("EXCEL_WEB_STORAGE_ENGINE", "file")
+    if engine not in STORAGE_ENGINES:
+        raise ValueError(f"지원하지 않는 저장 엔진: {engine}")
+    if engine == "sqlite":
+        from utils.sqlite_store import SQLiteCollaborationManager
+        return SQLiteCollaborationManager(project_dir)
+    if engine == "object":
+        from utils.change_bus import create_change_bus
+        from utils.distributed_store import ObjectStoreCollaborationManager
+        from utils.object_store import create_object_store
+        project_root = os.path.abspath(project_dir)
+        return ObjectStoreCollaborationManager(
+            create_object_store(os.environ.get("EXCEL_WEB_OBJECT_STORE", f"file://{project_root}/objects")),
+            create_change_bus(os.environ.get("EXCEL_WEB_CHANGE_BUS", f"file://{project_root}/bus")),
+            project_dir
+        )
+    return CollaborationManager(project_dir)
 
 class CollaborationManager:
-    def __init__(self, project_dir="shared_projects"):
+    def __init__(self, project_dir="shared_projects", snapshot_format: str = None, compression_level: int = None):
         self.project_dir = project_dir
+        # 새 스냅샷 저장 형식 (EXCEL_WEB_SNAPSHOT_FORMAT: json | compressed | columnar), 읽을 때는 확장자로 판단
+        self.snapshot_format = snapshot_format or os.environ.get("EXCEL_WEB_SNAPSHOT_FORMAT", "compressed")
+        if self.snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"지원하지 않는 스냅샷 형식: {self.snapshot_format}")
+        self.compression_level = compression_level if compression_level is not None else int(
+            os.environ.get("EXCEL_WEB_COMPRESSION_LEVEL", str(DEFAULT_COMPRESSION_LEVEL))
+        )
+        self.search_index = get_shared_index(os.path.abspath(project_dir))
+        # update.lock 획득 횟수와 대기 시간 (부하 테스트용 계측)
+        self.lock_stats = {"acquisitions": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        self._lock_stats_guard = threading.Lock()
         self.ensure_project_dir()
     
+    def close(self):
+        """알림 구독 등 공유 자원 정리 (파일 저장소는 정리할 것이 없음)"""
+    
     def ensure_project_dir(self):
         """프로젝트 디렉토리가 존재하는지 확인하고 생성"""
         if not os.path.exists(self.project_dir):
             os.makedirs(self.project_dir)
     
-    def create_project(self, excel_data: Dict[str, pd.DataFrame], filename: str) -> str:
-        """새 프로젝트 생성"""
-        project_id = self._generate_project_id()
+    def create_project(self, excel_data: Dict[str, pd.DataFrame], filename: str, project_id: str = None) -> str:
+        """새 프로젝트 생성 (project_id를 주면 그 ID 사용)"""
+        project_id = project_id or self._generate_project_id()
         project_path = os.path.join(self.project_dir, project_id)
         
         # 프로젝트 디렉토리 생성
@@ -36,12 +124,13 @@ class CollaborationManager:
             "version": 1
         }
         
-        # 메타데이터 저장
-        with open(os.path.join(project_path, "metadata.json"), "w") as f:
-            json.dump(metadata, f, indent=2)
+        # 엑셀 데이터 스냅샷을 먼저 저장하고 메타데이터가 가리키게 함
+        metadata["data_file"] = self._save_excel_data(project_path, excel_data, metadata["version"])
+        atomic_write_json(os.path.join(project_path, "metadata.json"), metadata, indent=2)
         
-        # 엑셀 데이터 저장
-        self._save_excel_data(project_path, excel_data)
+        # 검색 인덱스가 만들어져 있으면 함께 색인
+        if self.search_index.is_built:
+            self.search_index.index_project(project_id, metadata["version"], excel_data, filename)
         
         return project_id
     
@@ -64,64 +153,164 @@ class CollaborationManager:
         if not os.path.exists(project_path):
             return None
         
-        try:
-            # 메타데이터 로드
-            with open(os.path.join(project_path, "metadata.json"), "r") as f:
-                metadata = json.load(f)
-            
-            # 엑셀 데이터 로드
-            excel_data = self._load_excel_data(project_path)
-            
-            return {
-                "metadata": metadata,
-                "excel_data": excel_data
-            }
-        except Exception as e:
-            print(f"프로젝트 데이터 로드 오류: {e}")
-            return None
+        # 잠금 없이 읽음: 메타데이터와 그것이 가리키는 스냅샷은 모두 완성된 파일
+        for attempt in range(3):
+            try:
+                metadata = self._read_metadata(project_path)
+                excel_data = self._load_excel_data(project_path, metadata)
+                
+                return {
+                    "metadata": metadata,
+                    "excel_data": excel_data
+                }
+            except FileNotFoundError:
+                # 읽는 사이 오래된 스냅샷이 정리된 경우 최신 메타데이터로 다시 시도
+                continue
+            except Exception as e:
+                print(f"프로젝트 데이터 로드 오류: {e}")
+                return None
+        return None
     
-    def update_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None) -> bool:
-        """프로젝트 데이터 업데이트"""
+    def update_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None,
+                            changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None) -> bool:
+        """프로젝트 데이터 업데이트 (changes: {시트: 변경된 셀 목록 또는 구조 변경이면 None}, 목록에 없는 시트는 바뀌지 않음)"""
         project_path = os.path.join(self.project_dir, project_id)
         if not os.path.exists(project_path):
             return False
         
-        lock_file = os.path.join(project_path, "update.lock")
-        
         try:
-            with FileLock(lock_file):
-                # 메타데이터 업데이트
-                metadata_path = os.path.join(project_path, "metadata.json")
-                with open(metadata_path, "r") as f:
-                    metadata = json.load(f)
-                
-                metadata["last_modified"] = datetime.now().isoformat()
-                metadata["version"] += 1
-                
-                if user_id:
-                    metadata["active_users"][user_id] = datetime.now().isoformat()
-                
-                with open(metadata_path, "w") as f:
-                    json.dump(metadata, f, indent=2)
-                
-                # 엑셀 데이터 저장
-                self._save_excel_data(project_path, excel_data)
-                
+            with self._project_lock(project_path):
+                self._commit_project_data(project_id, excel_data, user_id, changes)
                 return True
+        except ValidationError:
+            raise
         except Exception as e:
             print(f"프로젝트 데이터 업데이트 오류: {e}")
             return False
     
+    def patch_sheet(self, project_id: str, sheet_name: str, cells: List[Dict] = None,
+                    append_rows: List[Dict] = None, user_id: str = None) -> Optional[int]:
+        """잠금을 잡은 상태에서 시트의 일부 셀/행만 수정 (새 버전 반환)
+
+        cells: [{"row": 0, "column": "이름", "value": "..."}], append_rows: [{"이름": "...", ...}]
+        """
+        project_path = os.path.join(self.project_dir, project_id)
+        if not os.path.exists(project_path):
+            return None
+        
+        with self._project_lock(project_path):
+            excel_data = self._load_excel_data(project_path)
+            if sheet_name not in excel_data:
+                raise ValueError(f"존재하지 않는 시트: {sheet_name}")
+            
+            df = excel_data[sheet_name].copy()
+            # 검증은 바뀐 셀만 (행 추가는 구조 변경으로 시트 전체 검사)
+            cell_changes = []
+            for cell in cells or []:
+                row, column = cell["row"], cell["column"]
+                if column not in df.columns:
+                    raise ValueError(f"존재하지 않는 컬럼: {column}")
+                if not 0 <= row < len(df):
+                    raise ValueError(f"행 범위를 벗어났습니다: {row}")
+                cell_changes.append((row, column, df.iat[row, df.columns.get_loc(column)], cell["value"]))
+                try:
+                    df.iat[row, df.columns.get_loc(column)] = cell["value"]
+                except (TypeError, ValueError):
+                    # 컬럼 타입과 맞지 않는 값은 object 컬럼으로 바꿔서 저장
+                    df[column] = df[column].astype(object)
+                    df.iat[row, df.columns.get_loc(column)] = cell["value"]
+            
+            if append_rows:
+                df = pd.concat([df, pd.DataFrame(append_rows)], ignore_index=True)
+            
+            excel_data[sheet_name] = df
+            return self._commit_project_data(
+                project_id, excel_data, user_id, {sheet_name: None if append_rows else cell_changes}
+            )
+    
+    @contextmanager
+    def _project_lock(self, project_path: str):
+        """프로젝트 쓰기 잠금 (대기 시간 기록)"""
+        lock = FileLock(os.path.join(project_path, "update.lock"))
+        started = time.perf_counter()
+        with lock:
+            self._record_lock_wait(time.perf_counter() - started)
+            yield
+    
+    def _record_lock_wait(self, waited: float):
+        """잠금 대기 시간 기록 (여러 스레드에서 호출)"""
+        with self._lock_stats_guard:
+            self.lock_stats["acquisitions"] += 1
+            self.lock_stats["wait_seconds"] += waited
+            self.lock_stats["max_wait_seconds"] = max(self.lock_stats["max_wait_seconds"], waited)
+    
+    def _commit_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None,
+                             changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None) -> int:
+        """버전을 올리고 데이터 저장 (update.lock을 잡은 상태에서 호출, changes가 있으면 바뀐 셀만 검증)"""
+        project_path = os.path.join(self.project_dir, project_id)
+        
+        # 메타데이터 업데이트
+        metadata = self._read_metadata(project_path)
+        
+        # 저장 거부가 켜져 있으면 이전 버전보다 위반이 늘어난 커밋은 ValidationError (이전 스냅샷은 필요할 때만 로드)
+        validation = metadata.get("validation")
+        if validation and validation.get("reject_invalid"):
+            enforce_rules(validation, lambda: self._load_excel_data(project_path, metadata), excel_data, changes)
+        
+        metadata["last_modified"] = datetime.now().isoformat()
+        metadata["version"] += 1
+        
+        if user_id:
+            metadata["active_users"][user_id] = datetime.now().isoformat()
+        
+        # 새 스냅샷을 완전히 쓴 뒤에 메타데이터를 원자적으로 교체 (이 시점에 새 버전이 보임)
+        metadata["data_file"] = self._save_excel_data(project_path, excel_data, metadata["version"])
+        atomic_write_json(os.path.join(project_path, "metadata.json"), metadata, indent=2)
+        self._prune_snapshots(project_path, metadata["version"])
+        
+        # 검색 인덱스는 바뀐 셀만 갱신
+        if self.search_index.is_built:
+            self.search_index.index_project(
+                project_id, metadata["version"], excel_data, metadata.get("filename", "")
+            )
+        
+        return metadata["version"]
+    
+    def get_validation_config(self, project_id: str) -> Dict:
+        """컬럼 검증 규칙 설정 ({"rules": {시트: {컬럼: 규칙}}, "reject_invalid": bool})"""
+        try:
+            return self._read_metadata(os.path.join(self.project_dir, project_id)).get("validation") or {}
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def set_validation_config(self, project_id: str, config: Dict) -> bool:
+        """컬럼 검증 규칙 설정 저장 (데이터 버전은 올리지 않음, 잘못된 규칙은 ValueError)"""
+        parse_rules(config)
+        project_path = os.path.join(self.project_dir, project_id)
+        if not os.path.exists(project_path):
+            return False
+        
+        with self._project_lock(project_path):
+            metadata = self._read_metadata(project_path)
+            metadata["validation"] = config
+            atomic_write_json(os.path.join(project_path, "metadata.json"), metadata, indent=2)
+        return True
+    
     def get_active_users(self, project_id: str) -> List[Dict]:
-        """활성 사용자 목록 가져오기"""
-        project_data = self.get_project_data(project_id)
-        if not project_data:
+        """활성 사용자 목록 가져오기 (시트 데이터는 읽지 않음)"""
+        project_path = os.path.join(self.project_dir, project_id)
+        try:
+            metadata = self._read_metadata(project_path)
+        except (FileNotFoundError, ValueError):
             return []
-        
+        return self._active_users_from_metadata(metadata)
+    
+    def _active_users_from_metadata(self, metadata: Dict) -> List[Dict]:
+        """메타데이터의 접속 기록 중 활성 사용자만 추출"""
         active_users = []
         current_time = datetime.now()
         
-        for user_id, last_activity in project_data["metadata"]["active_users"].items():
+        for user_id, last_activity in metadata.get("active_users", {}).items():
             last_activity_time = datetime.fromisoformat(last_activity)
             time_diff = (current_time - last_activity_time).total_seconds()
             
@@ -154,13 +343,59 @@ class CollaborationManager:
                             "filename": metadata.get("filename", "Unknown"),
                             "created_at": metadata.get("created_at", ""),
                             "last_modified": metadata.get("last_modified", ""),
-                            "active_users_count": len(self.get_active_users(project_id))
+                            "active_users_count": len(self._active_users_from_metadata(metadata))
                         })
                     except:
                         continue
         
         return sorted(projects, key=lambda x: x["last_modified"], reverse=True)
     
+    def search(self, query: str, limit: int = 100, refresh_interval: float = 10.0) -> List[Dict]:
+        """모든 프로젝트의 셀 내용 검색 (프로젝트/시트/행/열 단위 결과)"""
+        if time.time() - self.search_index.last_refreshed > refresh_interval:
+            self.refresh_search_index()
+        return self.search_index.search(query, limit)
+    
+    def refresh_search_index(self):
+        """디스크의 프로젝트 버전과 비교하여 바뀐 프로젝트만 다시 색인
+
+        메타데이터는 항상 새 파일로 교체되므로 inode/mtime이 그대로인 프로젝트는 읽지 않음
+        """
+        seen = set()
+        
+        if os.path.exists(self.project_dir):
+            for project_id in os.listdir(self.project_dir):
+                project_path = os.path.join(self.project_dir, project_id)
+                metadata_path = os.path.join(project_path, "metadata.json")
+                try:
+                    stat = os.stat(metadata_path)
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                seen.add(project_id)
+                stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if self.search_index.source_stamp(project_id) == stamp:
+                    continue
+                try:
+                    with open(metadata_path, "r") as f:
+                        metadata = json.load(f)
+                    version = metadata.get("version", 1)
+                    if self.search_index.project_version(project_id) != version:
+                        self.search_index.index_project(
+                            project_id,
+                            version,
+                            self._load_excel_data(project_path, metadata),
+                            metadata.get("filename", "")
+                        )
+                    self.search_index.set_source_stamp(project_id, stamp)
+                except Exception as e:
+                    print(f"검색 인덱스 갱신 오류: {e}")
+        
+        for project_id in set(self.search_index.indexed_projects()) - seen:
+            self.search_index.remove_project(project_id)
+        
+        self.search_index.is_built = True
+        self.search_index.last_refreshed = time.time()
+    
     def _generate_project_id(self) -> str:
         """프로젝트 ID 생성"""
         return str(uuid.uuid4())[:8]
@@ -169,49 +404,81 @@ class CollaborationManager:
         """사용자 ID 생성"""
         return f"user_{str(uuid.uuid4())[:8]}"
     
-    def _save_excel_data(self, project_path: str, excel_data: Dict[str, pd.DataFrame]):
-        """엑셀 데이터를 JSON 형태로 저장"""
-        data_to_save = {}
-        for sheet_name, df in excel_data.items():
-            data_to_save[sheet_name] = df.to_dict('records')
-        
-        with open(os.path.join(project_path, "data.json"), "w") as f:
-            json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+    def _read_metadata(self, project_path: str) -> Dict:
+        """메타데이터 로드"""
+        with open(os.path.join(project_path, "metadata.json"), "r") as f:
+            return json.load(f)
+    
+    def _save_excel_data(self, project_path: str, excel_data: Dict[str, pd.DataFrame], version: int) -> str:
+        """엑셀 데이터를 버전별 스냅샷으로 저장 (프로젝트 기준 상대 경로 반환)"""
+        snapshot_dir = os.path.join(project_path, SNAPSHOT_DIR)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        data_file = os.path.join(SNAPSHOT_DIR, snapshot_filename(version, self.snapshot_format))
+        write_snapshot(os.path.join(project_path, data_file), excel_data, self.compression_level)
+        _fsync_dir(snapshot_dir)
+        return data_file
     
-    def _load_excel_data(self, project_path: str) -> Dict[str, pd.DataFrame]:
-        """저장된 엑셀 데이터 로드"""
-        data_path = os.path.join(project_path, "data.json")
-        if not os.path.exists(data_path):
+    def _load_excel_data(self, project_path: str, metadata: Dict = None) -> Dict[str, pd.DataFrame]:
+        """메타데이터가 가리키는 스냅샷 로드 (이전 형식은 data.json)"""
+        if metadata is None:
+            metadata = self._read_metadata(project_path)
+        data_path = os.path.join(project_path, metadata.get("data_file", "data.json"))
+        if "data_file" not in metadata and not os.path.exists(data_path):
             return {}
         
-        with open(data_path, "r") as f:
-            data = json.load(f)
-        
-        excel_data = {}
-        for sheet_name, records in data.items():
-            excel_data[sheet_name] = pd.DataFrame(records)
-        
-        return excel_data
+        return read_snapshot(data_path)
+    
+    def get_sheet_rows(self, project_id: str, sheet_name: str, start: int = 0,
+                       stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+        """시트의 행 범위와 전체 행 수 (압축 스냅샷은 필요한 블록만 읽음, 없으면 None)"""
+        project_path = os.path.join(self.project_dir, project_id)
+        for attempt in range(3):
+            try:
+                metadata = self._read_metadata(project_path)
+                data_path = os.path.join(project_path, metadata.get("data_file", "data.json"))
+                if "data_file" not in metadata and not os.path.exists(data_path):
+                    return None
+                return read_sheet_rows(data_path, sheet_name, start, stop)
+            except FileNotFoundError:
+                # 읽는 사이에 스냅샷이 정리된 경우 새 메타데이터로 다시 시도
+                if attempt == 2 or not os.path.exists(project_path):
+                    return None
+                continue
+            except Exception as e:
+                print(f"시트 범위 로드 오류: {e}")
+                return None
+        return None
+    
+    def _prune_snapshots(self, project_path: str, current_version: int):
+        """최근 SNAPSHOT_RETENTION개를 제외한 스냅샷 삭제
+
+        이미 열린 파일은 삭제 후에도 끝까지 읽을 수 있고, 열기 전에 삭제된 경우 읽는 쪽이 다시 시도함
+        """
+        snapshot_dir = os.path.join(project_path, SNAPSHOT_DIR)
+        for name in os.listdir(snapshot_dir):
+            version = parse_snapshot_version(name)
+            if version is not None and version <= current_version - SNAPSHOT_RETENTION:
+                remove_snapshot(os.path.join(snapshot_dir, name))
     
     def _update_user_activity(self, project_id: str, user_id: str):
-        """사용자 활동 시간 업데이트"""
+        """사용자 활동 시간 업데이트
+
+        메타데이터 전체를 다시 쓰므로 데이터 커밋과 같은 잠금을 사용 (버전이 되돌아가지 않도록)
+        """
         project_path = os.path.join(self.project_dir, project_id)
         metadata_path = os.path.join(project_path, "metadata.json")
         
         try:
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
-            
-            metadata["active_users"][user_id] = datetime.now().isoformat()
-            
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f, indent=2)
+            with self._project_lock(project_path):
+                metadata = self._read_metadata(project_path)
+                metadata["active_users"][user_id] = datetime.now().isoformat()
+                atomic_write_json(metadata_path, metadata, indent=2)
         except Exception as e:
             print(f"사용자 활동 업데이트 오류: {e}")
     
     def get_project_version(self, project_id: str) -> int:
-        """프로젝트 버전 가져오기"""
-        project_data = self.get_project_data(project_id)
-        if project_data:
-            return project_data["metadata"].get("version", 1)
-        return 0
+        """프로젝트 버전 가져오기 (메타데이터만 읽음)"""
+        try:
+            return self._read_metadata(os.path.join(self.project_dir, project_id)).get("version", 1)
+        except (FileNotFoundError, ValueError):
+            return 0
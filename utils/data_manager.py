@@ -1,7 +1,18 @@
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any
-from utils.collaboration_manager import CollaborationManager
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from utils.collaboration_manager import create_collaboration_manager
+from utils.query_engine import QueryEngine
+from utils.aggregation_engine import AggregationEngine
+from utils.sheet_diff import SheetDiff, diff_sheets
+from utils.undo_manager import UndoManager
+from utils.validation import ValidationEngine, ValidationError, parse_rules
+
+@st.cache_resource
+def shared_collaboration_manager():
+    """프로세스당 하나의 저장소 관리자 (세션마다 만들면 변경 알림 구독과 캐시가 세션 수만큼 쌓임)"""
+    return create_collaboration_manager()
 
 class DataManager:
     @staticmethod
@@ -20,11 +31,41 @@ class DataManager:
         if 'user_id' not in st.session_state:
             st.session_state.user_id = None
         if 'collaboration_manager' not in st.session_state:
-            st.session_state.collaboration_manager = CollaborationManager()
+            st.session_state.collaboration_manager = shared_collaboration_manager()
         if 'current_version' not in st.session_state:
             st.session_state.current_version = 0
         if 'is_collaborative' not in st.session_state:
             st.session_state.is_collaborative = False
+        if 'query_engine' not in st.session_state:
+            st.session_state.query_engine = QueryEngine()
+        if 'aggregation_engine' not in st.session_state:
+            st.session_state.aggregation_engine = AggregationEngine()
+        if 'previous_excel_data' not in st.session_state:
+            st.session_state.previous_excel_data = None
+            st.session_state.previous_version = 0
+            st.session_state.sync_diff_cache = {}
+        if 'undo_manager' not in st.session_state:
+            st.session_state.undo_manager = UndoManager()
+            # 실행 취소 후 편집기 키를 바꿔서 이전 편집 상태가 다시 적용되지 않게 함
+            st.session_state.editor_revision = 0
+        if 'validation_engine' not in st.session_state:
+            st.session_state.validation_engine = ValidationEngine()
+            st.session_state.validation_config = {}
+        if 'run_cache' not in st.session_state:
+            st.session_state.run_cache = {}
+            st.session_state.last_heartbeat = 0.0
+    
+    @staticmethod
+    def reset_run_cache():
+        """실행(전체 또는 프래그먼트) 단위 조회 캐시 초기화"""
+        st.session_state.run_cache = {}
+    
+    @staticmethod
+    def memoize(key: str, compute: Callable[[], Any]) -> Any:
+        """같은 실행 안에서 반복되는 저장소 조회를 한 번만 수행"""
+        if key not in st.session_state.run_cache:
+            st.session_state.run_cache[key] = compute()
+        return st.session_state.run_cache[key]
     
     @staticmethod
     def save_excel_data(excel_data: Dict[str, pd.DataFrame], filename: str):
@@ -32,6 +73,8 @@ class DataManager:
         st.session_state.excel_data = excel_data
         st.session_state.filename = filename
         st.session_state.file_uploaded = True
+        st.session_state.undo_manager.clear()
+        DataManager._apply_validation_config({})
         
         # 첫 번째 시트를 기본으로 설정
         if excel_data:
@@ -65,9 +108,11 @@ class DataManager:
                 st.session_state.project_id = project_id
                 st.session_state.is_collaborative = True
                 st.session_state.excel_data = project_data["excel_data"]
+                st.session_state.undo_manager.clear()
                 st.session_state.filename = project_data["metadata"]["filename"]
                 st.session_state.file_uploaded = True
                 st.session_state.current_version = project_data["metadata"]["version"]
+                DataManager._apply_validation_config(project_data["metadata"].get("validation"))
                 
                 # 첫 번째 시트를 기본으로 설정
                 if project_data["excel_data"]:
@@ -86,9 +131,17 @@ class DataManager:
         project_data = collaboration_manager.get_project_data(st.session_state.project_id)
         
         if project_data:
+            # 검증 규칙은 데이터 버전과 별개로 바뀔 수 있음
+            DataManager._apply_validation_config(project_data["metadata"].get("validation"))
+            
             # 버전 체크
             server_version = project_data["metadata"]["version"]
             if server_version > st.session_state.current_version:
+                # 변경 내역 비교를 위해 이전 버전 보관
+                st.session_state.previous_excel_data = st.session_state.excel_data
+                st.session_state.previous_version = st.session_state.current_version
+                st.session_state.sync_diff_cache = {}
+                
                 # 새 버전이 있으면 업데이트
                 st.session_state.excel_data = project_data["excel_data"]
                 st.session_state.current_version = server_version
@@ -96,8 +149,8 @@ class DataManager:
         return False
     
     @staticmethod
-    def update_collaborative_data():
-        """공동 편집 데이터 업데이트"""
+    def update_collaborative_data(changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None):
+        """공동 편집 데이터 업데이트 (changes: {시트: 변경된 셀 목록}, 저장소가 바뀐 행만 다시 쓰도록 전달)"""
         if not st.session_state.is_collaborative or not st.session_state.project_id:
             return False
         
@@ -105,7 +158,8 @@ class DataManager:
         success = collaboration_manager.update_project_data(
             st.session_state.project_id,
             st.session_state.excel_data,
-            st.session_state.user_id
+            st.session_state.user_id,
+            changes=changes
         )
         
         if success:
@@ -121,17 +175,190 @@ class DataManager:
             return []
         
         collaboration_manager = st.session_state.collaboration_manager
-        return collaboration_manager.get_active_users(st.session_state.project_id)
+        project_id = st.session_state.project_id
+        return DataManager.memoize(
+            f"active_users:{project_id}",
+            lambda: collaboration_manager.get_active_users(project_id)
+        )
+    
+    @staticmethod
+    def list_projects():
+        """프로젝트 목록 가져오기"""
+        collaboration_manager = st.session_state.collaboration_manager
+        return DataManager.memoize("projects", collaboration_manager.list_projects)
+    
+    @staticmethod
+    def send_heartbeat(interval: float = 60) -> bool:
+        """접속 기록 갱신 (interval 초에 한 번만 저장소에 기록)"""
+        if not st.session_state.is_collaborative or not st.session_state.project_id:
+            return False
+        
+        now = time.time()
+        if now - st.session_state.last_heartbeat < interval:
+            return False
+        
+        collaboration_manager = st.session_state.collaboration_manager
+        if collaboration_manager.join_project(st.session_state.project_id, st.session_state.user_id):
+            st.session_state.last_heartbeat = now
+            st.session_state.run_cache.pop(f"active_users:{st.session_state.project_id}", None)
+            return True
+        return False
+    
+    @staticmethod
+    def has_remote_changes() -> bool:
+        """서버에 더 새로운 버전이 있는지 확인 (메타데이터만 읽음)"""
+        if not st.session_state.is_collaborative or not st.session_state.project_id:
+            return False
+        
+        collaboration_manager = st.session_state.collaboration_manager
+        return collaboration_manager.get_project_version(st.session_state.project_id) > st.session_state.current_version
+    
+    @staticmethod
+    def _apply_validation_config(config: Optional[Dict]):
+        """저장소의 검증 규칙 설정 반영 (바뀐 경우에만 검증 캐시 초기화)"""
+        config = config or {}
+        if config == st.session_state.validation_config:
+            return
+        try:
+            rules = parse_rules(config)
+        except ValueError as e:
+            print(f"검증 규칙 로드 오류: {e}")
+            return
+        st.session_state.validation_config = config
+        st.session_state.validation_engine.set_rules(rules)
+    
+    @staticmethod
+    def get_validation_config() -> Dict:
+        """현재 검증 규칙 설정"""
+        return st.session_state.validation_config
+    
+    @staticmethod
+    def set_validation_rules(sheet_name: str, column_rules: Dict[str, Dict], reject_invalid: bool) -> bool:
+        """시트의 컬럼 검증 규칙 저장 (공동 편집 모드에서는 프로젝트에 저장, 잘못된 규칙은 ValueError)"""
+        config = dict(st.session_state.validation_config)
+        rules = dict(config.get("rules") or {})
+        if column_rules:
+            rules[sheet_name] = column_rules
+        else:
+            rules.pop(sheet_name, None)
+        config["rules"] = rules
+        config["reject_invalid"] = reject_invalid
+        parse_rules(config)
+        
+        if st.session_state.is_collaborative and st.session_state.project_id:
+            collaboration_manager = st.session_state.collaboration_manager
+            if not collaboration_manager.set_validation_config(st.session_state.project_id, config):
+                return False
+        DataManager._apply_validation_config(config)
+        return True
+    
+    @staticmethod
+    def get_validation(sheet_name: str):
+        """시트의 현재 검증 상태 (규칙이 없으면 None, 처음 한 번만 전체 검사)"""
+        df = st.session_state.excel_data.get(sheet_name)
+        if df is None:
+            return None
+        return st.session_state.validation_engine.validate(sheet_name, df, st.session_state.current_version)
     
     @staticmethod
-    def update_sheet_data(sheet_name: str, updated_df: pd.DataFrame):
-        """특정 시트의 데이터 업데이트"""
+    def update_sheet_data(sheet_name: str, updated_df: pd.DataFrame, record_undo: bool = True):
+        """특정 시트의 데이터 업데이트 (저장 거부가 켜져 있으면 위반이 늘어나는 수정은 ValidationError)"""
         if 'excel_data' in st.session_state:
+            old_df = st.session_state.excel_data.get(sheet_name)
+            changes = DataManager.find_changed_cells(old_df, updated_df) if old_df is not None else None
+            validation_engine = st.session_state.validation_engine
+            
+            # 바뀐 셀만 다시 검사해서 서버에 보내기 전에 거부
+            if st.session_state.validation_config.get("reject_invalid") and old_df is not None:
+                increased = validation_engine.new_violations(
+                    sheet_name, old_df, updated_df, changes, st.session_state.current_version
+                )
+                if increased:
+                    validation_engine.invalidate(sheet_name)
+                    details = ", ".join(
+                        f"{column} {rule_name} {old}→{new}건"
+                        for (_, column, rule_name), (old, new) in list(increased.items())[:5]
+                    )
+                    raise ValidationError(f"검증 규칙 위반으로 저장할 수 없습니다: {details}", increased)
+            
             st.session_state.excel_data[sheet_name] = updated_df
             
             # 공동 편집 모드에서는 자동으로 서버에 업데이트
             if st.session_state.is_collaborative:
-                DataManager.update_collaborative_data()
+                try:
+                    DataManager.update_collaborative_data({sheet_name: changes})
+                except ValidationError:
+                    # 다른 세션에서 바뀐 규칙으로 서버가 거부한 경우
+                    st.session_state.excel_data[sheet_name] = old_df
+                    validation_engine.invalidate(sheet_name)
+                    raise
+            
+            if record_undo and old_df is not None:
+                st.session_state.undo_manager.record(sheet_name, old_df, updated_df, changes)
+            
+            # 캐시된 인덱스/집계/검증 상태에 변경된 셀만 반영
+            for engine in (st.session_state.query_engine, st.session_state.aggregation_engine, validation_engine):
+                engine.apply_changes(sheet_name, updated_df, changes, st.session_state.current_version)
+    
+    @staticmethod
+    def undo_last_edit() -> bool:
+        """내 마지막 수정 되돌리기 (공동 편집 모드에서는 되돌린 결과를 새 버전으로 저장)"""
+        return DataManager._apply_history(st.session_state.undo_manager.undo)
+    
+    @staticmethod
+    def redo_last_edit() -> bool:
+        """되돌린 수정 다시 적용"""
+        return DataManager._apply_history(st.session_state.undo_manager.redo)
+    
+    @staticmethod
+    def _apply_history(step) -> bool:
+        """실행 취소 / 다시 실행 공통 처리 (다른 사용자의 이후 수정과 충돌하면 ValueError)"""
+        # 공동 편집 모드에서는 최신 버전 위에 적용
+        DataManager.sync_collaborative_data()
+        result = step(st.session_state.excel_data)
+        if result is None:
+            return False
+        
+        sheet_name, df = result
+        DataManager.update_sheet_data(sheet_name, df, record_undo=False)
+        st.session_state.current_sheet = sheet_name
+        st.session_state.editor_revision += 1
+        return True
+    
+    @staticmethod
+    def find_changed_cells(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Optional[List[Tuple[int, str, Any, Any]]]:
+        """두 DataFrame 사이의 변경된 셀 목록 (행 위치, 컬럼, 이전 값, 새 값)
+
+        행/열 구성이 달라진 구조 변경이면 None 반환
+        """
+        if old_df.shape != new_df.shape or list(old_df.columns) != list(new_df.columns):
+            return None
+        
+        changes = []
+        for column in new_df.columns:
+            old_series = old_df[column].reset_index(drop=True)
+            new_series = new_df[column].reset_index(drop=True)
+            try:
+                equal = old_series.eq(new_series).fillna(False).to_numpy(dtype=bool)
+            except TypeError:
+                equal = (old_series.astype(str) == new_series.astype(str)).to_numpy()
+            # 양쪽 모두 결측값인 셀은 변경으로 보지 않음
+            both_null = old_series.isna().to_numpy() & new_series.isna().to_numpy()
+            for position in (~equal & ~both_null).nonzero()[0]:
+                changes.append((int(position), column, old_series.iat[position], new_series.iat[position]))
+        return changes
+    
+    @staticmethod
+    def get_sync_diff(sheet_name: str) -> Optional[SheetDiff]:
+        """마지막 동기화로 바뀐 내역 (동기화 후 한 번만 계산)"""
+        previous = st.session_state.get('previous_excel_data')
+        if not previous or sheet_name not in previous or sheet_name not in st.session_state.excel_data:
+            return None
+        
+        cache = st.session_state.sync_diff_cache
+        if sheet_name not in cache:
+            cache[sheet_name] = diff_sheets(previous[sheet_name], st.session_state.excel_data[sheet_name])
+        return cache[sheet_name]
     
     @staticmethod
     def get_current_data():
@@ -156,3 +383,8 @@ class DataManager:
         st.session_state.user_id = None
         st.session_state.current_version = 0
         st.session_state.is_collaborative = False
+        st.session_state.previous_excel_data = None
+        st.session_state.previous_version = 0
+        st.session_state.sync_diff_cache = {}
+        st.session_state.undo_manager.clear()
+        DataManager._apply_validation_config({})
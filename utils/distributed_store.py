@@ -0,0 +1,401 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.change_bus import ChangeBus
+from utils.collaboration_manager import SNAPSHOT_RETENTION, CollaborationManager
+from utils.object_store import ObjectStore
+from utils.search_index import get_shared_index
+from utils.snapshot_store import (
+    dump_compressed,
+    load_compressed,
+    load_compressed_rows,
+    parse_snapshot_version,
+    snapshot_filename,
+)
+from utils.validation import ValidationError, enforce_rules, parse_rules
+
+PROJECTS_PREFIX = "projects/"
+ARCHIVE_PREFIX = "_archive/"
+
+
+class ObjectStoreCollaborationManager(CollaborationManager):
+    """객체 저장소 + 변경 알림 버스 기반 프로젝트 저장소 (여러 서버에서 공유)
+
+    쓰기는 버스의 프로젝트 잠금 안에서 새 스냅샷 객체를 올린 뒤 메타데이터 객체를 교체하고,
+    읽기는 잠금 없이 메타데이터 -> 스냅샷 순서로 읽음
+    서버마다 최근 프로젝트 데이터를 버전별로 캐시하며, 다른 서버의 커밋 알림을 받으면 해당 캐시를 버림
+    프로세스에서 하나를 만들어 여러 세션/스레드가 공유하고, 더 이상 쓰지 않으면 close()로 알림 구독 해제
+    """
+
+    def __init__(self, object_store: ObjectStore, change_bus: ChangeBus, project_dir="shared_projects",
+                 cache_size: int = 8):
+        super().__init__(project_dir, snapshot_format="compressed")
+        self.object_store = object_store
+        self.change_bus = change_bus
+        self.search_index = get_shared_index(object_store.url)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[int, Dict[str, pd.DataFrame]]]" = OrderedDict()
+        # 세션 스레드와 알림 수신 스레드가 함께 캐시를 바꿈
+        self._cache_lock = threading.Lock()
+        self.change_bus.subscribe(self._on_change)
+
+    def close(self):
+        """변경 알림 구독 해제"""
+        self.change_bus.unsubscribe(self._on_change)
+
+    # 키 구성
+    def _metadata_key(self, project_id: str) -> str:
+        return f"{PROJECTS_PREFIX}{project_id}/metadata.json"
+
+    def _snapshot_key(self, project_id: str, version: int) -> str:
+        return f"{PROJECTS_PREFIX}{project_id}/snapshots/{snapshot_filename(version, 'compressed')}"
+
+    # 캐시
+    def _on_change(self, event: Dict):
+        """다른 서버의 커밋 알림: 더 오래된 캐시 삭제"""
+        with self._cache_lock:
+            cached = self._cache.get(event.get("project_id"))
+            if cached and cached[0] < event.get("version", 0):
+                self._cache.pop(event["project_id"], None)
+
+    def _remember(self, project_id: str, version: int, excel_data: Dict[str, pd.DataFrame]):
+        """버전별 데이터 캐시 (호출한 쪽이 DataFrame을 수정해도 영향받지 않도록 얕은 복사로 보관)"""
+        entry = (version, {sheet_name: df.copy(deep=False) for sheet_name, df in excel_data.items()})
+        with self._cache_lock:
+            self._cache[project_id] = entry
+            self._cache.move_to_end(project_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cached(self, project_id: str, version: int) -> Optional[Dict[str, pd.DataFrame]]:
+        """해당 버전의 캐시 (DataFrame은 얕은 복사로 반환하여 캐시가 수정되지 않게 함)"""
+        with self._cache_lock:
+            cached = self._cache.get(project_id)
+            if not cached or cached[0] != version:
+                return None
+            self._cache.move_to_end(project_id)
+        return {sheet_name: df.copy(deep=False) for sheet_name, df in cached[1].items()}
+
+    @contextmanager
+    def _project_lock(self, project_id: str, timeout: float = 30):
+        """버스의 프로젝트 쓰기 잠금 (대기 시간 기록)"""
+        started = time.perf_counter()
+        with self.change_bus.lock(f"project:{project_id}", timeout=timeout):
+            self._record_lock_wait(time.perf_counter() - started)
+            yield
+
+    def create_project(self, excel_data: Dict[str, pd.DataFrame], filename: str, project_id: str = None) -> str:
+        """새 프로젝트 생성 (project_id를 주면 그 ID 사용)"""
+        project_id = project_id or self._generate_project_id()
+        now = datetime.now().isoformat()
+        metadata = {
+            "project_id": project_id,
+            "filename": filename,
+            "created_at": now,
+            "last_modified": now,
+            "active_users": {},
+            "version": 1,
+            "data_file": self._snapshot_key(project_id, 1)
+        }
+        self.object_store.put(metadata["data_file"], dump_compressed(excel_data, self.compression_level))
+        self.object_store.put_json(self._metadata_key(project_id), metadata)
+        self._remember(project_id, 1, excel_data)
+
+        if self.search_index.is_built:
+            self.search_index.index_project(project_id, 1, excel_data, filename)
+        return project_id
+
+    def join_project(self, project_id: str, user_id: str = None) -> bool:
+        """프로젝트에 참여"""
+        if not user_id:
+            user_id = self._generate_user_id()
+        if self.object_store.get(self._metadata_key(project_id)) is None:
+            return False
+        self._update_user_activity(project_id, user_id)
+        return True
+
+    def get_project_data(self, project_id: str) -> Optional[Dict]:
+        """프로젝트 데이터 가져오기 (같은 버전이면 캐시 사용)"""
+        for attempt in range(3):
+            try:
+                metadata = self.object_store.get_json(self._metadata_key(project_id))
+                if metadata is None:
+                    return None
+                excel_data = self._cached(project_id, metadata["version"])
+                if excel_data is None:
+                    data = self.object_store.get(metadata["data_file"])
+                    if data is None:
+                        # 읽는 사이 오래된 스냅샷이 정리된 경우 최신 메타데이터로 다시 시도
+                        continue
+                    excel_data = load_compressed(data)
+                    self._remember(project_id, metadata["version"], excel_data)
+                    excel_data = self._cached(project_id, metadata["version"])
+                return {
+                    "metadata": metadata,
+                    "excel_data": excel_data
+                }
+            except Exception as e:
+                print(f"프로젝트 데이터 로드 오류: {e}")
+                return None
+        return None
+
+    def get_sheet_rows(self, project_id: str, sheet_name: str, start: int = 0,
+                       stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+        """시트의 행 범위와 전체 행 수 (캐시에 없으면 필요한 블록만 압축 해제)"""
+        for attempt in range(3):
+            try:
+                metadata = self.object_store.get_json(self._metadata_key(project_id))
+                if metadata is None:
+                    return None
+                excel_data = self._cached(project_id, metadata["version"])
+                if excel_data is not None:
+                    if sheet_name not in excel_data:
+                        return None
+                    df = excel_data[sheet_name]
+                    return df.iloc[start:stop].reset_index(drop=True), len(df)
+                data = self.object_store.get(metadata["data_file"])
+                if data is None:
+                    continue
+                return load_compressed_rows(data, sheet_name, start, stop)
+            except Exception as e:
+                print(f"시트 범위 로드 오류: {e}")
+                return None
+        return None
+
+    def update_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None,
+                            changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None) -> bool:
+        """프로젝트 데이터 업데이트 (changes: {시트: 변경된 셀 목록 또는 구조 변경이면 None}, 목록에 없는 시트는 바뀌지 않음)"""
+        try:
+            with self._project_lock(project_id):
+                return self._commit_project_data(project_id, excel_data, user_id, changes) is not None
+        except ValidationError:
+            raise
+        except Exception as e:
+            print(f"프로젝트 데이터 업데이트 오류: {e}")
+            return False
+
+    def patch_sheet(self, project_id: str, sheet_name: str, cells: List[Dict] = None,
+                    append_rows: List[Dict] = None, user_id: str = None) -> Optional[int]:
+        """잠금을 잡은 상태에서 시트의 일부 셀/행만 수정 (새 버전 반환)"""
+        with self._project_lock(project_id):
+            project_data = self.get_project_data(project_id)
+            if project_data is None:
+                return None
+            excel_data = project_data["excel_data"]
+            if sheet_name not in excel_data:
+                raise ValueError(f"존재하지 않는 시트: {sheet_name}")
+
+            df = excel_data[sheet_name].copy()
+            # 검증은 바뀐 셀만 (행 추가는 구조 변경으로 시트 전체 검사)
+            cell_changes = []
+            for cell in cells or []:
+                row, column = cell["row"], cell["column"]
+                if column not in df.columns:
+                    raise ValueError(f"존재하지 않는 컬럼: {column}")
+                if not 0 <= row < len(df):
+                    raise ValueError(f"행 범위를 벗어났습니다: {row}")
+                cell_changes.append((row, column, df.iat[row, df.columns.get_loc(column)], cell["value"]))
+                try:
+                    df.iat[row, df.columns.get_loc(column)] = cell["value"]
+                except (TypeError, ValueError):
+                    # 컬럼 타입과 맞지 않는 값은 object 컬럼으로 바꿔서 저장
+                    df[column] = df[column].astype(object)
+                    df.iat[row, df.columns.get_loc(column)] = cell["value"]
+
+            if append_rows:
+                df = pd.concat([df, pd.DataFrame(append_rows)], ignore_index=True)
+
+            excel_data[sheet_name] = df
+            return self._commit_project_data(
+                project_id, excel_data, user_id, {sheet_name: None if append_rows else cell_changes}
+            )
+
+    def _commit_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None,
+                             changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None) -> Optional[int]:
+        """버전을 올리고 데이터 저장 (프로젝트 잠금을 잡은 상태에서 호출, 프로젝트가 없으면 None)"""
+        metadata = self.object_store.get_json(self._metadata_key(project_id))
+        if metadata is None:
+            return None
+
+        validation = metadata.get("validation")
+        if validation and validation.get("reject_invalid"):
+            # 이전 버전은 구조가 바뀐 시트가 있을 때만 로드
+            enforce_rules(
+                validation, lambda: (self.get_project_data(project_id) or {}).get("excel_data"), excel_data, changes
+            )
+
+        metadata["last_modified"] = datetime.now().isoformat()
+        metadata["version"] += 1
+        if user_id:
+            metadata["active_users"][user_id] = datetime.now().isoformat()
+
+        # 새 스냅샷 객체를 완전히 올린 뒤에 메타데이터 객체를 교체 (이 시점에 새 버전이 보임)
+        metadata["data_file"] = self._snapshot_key(project_id, metadata["version"])
+        self.object_store.put(metadata["data_file"], dump_compressed(excel_data, self.compression_level))
+        self.object_store.put_json(self._metadata_key(project_id), metadata)
+        self.object_store.delete(self._snapshot_key(project_id, metadata["version"] - SNAPSHOT_RETENTION))
+
+        self._remember(project_id, metadata["version"], excel_data)
+        self.change_bus.publish({"type": "commit", "project_id": project_id, "version": metadata["version"]})
+
+        if self.search_index.is_built:
+            self.search_index.index_project(
+                project_id, metadata["version"], excel_data, metadata.get("filename", "")
+            )
+        return metadata["version"]
+
+    def _update_user_activity(self, project_id: str, user_id: str):
+        """사용자 활동 시간 업데이트 (메타데이터 객체를 교체하므로 커밋과 같은 잠금 사용)"""
+        try:
+            with self._project_lock(project_id):
+                metadata = self.object_store.get_json(self._metadata_key(project_id))
+                if metadata is None:
+                    return
+                metadata["active_users"][user_id] = datetime.now().isoformat()
+                self.object_store.put_json(self._metadata_key(project_id), metadata)
+        except Exception as e:
+            print(f"사용자 활동 업데이트 오류: {e}")
+
+    def get_validation_config(self, project_id: str) -> Dict:
+        """컬럼 검증 규칙 설정"""
+        metadata = self.object_store.get_json(self._metadata_key(project_id))
+        return (metadata or {}).get("validation") or {}
+
+    def set_validation_config(self, project_id: str, config: Dict) -> bool:
+        """컬럼 검증 규칙 설정 저장 (데이터 버전은 올리지 않음)"""
+        parse_rules(config)
+        with self._project_lock(project_id):
+            metadata = self.object_store.get_json(self._metadata_key(project_id))
+            if metadata is None:
+                return False
+            metadata["validation"] = config
+            self.object_store.put_json(self._metadata_key(project_id), metadata)
+        return True
+
+    def get_active_users(self, project_id: str) -> List[Dict]:
+        """활성 사용자 목록 가져오기 (시트 데이터는 읽지 않음)"""
+        metadata = self.object_store.get_json(self._metadata_key(project_id))
+        return self._active_users_from_metadata(metadata) if metadata else []
+
+    def get_project_version(self, project_id: str) -> int:
+        """프로젝트 버전 가져오기 (메타데이터만 읽음)"""
+        metadata = self.object_store.get_json(self._metadata_key(project_id))
+        return metadata.get("version", 1) if metadata else 0
+
+    def _all_metadata(self) -> List[Dict]:
+        """모든 프로젝트 메타데이터"""
+        metadata_list = []
+        for key in self.object_store.list(PROJECTS_PREFIX):
+            if not key.endswith("/metadata.json"):
+                continue
+            try:
+                metadata = self.object_store.get_json(key)
+            except ValueError:
+                continue
+            if metadata:
+                metadata_list.append(metadata)
+        return metadata_list
+
+    def list_projects(self) -> List[Dict]:
+        """모든 프로젝트 목록 가져오기"""
+        projects = [
+            {
+                "project_id": metadata["project_id"],
+                "filename": metadata.get("filename", "Unknown"),
+                "created_at": metadata.get("created_at", ""),
+                "last_modified": metadata.get("last_modified", ""),
+                "active_users_count": len(self._active_users_from_metadata(metadata))
+            }
+            for metadata in self._all_metadata()
+        ]
+        return sorted(projects, key=lambda x: x["last_modified"], reverse=True)
+
+    def refresh_search_index(self):
+        """저장소의 프로젝트 버전과 비교하여 바뀐 프로젝트만 다시 색인"""
+        seen = set()
+        for metadata in self._all_metadata():
+            project_id = metadata["project_id"]
+            seen.add(project_id)
+            if self.search_index.project_version(project_id) == metadata.get("version", 1):
+                continue
+            project_data = self.get_project_data(project_id)
+            if project_data:
+                self.search_index.index_project(
+                    project_id,
+                    project_data["metadata"]["version"],
+                    project_data["excel_data"],
+                    metadata.get("filename", "")
+                )
+
+        for project_id in set(self.search_index.indexed_projects()) - seen:
+            self.search_index.remove_project(project_id)
+
+        self.search_index.is_built = True
+        self.search_index.last_refreshed = time.time()
+
+    def run_maintenance(self, presence_ttl: float, project_ttl: float, archive: bool) -> Dict:
+        """오래된 접속 기록 / 스냅샷 / 방치된 프로젝트 정리 (MaintenanceJob에서 호출)
+
+        여러 서버 중 한 곳에서만 실행되도록 버스 잠금을 사용하고, 편집 중인 프로젝트는 건너뜀
+        """
+        report = {"expired_users": 0, "archived_projects": 0, "deleted_projects": 0,
+                  "removed_snapshots": 0, "skipped_busy": 0, "reclaimed_bytes": 0}
+        try:
+            with self.change_bus.lock("maintenance", timeout=0):
+                for metadata in self._all_metadata():
+                    try:
+                        with self._project_lock(metadata["project_id"], timeout=0):
+                            self._maintain_project(metadata["project_id"], presence_ttl, project_ttl, archive, report)
+                    except TimeoutError:
+                        report["skipped_busy"] += 1
+        except TimeoutError:
+            report["skipped"] = "다른 서버에서 정리 작업 실행 중"
+        return report
+
+    def _maintain_project(self, project_id: str, presence_ttl: float, project_ttl: float, archive: bool,
+                          report: Dict):
+        """프로젝트 하나 정리 (프로젝트 잠금을 잡은 상태에서 호출)"""
+        metadata = self.object_store.get_json(self._metadata_key(project_id))
+        if metadata is None:
+            return
+        now = datetime.now()
+
+        active_users = metadata.get("active_users", {})
+        fresh_users = {
+            user_id: last_activity
+            for user_id, last_activity in active_users.items()
+            if (now - datetime.fromisoformat(last_activity)).total_seconds() < presence_ttl
+        }
+        if len(fresh_users) != len(active_users):
+            report["expired_users"] += len(active_users) - len(fresh_users)
+            metadata["active_users"] = fresh_users
+            self.object_store.put_json(self._metadata_key(project_id), metadata)
+
+        keys = self.object_store.list(f"{PROJECTS_PREFIX}{project_id}/")
+        idle_seconds = (now - datetime.fromisoformat(metadata["last_modified"])).total_seconds()
+        if project_ttl and idle_seconds > project_ttl and not fresh_users:
+            for key in keys:
+                if archive:
+                    data = self.object_store.get(key)
+                    if data is not None:
+                        self.object_store.put(ARCHIVE_PREFIX + key[len(PROJECTS_PREFIX):], data)
+                self.object_store.delete(key)
+            report["archived_projects" if archive else "deleted_projects"] += 1
+            with self._cache_lock:
+                self._cache.pop(project_id, None)
+            self.search_index.remove_project(project_id)
+            return
+
+        # 현재 버전을 가리키지 않는 오래된 스냅샷 (커밋 중 삭제에 실패한 것 포함)
+        keep_from = metadata["version"] - SNAPSHOT_RETENTION
+        for key in keys:
+            version = parse_snapshot_version(key.rsplit("/", 1)[-1])
+            if version is not None and version <= keep_from and key != metadata["data_file"]:
+                self.object_store.delete(key)
+                report["removed_snapshots"] += 1
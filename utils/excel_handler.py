@@ -2,14 +2,15 @@ import pandas as pd
 import io
 from openpyxl import load_workbook
 import xlsxwriter
+from utils.reader_engines import read_workbook
 
 class ExcelHandler:
     @staticmethod
-    def read_excel(file_buffer):
-        """엑셀 파일을 읽어서 DataFrame으로 반환"""
+    def read_excel(file_buffer, engine: str = None):
+        """엑셀 / CSV / Parquet 파일을 읽어서 {시트 이름: DataFrame}으로 반환 (engine이 없으면 형식과 크기로 선택)"""
         try:
             # 여러 시트가 있을 수 있으므로 모든 시트 읽기
-            excel_data = pd.read_excel(file_buffer, sheet_name=None)
+            excel_data = read_workbook(file_buffer, engine)
             return excel_data
         except Exception as e:
             raise Exception(f"엑셀 파일 읽기 오류: {str(e)}")
@@ -18,13 +19,17 @@ class ExcelHandler:
     def dataframe_to_excel(dataframes_dict):
         """DataFrame 딕셔너리를 엑셀 파일로 변환"""
         output = io.BytesIO()
+        ExcelHandler.write_excel(dataframes_dict, output)
         
+        output.seek(0)
+        return output.getvalue()
+    
+    @staticmethod
+    def write_excel(dataframes_dict, output):
+        """DataFrame 딕셔너리를 엑셀 파일로 파일 객체에 기록"""
         with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
             for sheet_name, df in dataframes_dict.items():
                 df.to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        output.seek(0)
-        return output.getvalue()
     
     @staticmethod
     def get_sheet_names(file_buffer):
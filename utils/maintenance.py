@@ -0,0 +1,245 @@
+"""프로젝트 저장소 정리 작업 (오래된 접속 기록 / 방치된 프로젝트 / 스냅샷)
+
+실행: python -m utils.maintenance --once
+"""
+import argparse
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from filelock import FileLock, Timeout
+
+from utils.collaboration_manager import (
+    SNAPSHOT_DIR,
+    SNAPSHOT_RETENTION,
+    CollaborationManager,
+    atomic_write_json,
+    create_collaboration_manager,
+)
+from utils.snapshot_store import parse_snapshot_version, remove_snapshot
+
+ARCHIVE_DIR = "_archive"
+MAINTENANCE_LOCK = "maintenance.lock"
+# 쓰다가 중단된 임시 파일로 판단하는 기준 (초)
+STALE_TMP_SECONDS = 3600
+
+
+def _path_size(path: str) -> int:
+    """파일 또는 디렉토리 전체 크기"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+def _remove_file(path: str) -> int:
+    """파일 삭제 후 확보된 크기 반환"""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+
+class MaintenanceJob:
+    """주기적으로 저장소를 정리하는 백그라운드 작업
+
+    프로젝트마다 update.lock을 기다리지 않고(timeout=0) 시도하므로, 편집 중인 프로젝트는 다음 주기로 넘어감
+    """
+
+    def __init__(self, collaboration_manager: CollaborationManager, presence_ttl: float = 3600,
+                 project_ttl_days: float = 0, archive: bool = True):
+        self.collaboration_manager = collaboration_manager
+        self.presence_ttl = presence_ttl
+        # 0이면 방치된 프로젝트를 정리하지 않음
+        self.project_ttl_days = project_ttl_days
+        self.archive = archive
+        self.last_report: Optional[Dict] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, collaboration_manager: CollaborationManager = None) -> "MaintenanceJob":
+        """환경 변수 설정으로 생성"""
+        return cls(
+            collaboration_manager or create_collaboration_manager(),
+            presence_ttl=float(os.environ.get("EXCEL_WEB_PRESENCE_TTL", "3600")),
+            project_ttl_days=float(os.environ.get("EXCEL_WEB_PROJECT_TTL_DAYS", "0")),
+            archive=os.environ.get("EXCEL_WEB_EXPIRED_PROJECTS", "archive") != "delete"
+        )
+
+    def start(self, interval: float = 600) -> "MaintenanceJob":
+        """데몬 스레드로 주기 실행 시작"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="maintenance", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """주기 실행 중지"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _loop(self, interval: float):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"저장소 정리 오류: {e}")
+            self._stop_event.wait(interval)
+
+    def run_once(self) -> Dict:
+        """정리 작업 한 번 실행 (다른 프로세스가 실행 중이면 건너뜀)"""
+        report = {
+            "started_at": datetime.now().isoformat(),
+            "expired_users": 0,
+            "archived_projects": 0,
+            "deleted_projects": 0,
+            "removed_snapshots": 0,
+            "removed_tmp_files": 0,
+            "skipped_busy": 0,
+            "reclaimed_bytes": 0
+        }
+
+        project_dir = self.collaboration_manager.project_dir
+        try:
+            with FileLock(os.path.join(project_dir, MAINTENANCE_LOCK), timeout=0):
+                if hasattr(self.collaboration_manager, "run_maintenance"):
+                    # 파일 구조가 아닌 저장 엔진은 엔진이 직접 정리
+                    report.update(self.collaboration_manager.run_maintenance(
+                        self.presence_ttl, self.project_ttl_days * 86400, self.archive
+                    ))
+                else:
+                    for project_id in sorted(os.listdir(project_dir)):
+                        project_path = os.path.join(project_dir, project_id)
+                        if project_id == ARCHIVE_DIR or not os.path.isdir(project_path):
+                            continue
+                        if not os.path.exists(os.path.join(project_path, "metadata.json")):
+                            continue
+                        self._maintain_project(project_id, project_path, report)
+        except Timeout:
+            report["skipped"] = "다른 프로세스에서 정리 작업 실행 중"
+
+        report["finished_at"] = datetime.now().isoformat()
+        self.last_report = report
+        return report
+
+    def _maintain_project(self, project_id: str, project_path: str, report: Dict):
+        """프로젝트 하나 정리 (잠금을 바로 얻지 못하면 건너뜀)"""
+        lock_path = os.path.join(project_path, "update.lock")
+        try:
+            with FileLock(lock_path, timeout=0):
+                metadata = self.collaboration_manager._read_metadata(project_path)
+                now = datetime.now()
+
+                # 1. 오래된 접속 기록 삭제
+                active_users = metadata.get("active_users", {})
+                fresh_users = {
+                    user_id: last_activity
+                    for user_id, last_activity in active_users.items()
+                    if (now - datetime.fromisoformat(last_activity)).total_seconds() < self.presence_ttl
+                }
+                if len(fresh_users) != len(active_users):
+                    report["expired_users"] += len(active_users) - len(fresh_users)
+                    metadata["active_users"] = fresh_users
+                    atomic_write_json(os.path.join(project_path, "metadata.json"), metadata, indent=2)
+
+                # 2. 방치된 프로젝트 보관 / 삭제 (하트비트는 last_modified를 바꾸지 않으므로 접속 기록도 확인)
+                last_seen = max(
+                    [datetime.fromisoformat(metadata["last_modified"])]
+                    + [datetime.fromisoformat(last_activity) for last_activity in active_users.values()]
+                )
+                idle_seconds = (now - last_seen).total_seconds()
+                if self.project_ttl_days and idle_seconds > self.project_ttl_days * 86400 and not fresh_users:
+                    self._expire_project(project_id, project_path, report)
+                    return
+
+                # 3. 스냅샷 정리 (현재 버전을 가리키지 않는 이전 형식 data.json 포함)
+                self._compact_project(project_path, metadata, report)
+        except Timeout:
+            report["skipped_busy"] += 1
+        except Exception as e:
+            print(f"프로젝트 정리 오류 ({project_id}): {e}")
+
+    def _compact_project(self, project_path: str, metadata: Dict, report: Dict):
+        """현재 스냅샷 기준으로 필요 없는 파일 삭제"""
+        data_file = metadata.get("data_file")
+        legacy_path = os.path.join(project_path, "data.json")
+        if data_file and os.path.exists(legacy_path):
+            report["reclaimed_bytes"] += _remove_file(legacy_path)
+            report["removed_snapshots"] += 1
+
+        snapshot_dir = os.path.join(project_path, SNAPSHOT_DIR)
+        if os.path.isdir(snapshot_dir):
+            keep_from = metadata.get("version", 1) - SNAPSHOT_RETENTION
+            for name in os.listdir(snapshot_dir):
+                path = os.path.join(snapshot_dir, name)
+                if name.startswith(".tmp-"):
+                    if time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                        report["reclaimed_bytes"] += remove_snapshot(path)
+                        report["removed_tmp_files"] += 1
+                    continue
+                if os.path.join(SNAPSHOT_DIR, name) == data_file:
+                    continue
+                version = parse_snapshot_version(name)
+                if version is not None and version <= keep_from:
+                    report["reclaimed_bytes"] += remove_snapshot(path)
+                    report["removed_snapshots"] += 1
+
+        for name in os.listdir(project_path):
+            path = os.path.join(project_path, name)
+            if name.startswith(".tmp-") and time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS:
+                report["reclaimed_bytes"] += _remove_file(path)
+                report["removed_tmp_files"] += 1
+
+    def _expire_project(self, project_id: str, project_path: str, report: Dict):
+        """방치된 프로젝트를 압축 보관하거나 삭제"""
+        size = _path_size(project_path)
+        if self.archive:
+            archive_dir = os.path.join(self.collaboration_manager.project_dir, ARCHIVE_DIR)
+            os.makedirs(archive_dir, exist_ok=True)
+            archive_path = shutil.make_archive(os.path.join(archive_dir, project_id), "gztar", project_path)
+            size -= os.path.getsize(archive_path)
+            report["archived_projects"] += 1
+        else:
+            report["deleted_projects"] += 1
+        shutil.rmtree(project_path, ignore_errors=True)
+        report["reclaimed_bytes"] += max(size, 0)
+        self.collaboration_manager.search_index.remove_project(project_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프로젝트 저장소 정리")
+    parser.add_argument("--project-dir", default="shared_projects")
+    parser.add_argument("--once", action="store_true", help="한 번만 실행하고 종료")
+    parser.add_argument("--interval", type=float, default=600, help="반복 주기 (초)")
+    args = parser.parse_args()
+
+    job = MaintenanceJob.from_env(create_collaboration_manager(args.project_dir))
+    if args.once:
+        print(job.run_once())
+        return
+    job.start(args.interval)
+    try:
+        while True:
+            time.sleep(args.interval)
+            print(job.last_report)
+    except KeyboardInterrupt:
+        job.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""여러 서버(레플리카)가 함께 쓰는 프로젝트 객체 저장소
+
+- file://<디렉토리>: 로컬(또는 공유 마운트) 디렉토리
+- memory://<이름>: 프로세스 안에서 공유되는 메모리 저장소 (테스트용)
+- s3://<버킷>/<접두사>: S3 호환 저장소 (boto3 필요, EXCEL_WEB_S3_ENDPOINT로 MinIO 등 지정)
+"""
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class ObjectStore(ABC):
+    """키(슬래시로 구분된 경로) -> 바이트 저장소
+
+    put은 객체 전체를 원자적으로 교체하며, 읽는 쪽은 이전 또는 새 객체 전체만 보게 됨
+    """
+
+    url = ""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """객체 읽기 (없으면 None)"""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes):
+        """객체 쓰기 (있으면 교체)"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """객체 삭제 (없어도 오류 아님)"""
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> List[str]:
+        """접두사로 시작하는 키 목록"""
+
+    def get_json(self, key: str) -> Optional[Dict]:
+        data = self.get(key)
+        return None if data is None else json.loads(data)
+
+    def put_json(self, key: str, value: Dict):
+        self.put(key, json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+class LocalObjectStore(ObjectStore):
+    """디렉토리 기반 저장소 (임시 파일에 쓰고 rename)"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.url = f"file://{self.root}"
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"잘못된 키: {key}")
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str = "") -> List[str]:
+        keys = []
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                key = os.path.relpath(os.path.join(root, name), self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+class MemoryObjectStore(ObjectStore):
+    """메모리 저장소 (같은 이름이면 같은 프로세스의 여러 매니저가 공유)"""
+
+    _shared: Dict[str, "MemoryObjectStore"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = ""):
+        self.url = f"memory://{name}"
+        self._objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, name: str) -> "MemoryObjectStore":
+        with cls._shared_lock:
+            if name not in cls._shared:
+                cls._shared[name] = cls(name)
+            return cls._shared[name]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._objects.get(key)
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            self._objects[key] = bytes(data)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def list(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return sorted(key for key in self._objects if key.startswith(prefix))
+
+
+class S3ObjectStore(ObjectStore):
+    """S3 호환 저장소 (AWS S3, MinIO 등)"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise ImportError("S3 저장소를 사용하려면 boto3 패키지가 필요합니다.") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.url = f"s3://{bucket}/{self.prefix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self, prefix: str = "") -> List[str]:
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            keys.extend(item["Key"][len(self.prefix):] for item in page.get("Contents", []))
+        return sorted(keys)
+
+
+def create_object_store(url: str) -> ObjectStore:
+    """URL에 맞는 객체 저장소 생성 (file://, memory://, s3://)"""
+    parsed = urlparse(url)
+    if parsed.scheme == "file":
+        return LocalObjectStore(parsed.netloc + parsed.path)
+    if parsed.scheme == "memory":
+        return MemoryObjectStore.shared(parsed.netloc + parsed.path)
+    if parsed.scheme == "s3":
+        return S3ObjectStore(parsed.netloc, parsed.path, endpoint_url=os.environ.get("EXCEL_WEB_S3_ENDPOINT"))
+    raise ValueError(f"지원하지 않는 객체 저장소: {url}")
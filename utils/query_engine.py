@@ -0,0 +1,320 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 필터 표현식: "컬럼 연산자 값" (예: 가격 >= 1000, 이름 contains 김)
+FILTER_OPERATORS = ["==", "!=", ">=", "<=", ">", "<", "contains", "in"]
+_FILTER_PATTERN = re.compile(
+    r"^\s*(?P<column>.+?)\s*(?P<op>==|!=|>=|<=|>|<|\bcontains\b|\bin\b)\s*(?P<value>.*?)\s*$"
+)
+
+
+def parse_filter_expression(expression: str) -> Tuple[str, str, str]:
+    """필터 표현식 한 줄을 (컬럼, 연산자, 값)으로 분해"""
+    match = _FILTER_PATTERN.match(expression)
+    if not match or not match.group("value"):
+        raise ValueError(f"잘못된 필터 표현식: {expression}")
+    value = match.group("value")
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+        value = value[1:-1]
+    return match.group("column"), match.group("op"), value
+
+
+def _coerce_value(series: pd.Series, value: Any) -> Any:
+    """필터 값을 컬럼 타입에 맞게 변환"""
+    if not isinstance(value, str):
+        return value
+    if pd.api.types.is_bool_dtype(series):
+        return value.strip().lower() in ("true", "1", "y", "yes")
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() and pd.api.types.is_integer_dtype(series) else number
+    if pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            return pd.Timestamp(value)
+        except ValueError:
+            return value
+    return value
+
+
+def hash_key(value: Any) -> Any:
+    """해시 맵 키 정규화 (NaN은 하나의 키로 취급)"""
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ColumnIndex:
+    """한 컬럼에 대한 정렬 순서 / 동등 비교용 해시 맵 (필요할 때 생성)"""
+
+    def __init__(self, series: pd.Series):
+        self.series = series.reset_index(drop=True)
+        self._sorted_positions: Optional[np.ndarray] = None
+        # 결측값이 아닌 행의 정렬 키 (비교 불가능한 타입이 섞이면 문자열)
+        self._sorted_values: Optional[np.ndarray] = None
+        self._comparable = True
+        self._value_map: Optional[Dict[Any, set]] = None
+
+    @property
+    def sorted_positions(self) -> np.ndarray:
+        """오름차순 정렬된 행 위치 (같은 값은 행 순서, 결측값은 행 순서대로 마지막)"""
+        if self._sorted_positions is None:
+            self._build_sorted()
+        return self._sorted_positions
+
+    def descending_positions(self) -> np.ndarray:
+        """내림차순 정렬된 행 위치 (같은 값은 행 순서 유지, 결측값은 마지막)"""
+        positions = self.sorted_positions
+        values = self._sorted_values
+        non_null = positions[:len(values)]
+        if len(values) > 1:
+            # 같은 값 묶음의 순서만 뒤집음 (묶음 안은 행 순서 그대로)
+            group = np.zeros(len(values), dtype=np.int64)
+            group[1:] = values[1:] != values[:-1]
+            non_null = non_null[np.argsort(-np.cumsum(group), kind="stable")]
+        return np.concatenate([non_null, positions[len(values):]])
+
+    @property
+    def value_map(self) -> Dict[Any, set]:
+        """값 -> 행 위치 집합"""
+        if self._value_map is None:
+            value_map: Dict[Any, set] = {}
+            for position, value in enumerate(self.series.tolist()):
+                value_map.setdefault(hash_key(value), set()).add(position)
+            self._value_map = value_map
+        return self._value_map
+
+    def _build_sorted(self):
+        """정렬 순서 생성 (타입이 섞여 비교가 불가능하면 문자열 기준, 결측값은 문자열로 바꾸기 전에 분리)"""
+        missing = self.series.isna().to_numpy()
+        present = self.series[~missing]
+        try:
+            ordered = present.sort_values(kind="mergesort")
+            self._comparable = True
+        except TypeError:
+            ordered = present.astype(str).sort_values(kind="mergesort")
+            self._comparable = False
+        self._sorted_values = ordered.to_numpy()
+        self._sorted_positions = np.concatenate([ordered.index.to_numpy(), np.flatnonzero(missing)]).astype(np.int64)
+
+    def _reset_sorted(self):
+        self._sorted_positions = None
+        self._sorted_values = None
+
+    def update_value(self, series: pd.Series, position: int, old_value: Any, new_value: Any):
+        """셀 하나가 바뀌었을 때 인덱스를 점진적으로 갱신"""
+        self.series = series.reset_index(drop=True)
+        if self._value_map is not None:
+            old_key = hash_key(old_value)
+            bucket = self._value_map.get(old_key)
+            if bucket is not None:
+                bucket.discard(position)
+                if not bucket:
+                    del self._value_map[old_key]
+            self._value_map.setdefault(hash_key(new_value), set()).add(position)
+        if self._sorted_positions is not None:
+            self._update_sorted(position, new_value)
+
+    def _update_sorted(self, position: int, new_value: Any):
+        """정렬 순서에서 한 행을 빼고 새 값의 자리에 다시 삽입 (같은 값끼리는 행 순서, 새로 정렬한 결과와 같음)"""
+        old_slot = int(np.flatnonzero(self._sorted_positions == position)[0])
+        non_null_count = len(self._sorted_values)
+        positions = np.delete(self._sorted_positions, old_slot)
+        values = self._sorted_values
+        if old_slot < non_null_count:
+            values = np.delete(values, old_slot)
+
+        if hash_key(new_value) is None:
+            # 결측값 구간에 행 순서대로 삽입
+            nulls = positions[len(values):]
+            new_slot = len(values) + int(np.searchsorted(nulls, position))
+            self._sorted_positions = np.insert(positions, new_slot, position)
+            self._sorted_values = values
+            return
+
+        key = new_value if self._comparable else str(new_value)
+        try:
+            low = int(np.searchsorted(values, key, side="left"))
+            high = int(np.searchsorted(values, key, side="right"))
+        except (TypeError, ValueError):
+            # 비교 불가능하면 다음 조회 시 다시 생성
+            self._reset_sorted()
+            return
+        new_slot = low + int(np.searchsorted(positions[low:high], position))
+        self._sorted_positions = np.insert(positions, new_slot, position)
+        self._sorted_values = np.insert(values, new_slot, key)
+
+    def equal_positions(self, value: Any) -> np.ndarray:
+        """값과 같은 행 위치"""
+        return np.fromiter(self.value_map.get(hash_key(value), ()), dtype=np.int64)
+
+    def range_positions(self, op: str, value: Any) -> Optional[np.ndarray]:
+        """정렬 순서를 이용한 범위 검색 (불가능하면 None)"""
+        positions = self.sorted_positions
+        values = self._sorted_values
+        if not self._comparable:
+            return None
+        try:
+            if op == ">":
+                start, stop = np.searchsorted(values, value, side="right"), len(values)
+            elif op == ">=":
+                start, stop = np.searchsorted(values, value, side="left"), len(values)
+            elif op == "<":
+                start, stop = 0, np.searchsorted(values, value, side="left")
+            else:
+                start, stop = 0, np.searchsorted(values, value, side="right")
+        except (TypeError, ValueError):
+            return None
+        return positions[start:stop]
+
+
+class SheetIndex:
+    """시트 한 개(특정 버전)에 대한 컬럼 인덱스 모음"""
+
+    def __init__(self, df: pd.DataFrame, version: int):
+        self.df = df
+        self.version = version
+        self.columns: Dict[str, ColumnIndex] = {}
+
+    def column(self, column: str) -> ColumnIndex:
+        """컬럼 인덱스를 필요할 때 생성해서 반환"""
+        if column not in self.columns:
+            self.columns[column] = ColumnIndex(self.df[column])
+        return self.columns[column]
+
+
+class QueryEngine:
+    """시트별 컬럼 인덱스를 캐시하여 필터 / 다중 정렬 / 상위 N개 조회"""
+
+    def __init__(self):
+        self._sheets: Dict[str, SheetIndex] = {}
+        self._lock = threading.RLock()
+
+    def get_sheet_index(self, sheet_name: str, df: pd.DataFrame, version: int) -> SheetIndex:
+        """시트 버전에 맞는 인덱스 반환 (버전이나 DataFrame이 바뀌면 새로 생성)"""
+        with self._lock:
+            entry = self._sheets.get(sheet_name)
+            if entry is None or entry.version != version or entry.df is not df:
+                entry = SheetIndex(df, version)
+                self._sheets[sheet_name] = entry
+            return entry
+
+    def apply_changes(self, sheet_name: str, df: pd.DataFrame, changes: Optional[List[Tuple[int, str, Any, Any]]], version: int):
+        """셀 변경 내역을 캐시된 인덱스에 반영 (구조 변경이면 캐시 폐기)"""
+        with self._lock:
+            entry = self._sheets.get(sheet_name)
+            if entry is None:
+                return
+            if changes is None or entry.df.shape != df.shape:
+                del self._sheets[sheet_name]
+                return
+            for position, column, old_value, new_value in changes:
+                column_index = entry.columns.get(column)
+                if column_index is None:
+                    continue
+                if column_index.series.dtype != df[column].dtype:
+                    # 타입이 바뀐 컬럼은 다음 조회 때 다시 생성
+                    del entry.columns[column]
+                    continue
+                column_index.update_value(df[column], position, old_value, new_value)
+            entry.df = df
+            entry.version = version
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        """캐시 삭제"""
+        with self._lock:
+            if sheet_name is None:
+                self._sheets.clear()
+            else:
+                self._sheets.pop(sheet_name, None)
+
+    def run_query(
+        self,
+        sheet_name: str,
+        df: pd.DataFrame,
+        version: int,
+        filters: Sequence[Tuple[str, str, Any]] = (),
+        sort_by: Sequence[str] = (),
+        ascending: Any = True,
+        top_n: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """필터 -> 정렬 -> 상위 N개 순서로 조회"""
+        with self._lock:
+            index = self.get_sheet_index(sheet_name, df, version)
+            mask = self._filter_mask(index, filters)
+            positions = self._ordered_positions(index, mask, list(sort_by), ascending)
+            if top_n is not None:
+                positions = positions[:top_n]
+            return index.df.iloc[positions]
+
+    def _filter_mask(self, index: SheetIndex, filters: Sequence[Tuple[str, str, Any]]) -> np.ndarray:
+        """모든 필터를 AND로 결합한 행 마스크"""
+        mask = np.ones(len(index.df), dtype=bool)
+        for column, op, raw_value in filters:
+            if column not in index.df.columns:
+                raise ValueError(f"존재하지 않는 컬럼: {column}")
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"지원하지 않는 연산자: {op}")
+            column_index = index.column(column)
+            series = column_index.series
+            matched = np.zeros(len(index.df), dtype=bool)
+
+            if op in ("==", "!="):
+                value = _coerce_value(series, raw_value)
+                matched[column_index.equal_positions(value)] = True
+                if op == "!=":
+                    matched = ~matched
+            elif op == "in":
+                values = raw_value if isinstance(raw_value, (list, tuple, set)) else str(raw_value).split(",")
+                for item in values:
+                    item = item.strip() if isinstance(item, str) else item
+                    matched[column_index.equal_positions(_coerce_value(series, item))] = True
+            elif op == "contains":
+                matched = series.astype(str).str.contains(str(raw_value), case=False, regex=False, na=False).to_numpy()
+            else:
+                value = _coerce_value(series, raw_value)
+                positions = column_index.range_positions(op, value)
+                if positions is not None:
+                    matched[positions] = True
+                else:
+                    compare = {">": series.gt, ">=": series.ge, "<": series.lt, "<=": series.le}[op]
+                    try:
+                        matched = compare(value).fillna(False).to_numpy(dtype=bool)
+                    except TypeError:
+                        pass
+            mask &= matched
+        return mask
+
+    def _ordered_positions(self, index: SheetIndex, mask: np.ndarray, sort_by: List[str], ascending: Any) -> np.ndarray:
+        """정렬된 행 위치 (단일 컬럼 정렬은 캐시된 정렬 순서 사용)"""
+        if not sort_by:
+            return np.flatnonzero(mask)
+        for column in sort_by:
+            if column not in index.df.columns:
+                raise ValueError(f"존재하지 않는 컬럼: {column}")
+
+        if len(sort_by) == 1:
+            is_ascending = ascending[0] if isinstance(ascending, (list, tuple)) else ascending
+            column_index = index.column(sort_by[0])
+            # 결측값은 내림차순에서도 마지막에 둔다
+            ordered = column_index.sorted_positions if is_ascending else column_index.descending_positions()
+            return ordered[mask[ordered]]
+
+        subset = index.df.iloc[np.flatnonzero(mask)].reset_index(drop=True)
+        try:
+            ordered = subset.sort_values(by=sort_by, ascending=ascending, kind="mergesort", na_position="last")
+        except TypeError:
+            # 결측값은 문자열로 바꾸지 않아야 na_position이 적용됨
+            as_text = subset.copy()
+            for column in sort_by:
+                as_text[column] = subset[column].astype(str).where(subset[column].notna())
+            ordered = as_text.sort_values(by=sort_by, ascending=ascending, kind="mergesort", na_position="last")
+        return np.flatnonzero(mask)[ordered.index.to_numpy()]
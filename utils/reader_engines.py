@@ -0,0 +1,197 @@
+"""업로드 파일 읽기 엔진 (파일 형식과 크기에 따라 사용 가능한 가장 빠른 엔진 선택)
+
+- calamine: Rust 기반, xlsx/xlsm/xlsb/xls/ods (python-calamine 패키지 필요, 가장 빠름)
+- openpyxl: xlsx/xlsm (기본 설치)
+- xlrd: 이전 형식 xls (xlrd 패키지 필요)
+- csv / pyarrow-csv: CSV (작은 파일은 pandas C 파서, 큰 파일은 pyarrow 멀티스레드 파서)
+- parquet: Parquet (pyarrow 필요)
+
+EXCEL_WEB_READER_ENGINE으로 엔진을 고정할 수 있음 (그 엔진이 읽을 수 있는 형식에만 적용)
+"""
+import importlib.util
+import io
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# 이 크기 이상의 CSV는 pyarrow 파서 사용 (작은 파일은 스레드 준비 비용이 더 큼)
+ARROW_CSV_MIN_BYTES = 4 * 1024 * 1024
+# 한국어 CSV는 엑셀에서 저장하면 cp949인 경우가 많음
+CSV_ENCODINGS = ["utf-8-sig", "cp949"]
+
+
+class ReaderEngine(ABC):
+    """파일 하나를 {시트 이름: DataFrame}으로 읽는 엔진"""
+
+    name = ""
+    extensions: tuple = ()
+    # 필요한 패키지 (import 이름)
+    requires: tuple = ()
+
+    def is_available(self) -> bool:
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    @abstractmethod
+    def read(self, source, filename: str) -> Dict[str, pd.DataFrame]:
+        """파일 경로 또는 파일 객체를 읽음"""
+
+
+class PandasExcelEngine(ReaderEngine):
+    """pandas.read_excel의 engine 인자로 위임 (모든 시트)"""
+
+    def __init__(self, name: str, extensions: tuple, requires: tuple):
+        self.name = name
+        self.extensions = extensions
+        self.requires = requires
+
+    def read(self, source, filename: str) -> Dict[str, pd.DataFrame]:
+        return pd.read_excel(source, sheet_name=None, engine=self.name)
+
+
+class CsvEngine(ReaderEngine):
+    """CSV (파일 이름을 시트 이름으로 사용, 인코딩은 차례로 시도)"""
+
+    extensions = (".csv",)
+
+    def __init__(self, name: str = "csv", parser: str = "c", requires: tuple = ()):
+        self.name = name
+        self.parser = parser
+        self.requires = requires
+
+    def read(self, source, filename: str) -> Dict[str, pd.DataFrame]:
+        last_error = None
+        for encoding in CSV_ENCODINGS:
+            _rewind(source)
+            try:
+                df = pd.read_csv(source, encoding=encoding, engine=self.parser)
+                return {_sheet_name(filename): df}
+            except UnicodeDecodeError as e:
+                last_error = e
+        raise last_error
+
+
+class ParquetEngine(ReaderEngine):
+    name = "parquet"
+    extensions = (".parquet", ".pq")
+    requires = ("pyarrow",)
+
+    def read(self, source, filename: str) -> Dict[str, pd.DataFrame]:
+        return {_sheet_name(filename): pd.read_parquet(source, engine="pyarrow")}
+
+
+READER_ENGINES: Dict[str, ReaderEngine] = {
+    engine.name: engine
+    for engine in [
+        PandasExcelEngine("calamine", (".xlsx", ".xlsm", ".xlsb", ".xls", ".ods"), ("python_calamine",)),
+        PandasExcelEngine("openpyxl", (".xlsx", ".xlsm"), ("openpyxl",)),
+        PandasExcelEngine("xlrd", (".xls",), ("xlrd",)),
+        CsvEngine(),
+        CsvEngine("pyarrow-csv", "pyarrow", ("pyarrow",)),
+        ParquetEngine(),
+    ]
+}
+
+# 형식별 우선순위 (빠른 순)
+ENGINE_PREFERENCES = {
+    ".xlsx": ["calamine", "openpyxl"],
+    ".xlsm": ["calamine", "openpyxl"],
+    ".xlsb": ["calamine"],
+    ".xls": ["calamine", "xlrd"],
+    ".ods": ["calamine"],
+    ".csv": ["pyarrow-csv", "csv"],
+    ".parquet": ["parquet"],
+    ".pq": ["parquet"],
+}
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _sheet_name(filename: Optional[str]) -> str:
+    """한 시트짜리 파일의 시트 이름 (확장자를 뺀 파일 이름)"""
+    stem = os.path.splitext(os.path.basename(filename or ""))[0]
+    return stem[:31] or "Sheet1"
+
+
+def _source_size(source) -> int:
+    """파일 크기 (바이트, 모르면 0)"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer().nbytes
+    return getattr(source, "size", 0) or 0
+
+
+def _sniff_extension(source) -> Optional[str]:
+    """파일 이름이 없을 때 앞부분 바이트로 형식 추정"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            head = f.read(8)
+    elif hasattr(source, "read"):
+        _rewind(source)
+        head = source.read(8)
+        _rewind(source)
+    else:
+        return None
+    if head.startswith(b"PK"):
+        return ".xlsx"
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        return ".xls"
+    if head.startswith(b"PAR1"):
+        return ".parquet"
+    return ".csv"
+
+
+def detect_extension(source, filename: Optional[str] = None) -> Optional[str]:
+    """확장자 (소문자, 점 포함)"""
+    if filename is None:
+        filename = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", None)
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if extension in ENGINE_PREFERENCES else _sniff_extension(source)
+
+
+def available_engines(extension: str) -> List[str]:
+    """형식을 읽을 수 있는 설치된 엔진 (빠른 순)"""
+    return [name for name in ENGINE_PREFERENCES.get(extension, []) if READER_ENGINES[name].is_available()]
+
+
+def supported_extensions() -> List[str]:
+    """설치된 엔진으로 읽을 수 있는 확장자"""
+    return [extension for extension in ENGINE_PREFERENCES if available_engines(extension)]
+
+
+def select_engine(extension: str, size: int = 0) -> str:
+    """형식과 크기에 맞는 엔진 이름 (읽을 수 있는 엔진이 없으면 ValueError)"""
+    candidates = available_engines(extension)
+    if extension == ".csv" and size < ARROW_CSV_MIN_BYTES and "csv" in candidates:
+        return "csv"
+    if not candidates:
+        raise ValueError(f"지원하지 않거나 필요한 패키지가 없는 파일 형식: {extension or '알 수 없음'}")
+    return candidates[0]
+
+
+def read_workbook(source, engine: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """파일 경로 / 업로드 파일 / 바이트를 {시트 이름: DataFrame}으로 읽기 (engine이 없으면 자동 선택)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if filename is None:
+        filename = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", None)
+    extension = detect_extension(source, filename)
+    if engine is None:
+        preferred = os.environ.get("EXCEL_WEB_READER_ENGINE")
+        engine = preferred if preferred in available_engines(extension) else select_engine(extension, _source_size(source))
+    if engine not in READER_ENGINES:
+        raise ValueError(f"알 수 없는 읽기 엔진: {engine} (가능: {', '.join(READER_ENGINES)})")
+    reader = READER_ENGINES[engine]
+    if not reader.is_available():
+        raise ValueError(f"'{engine}' 엔진에 필요한 패키지가 없습니다: {', '.join(reader.requires)}")
+    if extension not in reader.extensions:
+        raise ValueError(f"'{engine}' 엔진은 {extension} 파일을 읽을 수 없습니다.")
+    _rewind(source)
+    return reader.read(source, filename)
@@ -0,0 +1,194 @@
+import bisect
+import heapq
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 단어 단위 토큰 (한글/영문/숫자, 소수점 포함 숫자)
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|\w+", re.UNICODE)
+
+# (project_id, sheet_name, row, column_position)
+CellKey = Tuple[str, str, int, int]
+
+_shared_indexes: Dict[str, "SearchIndex"] = {}
+_shared_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    """셀 값을 검색 토큰으로 분리 (소문자)"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def get_shared_index(project_dir: str) -> "SearchIndex":
+    """프로젝트 디렉토리별로 프로세스 안에서 공유되는 검색 인덱스"""
+    with _shared_lock:
+        if project_dir not in _shared_indexes:
+            _shared_indexes[project_dir] = SearchIndex()
+        return _shared_indexes[project_dir]
+
+
+class _IndexedSheet:
+    """인덱싱된 시트의 셀 문자열 (변경 셀 비교 및 결과 값 표시용)"""
+
+    def __init__(self, columns: List[str], values: np.ndarray):
+        self.columns = columns
+        self.values = values
+
+
+class SearchIndex:
+    """모든 프로젝트/시트의 셀 내용에 대한 역색인"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[CellKey]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._sheets: Dict[Tuple[str, str], _IndexedSheet] = {}
+        self._projects: Dict[str, Dict] = {}
+        # 프로젝트별 저장소 변경 표시 (메타데이터 파일의 inode/mtime 등, 같으면 다시 읽지 않음)
+        self._source_stamps: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.is_built = False
+        self.last_refreshed = 0.0
+
+    def project_version(self, project_id: str) -> Optional[int]:
+        """인덱싱된 프로젝트 버전 (없으면 None)"""
+        with self._lock:
+            project = self._projects.get(project_id)
+            return project["version"] if project else None
+
+    def indexed_projects(self) -> List[str]:
+        """인덱싱된 프로젝트 ID 목록"""
+        with self._lock:
+            return list(self._projects)
+
+    def source_stamp(self, project_id: str) -> Any:
+        """마지막으로 확인한 저장소 변경 표시 (없으면 None)"""
+        with self._lock:
+            return self._source_stamps.get(project_id)
+
+    def set_source_stamp(self, project_id: str, stamp: Any):
+        with self._lock:
+            self._source_stamps[project_id] = stamp
+
+    def index_project(self, project_id: str, version: int, excel_data: Dict[str, pd.DataFrame], filename: str = ""):
+        """프로젝트 색인 (이미 있는 시트는 바뀐 셀만 갱신)"""
+        with self._lock:
+            previous = self._projects.get(project_id)
+            if previous and previous["version"] >= version:
+                return
+            old_sheets = set(previous["sheets"]) if previous else set()
+            for sheet_name, df in excel_data.items():
+                self._index_sheet(project_id, sheet_name, df)
+            for sheet_name in old_sheets - set(excel_data):
+                self._remove_sheet(project_id, sheet_name)
+            self._projects[project_id] = {
+                "version": version,
+                "filename": filename,
+                "sheets": list(excel_data),
+            }
+
+    def remove_project(self, project_id: str):
+        """프로젝트를 색인에서 제거"""
+        with self._lock:
+            self._source_stamps.pop(project_id, None)
+            project = self._projects.pop(project_id, None)
+            if not project:
+                return
+            for sheet_name in project["sheets"]:
+                self._remove_sheet(project_id, sheet_name)
+
+    def search(self, query: str, limit: int = 100) -> List[Dict]:
+        """모든 토큰을 포함하는 셀 검색 (마지막 토큰은 접두어 일치)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            matched: Optional[Set[CellKey]] = None
+            for position, token in enumerate(tokens):
+                if position == len(tokens) - 1:
+                    cells = self._prefix_postings(token)
+                else:
+                    cells = self._postings.get(token, set())
+                matched = set(cells) if matched is None else matched & cells
+                if not matched:
+                    return []
+
+            hits = []
+            # 전체를 정렬하지 않고 앞쪽 limit개만 선택
+            for project_id, sheet_name, row, column_position in heapq.nsmallest(limit, matched):
+                sheet = self._sheets[(project_id, sheet_name)]
+                hits.append({
+                    "project_id": project_id,
+                    "filename": self._projects.get(project_id, {}).get("filename", ""),
+                    "sheet": sheet_name,
+                    "row": row,
+                    "column": sheet.columns[column_position],
+                    "value": sheet.values[row, column_position]
+                })
+            return hits
+
+    def _prefix_postings(self, prefix: str) -> Set[CellKey]:
+        """접두어로 시작하는 모든 토큰의 포스팅 합집합"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        cells: Set[CellKey] = set()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            cells |= self._postings.get(token, set())
+        return cells
+
+    def _index_sheet(self, project_id: str, sheet_name: str, df: pd.DataFrame):
+        """시트 색인 (같은 구조면 값이 바뀐 셀만 다시 토큰화)"""
+        columns = [str(column) for column in df.columns]
+        values = df.astype(object).where(df.notna(), "").astype(str).to_numpy()
+        key = (project_id, sheet_name)
+        previous = self._sheets.get(key)
+
+        if previous is not None and previous.columns == columns and previous.values.shape == values.shape:
+            rows, column_positions = np.nonzero(previous.values != values)
+            for row, column_position in zip(rows.tolist(), column_positions.tolist()):
+                cell = (project_id, sheet_name, row, column_position)
+                self._remove_tokens(cell, previous.values[row, column_position])
+                self._add_tokens(cell, values[row, column_position])
+        else:
+            if previous is not None:
+                self._remove_sheet(project_id, sheet_name)
+            for row, column_position in zip(*np.nonzero(values != "")):
+                cell = (project_id, sheet_name, int(row), int(column_position))
+                self._add_tokens(cell, values[row, column_position])
+
+        self._sheets[key] = _IndexedSheet(columns, values)
+
+    def _remove_sheet(self, project_id: str, sheet_name: str):
+        """시트의 모든 셀을 색인에서 제거"""
+        sheet = self._sheets.pop((project_id, sheet_name), None)
+        if sheet is None:
+            return
+        for row, column_position in zip(*np.nonzero(sheet.values != "")):
+            cell = (project_id, sheet_name, int(row), int(column_position))
+            self._remove_tokens(cell, sheet.values[row, column_position])
+
+    def _add_tokens(self, cell: CellKey, text: str):
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._vocabulary_dirty = True
+            postings.add(cell)
+
+    def _remove_tokens(self, cell: CellKey, text: str):
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(cell)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_dirty = True
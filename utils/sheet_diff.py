@@ -0,0 +1,146 @@
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_values(series: pd.Series) -> pd.Series:
+    """해시용 값 (셀을 비워 int 열이 float이 되는 것처럼 숫자 타입만 달라진 열은 같은 값으로 봄)"""
+    if series.dtype == object:
+        series = series.infer_objects()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype("float64")
+    return series
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """행 단위 해시 (벡터 연산, 열 타입 차이는 무시)"""
+    if df.empty:
+        return np.zeros(len(df), dtype=np.uint64)
+    values = pd.DataFrame({position: _hash_values(df.iloc[:, position]) for position in range(df.shape[1])})
+    try:
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    except TypeError:
+        # 해시할 수 없는 값(리스트 등)이 섞인 경우 문자열 기준
+        return pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+
+
+class SheetDiff:
+    """두 버전 사이의 행/셀 변경 내역"""
+
+    def __init__(self):
+        self.inserted_rows: List[int] = []
+        self.deleted_rows: List[int] = []
+        self.modified_rows: List[Tuple[int, int]] = []
+        self.changed_cells: List[Tuple[int, str, Any, Any]] = []
+        self.added_columns: List[str] = []
+        self.removed_columns: List[str] = []
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(
+            self.inserted_rows or self.deleted_rows or self.modified_rows
+            or self.added_columns or self.removed_columns
+        )
+
+    def summary(self) -> Dict[str, int]:
+        """변경 건수 요약"""
+        return {
+            "inserted_rows": len(self.inserted_rows),
+            "deleted_rows": len(self.deleted_rows),
+            "modified_rows": len(self.modified_rows),
+            "changed_cells": len(self.changed_cells),
+            "added_columns": len(self.added_columns),
+            "removed_columns": len(self.removed_columns)
+        }
+
+
+def diff_sheets(old_df: pd.DataFrame, new_df: pd.DataFrame) -> SheetDiff:
+    """행 해시로 두 버전을 정렬하여 추가/삭제/수정된 행과 바뀐 셀을 찾음
+
+    행이 중간에 삽입/삭제되어도 뒤쪽 행이 모두 수정된 것으로 보이지 않음
+    """
+    diff = SheetDiff()
+    old_columns = [str(column) for column in old_df.columns]
+    new_columns = [str(column) for column in new_df.columns]
+    diff.added_columns = [column for column in new_columns if column not in old_columns]
+    diff.removed_columns = [column for column in old_columns if column not in new_columns]
+    common = [column for column in new_columns if column in old_columns]
+
+    old = old_df.set_axis(old_columns, axis=1)[common].reset_index(drop=True)
+    new = new_df.set_axis(new_columns, axis=1)[common].reset_index(drop=True)
+    old_hashes = hash_rows(old)
+    new_hashes = hash_rows(new)
+
+    # 앞뒤로 같은 구간은 벡터 비교로 건너뛰고 가운데만 정렬
+    limit = min(len(old_hashes), len(new_hashes))
+    mismatch = np.flatnonzero(old_hashes[:limit] != new_hashes[:limit])
+    prefix = int(mismatch[0]) if len(mismatch) else limit
+    suffix = 0
+    if prefix < limit or len(old_hashes) != len(new_hashes):
+        tail = limit - prefix
+        reversed_mismatch = np.flatnonzero(
+            old_hashes[len(old_hashes) - tail:][::-1] != new_hashes[len(new_hashes) - tail:][::-1]
+        ) if tail else np.array([], dtype=np.int64)
+        suffix = int(reversed_mismatch[0]) if len(reversed_mismatch) else tail
+
+    old_middle = old_hashes[prefix:len(old_hashes) - suffix].tolist()
+    new_middle = new_hashes[prefix:len(new_hashes) - suffix].tolist()
+    # 자동 junk 처리를 끔 (200행 이상에서 빈 행처럼 자주 나오는 행을 무시하면 삽입이 수정으로 보임)
+    matcher = SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+
+    pairs: List[Tuple[int, int]] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        i1, i2, j1, j2 = i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix
+        if tag == "delete":
+            diff.deleted_rows.extend(range(i1, i2))
+        elif tag == "insert":
+            diff.inserted_rows.extend(range(j1, j2))
+        elif tag == "replace":
+            # 같은 위치끼리는 수정으로 보고 남는 행은 추가/삭제
+            paired = min(i2 - i1, j2 - j1)
+            pairs.extend(zip(range(i1, i1 + paired), range(j1, j1 + paired)))
+            diff.deleted_rows.extend(range(i1 + paired, i2))
+            diff.inserted_rows.extend(range(j1 + paired, j2))
+
+    if pairs and common:
+        old_positions = np.array([old_position for old_position, _ in pairs])
+        new_positions = np.array([new_position for _, new_position in pairs])
+        old_block = old.iloc[old_positions].reset_index(drop=True)
+        new_block = new.iloc[new_positions].reset_index(drop=True)
+        changed_mask = np.zeros(len(pairs), dtype=bool)
+        for column in common:
+            old_values = old_block[column]
+            new_values = new_block[column]
+            try:
+                equal = old_values.eq(new_values).fillna(False).to_numpy(dtype=bool)
+            except TypeError:
+                equal = (old_values.astype(str) == new_values.astype(str)).to_numpy()
+            equal = equal | (old_values.isna().to_numpy() & new_values.isna().to_numpy())
+            for k in np.flatnonzero(~equal):
+                diff.changed_cells.append((int(new_positions[k]), column, old_values.iat[k], new_values.iat[k]))
+            changed_mask |= ~equal
+        diff.modified_rows = [pairs[k] for k in np.flatnonzero(changed_mask)]
+
+    return diff
+
+
+def render_diff_frame(new_df: pd.DataFrame, diff: SheetDiff, max_rows: int = 500) -> "pd.io.formats.style.Styler":
+    """추가된 행(초록)과 바뀐 셀(노랑)을 강조한 표"""
+    positions = sorted(set(diff.inserted_rows) | {new_position for _, new_position in diff.modified_rows})[:max_rows]
+    frame = new_df.reset_index(drop=True).iloc[positions]
+    frame = frame.set_axis([str(column) for column in frame.columns], axis=1)
+    inserted = set(diff.inserted_rows)
+    changed = {(position, column) for position, column, _, _ in diff.changed_cells}
+    added_columns = set(diff.added_columns)
+
+    def highlight(row: pd.Series) -> List[str]:
+        if row.name in inserted:
+            return ["background-color: #d4f7d4"] * len(row)
+        return [
+            "background-color: #fff3b0" if (row.name, column) in changed or column in added_columns else ""
+            for column in row.index
+        ]
+
+    return frame.style.apply(highlight, axis=1)
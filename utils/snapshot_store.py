@@ -0,0 +1,379 @@
+"""프로젝트 데이터 스냅샷 저장 형식
+
+- json: 이전 형식 (시트별 레코드 목록, 들여쓰기 JSON)
+- compressed: 시트를 행 묶음(블록) 단위로 나눠 각각 압축한 단일 파일 (.xsnap)
+  블록마다 따로 압축을 풀 수 있어 행 범위만 읽을 때 필요한 블록만 해제함
+  zstandard가 설치되어 있으면 zstd, 없으면 zlib 사용
+- columnar: 압축하지 않은 열 단위 디렉토리 (.cols)
+  숫자/불리언/날짜 열은 .npy로 저장해 메모리 매핑으로 읽고, 나머지 열은 JSON으로 저장
+"""
+import io
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성
+    zstandard = None
+
+SNAPSHOT_FORMATS = ["json", "compressed", "columnar"]
+SNAPSHOT_EXTENSIONS = {"json": ".json", "compressed": ".xsnap", "columnar": ".cols"}
+DEFAULT_COMPRESSION_LEVEL = 3
+DEFAULT_CHUNK_ROWS = 10000
+
+_MAGIC = b"XWSNAP01"
+_FOOTER_SIZE = struct.Struct("<Q")
+_MANIFEST = "manifest.json"
+# .npy로 저장하는 numpy dtype 종류 (bool, 정수, 부호 없는 정수, 실수, 복소수, 시간 간격, 날짜)
+_NPY_KINDS = "biufcmM"
+# json 형식에서 시트 대신 열 타입을 담는 키
+_JSON_DTYPES_KEY = "__dtypes__"
+
+
+def snapshot_filename(version: int, snapshot_format: str) -> str:
+    """버전별 스냅샷 파일(디렉토리) 이름"""
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"지원하지 않는 스냅샷 형식: {snapshot_format}")
+    return f"data-{version:08d}{SNAPSHOT_EXTENSIONS[snapshot_format]}"
+
+
+def parse_snapshot_version(name: str) -> Optional[int]:
+    """스냅샷 이름에서 버전 추출 (스냅샷이 아니면 None)"""
+    stem, extension = os.path.splitext(name)
+    if not stem.startswith("data-") or extension not in SNAPSHOT_EXTENSIONS.values():
+        return None
+    try:
+        return int(stem[len("data-"):])
+    except ValueError:
+        return None
+
+
+def _format_of(path: str) -> str:
+    """경로 확장자로 형식 판단"""
+    extension = os.path.splitext(path)[1]
+    for snapshot_format, format_extension in SNAPSHOT_EXTENSIONS.items():
+        if extension == format_extension:
+            return snapshot_format
+    return "json"
+
+
+def _codec(name: Optional[str] = None, level: int = DEFAULT_COMPRESSION_LEVEL):
+    """(코덱 이름, 압축 함수, 해제 함수)"""
+    name = name or ("zstd" if zstandard is not None else "zlib")
+    if name == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd로 압축된 스냅샷을 읽으려면 zstandard 패키지가 필요합니다.")
+        return name, zstandard.ZstdCompressor(level=level).compress, zstandard.ZstdDecompressor().decompress
+    if name == "zlib":
+        return name, lambda data: zlib.compress(data, max(0, min(level, 9))), zlib.decompress
+    raise ValueError(f"지원하지 않는 압축 방식: {name}")
+
+
+def column_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    """열 이름 -> dtype 문자열 (JSON으로 저장한 열의 타입을 다시 읽을 때 복원하기 위함)"""
+    return {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+
+
+def restore_dtypes(df: pd.DataFrame, dtypes: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """JSON 값(날짜는 문자열, NaT는 "NaT")으로 읽은 열을 저장 당시 타입으로 복원 (변환할 수 없는 열은 그대로)"""
+    for column, dtype in (dtypes or {}).items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        try:
+            target = pd.api.types.pandas_dtype(dtype)
+            if isinstance(target, pd.DatetimeTZDtype):
+                # 값마다 오프셋이 다르거나 없을 수 있으므로 UTC로 읽은 뒤 저장 당시 시간대로 변환
+                df[column] = pd.to_datetime(df[column], utc=True, format="mixed").dt.tz_convert(target.tz).astype(target)
+            elif dtype.startswith("datetime64"):
+                df[column] = pd.to_datetime(df[column], format="mixed").astype(dtype)
+            elif dtype.startswith("timedelta64"):
+                df[column] = pd.to_timedelta(df[column]).astype(dtype)
+            else:
+                df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"열 타입 복원 오류 ({column}, {dtype}): {e}")
+    return df
+
+
+def _fsync_file(path: str):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _json_values(series: pd.Series) -> list:
+    """JSON으로 저장할 값 목록 (NaT / NA 등 빈 값은 "NaT" 문자열이 아니라 null)"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _encode_block(df: pd.DataFrame) -> bytes:
+    """행 묶음을 열 단위 JSON으로 직렬화"""
+    block = {str(column): _json_values(df[column]) for column in df.columns}
+    return json.dumps(block, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def write_snapshot(path: str, excel_data: Dict[str, pd.DataFrame], compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                   chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """확장자에 맞는 형식으로 스냅샷 저장 (임시 경로에 쓰고 rename)"""
+    snapshot_format = _format_of(path)
+    directory = os.path.dirname(path) or "."
+    if snapshot_format == "columnar":
+        tmp_path = tempfile.mkdtemp(dir=directory, prefix=".tmp-")
+        try:
+            _write_columnar(tmp_path, excel_data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=SNAPSHOT_EXTENSIONS[snapshot_format])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if snapshot_format == "compressed":
+                _write_compressed(f, excel_data, compression_level, chunk_rows)
+            else:
+                data = {
+                    sheet_name: df.astype(object).where(df.notna(), None).to_dict('records')
+                    for sheet_name, df in excel_data.items()
+                }
+                data[_JSON_DTYPES_KEY] = {sheet_name: column_dtypes(df) for sheet_name, df in excel_data.items()}
+                f.write(json.dumps(data, indent=2, ensure_ascii=False, default=str).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_compressed(f, excel_data: Dict[str, pd.DataFrame], level: int, chunk_rows: int):
+    """[매직][압축 블록...][목차 JSON][목차 길이] 순서로 기록"""
+    codec_name, compress, _ = _codec(level=level)
+    f.write(_MAGIC)
+    offset = len(_MAGIC)
+    sheets = []
+    for sheet_name, df in excel_data.items():
+        blocks = []
+        for start in range(0, len(df), chunk_rows):
+            payload = compress(_encode_block(df.iloc[start:start + chunk_rows]))
+            f.write(payload)
+            blocks.append([offset, len(payload), min(chunk_rows, len(df) - start)])
+            offset += len(payload)
+        sheets.append({
+            "name": sheet_name,
+            "columns": [str(column) for column in df.columns],
+            "rows": len(df),
+            "dtypes": column_dtypes(df),
+            "blocks": blocks
+        })
+    footer = json.dumps({"codec": codec_name, "level": level, "sheets": sheets}, ensure_ascii=False).encode("utf-8")
+    f.write(footer)
+    f.write(_FOOTER_SIZE.pack(len(footer)))
+
+
+def _write_columnar(directory: str, excel_data: Dict[str, pd.DataFrame]):
+    """시트/열마다 파일 하나 (숫자 열은 .npy, 나머지는 JSON)"""
+    sheets = []
+    for i, (sheet_name, df) in enumerate(excel_data.items()):
+        columns = []
+        for j, column in enumerate(df.columns):
+            series = df[column]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in _NPY_KINDS:
+                filename = f"s{i}_c{j}.npy"
+                np.save(os.path.join(directory, filename), series.to_numpy())
+            else:
+                filename = f"s{i}_c{j}.json"
+                with open(os.path.join(directory, filename), "w") as f:
+                    json.dump(_json_values(series), f, ensure_ascii=False, default=str)
+            _fsync_file(os.path.join(directory, filename))
+            columns.append({"name": str(column), "file": filename, "dtype": str(series.dtype)})
+        sheets.append({"name": sheet_name, "rows": len(df), "columns": columns})
+
+    manifest_path = os.path.join(directory, _MANIFEST)
+    with open(manifest_path, "w") as f:
+        json.dump({"sheets": sheets}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_snapshot(path: str) -> Dict[str, pd.DataFrame]:
+    """스냅샷 전체 로드 (형식은 확장자로 판단)"""
+    snapshot_format = _format_of(path)
+    if snapshot_format == "compressed":
+        with _CompressedReader.open(path) as reader:
+            return {sheet["name"]: reader.read_sheet(sheet) for sheet in reader.sheets}
+    if snapshot_format == "columnar":
+        manifest = _read_manifest(path)
+        return {sheet["name"]: _read_columnar_sheet(path, sheet) for sheet in manifest["sheets"]}
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    dtypes = data.pop(_JSON_DTYPES_KEY, {})
+    # 행이 없는 시트도 열 이름은 타입 목록에서 복원
+    return {
+        sheet_name: restore_dtypes(
+            pd.DataFrame(records, columns=list(dtypes[sheet_name]) if dtypes.get(sheet_name) else None),
+            dtypes.get(sheet_name)
+        )
+        for sheet_name, records in data.items()
+    }
+
+
+def read_sheet_rows(path: str, sheet_name: str, start: int = 0,
+                    stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+    """시트의 행 범위와 전체 행 수 (시트가 없으면 None)
+
+    compressed는 겹치는 블록만 압축 해제하고, columnar는 매핑된 배열을 잘라서 읽음
+    """
+    snapshot_format = _format_of(path)
+    if snapshot_format == "compressed":
+        with _CompressedReader.open(path) as reader:
+            return reader.read_sheet_rows(sheet_name, start, stop)
+    if snapshot_format == "columnar":
+        sheet = next((sheet for sheet in _read_manifest(path)["sheets"] if sheet["name"] == sheet_name), None)
+        if sheet is None:
+            return None
+        return _read_columnar_sheet(path, sheet, start, stop), sheet["rows"]
+
+    excel_data = read_snapshot(path)
+    if sheet_name not in excel_data:
+        return None
+    df = excel_data[sheet_name]
+    return df.iloc[start:stop].reset_index(drop=True), len(df)
+
+
+def dump_compressed(excel_data: Dict[str, pd.DataFrame], compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS) -> bytes:
+    """compressed 형식 스냅샷을 바이트로 생성 (객체 저장소용)"""
+    buffer = io.BytesIO()
+    _write_compressed(buffer, excel_data, compression_level, chunk_rows)
+    return buffer.getvalue()
+
+
+def load_compressed(data: bytes) -> Dict[str, pd.DataFrame]:
+    """dump_compressed로 만든 바이트에서 전체 시트 로드"""
+    with _CompressedReader(memoryview(data)) as reader:
+        return {sheet["name"]: reader.read_sheet(sheet) for sheet in reader.sheets}
+
+
+def load_compressed_rows(data: bytes, sheet_name: str, start: int = 0,
+                         stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+    """dump_compressed로 만든 바이트에서 시트의 행 범위만 로드"""
+    with _CompressedReader(memoryview(data)) as reader:
+        return reader.read_sheet_rows(sheet_name, start, stop)
+
+
+class _CompressedReader:
+    """.xsnap 버퍼(메모리 매핑된 파일 또는 바이트)에서 필요한 블록만 압축 해제"""
+
+    def __init__(self, buffer, on_close=None):
+        self._buffer = buffer
+        self._on_close = on_close
+        if bytes(buffer[:len(_MAGIC)]) != _MAGIC:
+            self.close()
+            raise ValueError("압축 스냅샷 형식이 아닙니다.")
+        (footer_length,) = _FOOTER_SIZE.unpack(buffer[-_FOOTER_SIZE.size:])
+        footer_end = len(buffer) - _FOOTER_SIZE.size
+        footer = json.loads(bytes(buffer[footer_end - footer_length:footer_end]).decode("utf-8"))
+        self.sheets: List[Dict] = footer["sheets"]
+        _, _, self._decompress = _codec(footer["codec"])
+
+    @classmethod
+    def open(cls, path: str) -> "_CompressedReader":
+        """파일을 메모리 매핑하여 열기"""
+        f = open(path, "rb")
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            f.close()
+            raise ValueError(f"빈 스냅샷 파일: {path}")
+
+        def close():
+            buffer.close()
+            f.close()
+
+        return cls(buffer, close)
+
+    def read_sheet_rows(self, sheet_name: str, start: int = 0,
+                        stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+        """시트의 행 범위와 전체 행 수 (시트가 없으면 None)"""
+        sheet = next((sheet for sheet in self.sheets if sheet["name"] == sheet_name), None)
+        if sheet is None:
+            return None
+        return self.read_sheet(sheet, start, stop), sheet["rows"]
+
+    def read_sheet(self, sheet: Dict, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """행 범위에 걸치는 블록만 해제하여 DataFrame 생성"""
+        start, stop, _ = slice(start, stop).indices(sheet["rows"])
+        columns = {column: [] for column in sheet["columns"]}
+        block_start = 0
+        for offset, length, rows in sheet["blocks"]:
+            block_stop = block_start + rows
+            if block_stop > start and block_start < stop:
+                block = json.loads(self._decompress(self._buffer[offset:offset + length]))
+                low, high = max(start - block_start, 0), min(stop, block_stop) - block_start
+                for column in sheet["columns"]:
+                    columns[column].extend(block[column][low:high])
+            block_start = block_stop
+        return restore_dtypes(pd.DataFrame(columns, columns=sheet["columns"]), sheet.get("dtypes"))
+
+    def close(self):
+        if self._on_close:
+            self._on_close()
+
+    def __enter__(self) -> "_CompressedReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, _MANIFEST), "r") as f:
+        return json.load(f)
+
+
+def _read_columnar_sheet(path: str, sheet: Dict, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+    """열 파일로 DataFrame 생성
+
+    .npy는 copy-on-write 매핑(mmap_mode="c")이라 DataFrame을 수정해도 스냅샷 파일은 바뀌지 않음
+    """
+    columns = {}
+    for column in sheet["columns"]:
+        column_path = os.path.join(path, column["file"])
+        if column["file"].endswith(".npy"):
+            values = np.load(column_path, mmap_mode="c")[start:stop]
+        else:
+            with open(column_path, "r") as f:
+                values = json.load(f)[start:stop]
+        columns[column["name"]] = values
+    df = pd.DataFrame(columns, columns=[column["name"] for column in sheet["columns"]], copy=False)
+    # JSON으로 저장한 열(문자열, nullable 정수, 시간대가 있는 날짜 등)만 변환됨
+    return restore_dtypes(df, {column["name"]: column["dtype"] for column in sheet["columns"] if "dtype" in column})
+
+
+def remove_snapshot(path: str) -> int:
+    """스냅샷 파일 또는 디렉토리 삭제 후 확보된 크기 반환"""
+    try:
+        if os.path.isdir(path):
+            size = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, files in os.walk(path) for name in files
+            )
+            shutil.rmtree(path)
+            return size
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
@@ -0,0 +1,590 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.collaboration_manager import CollaborationManager
+from utils.snapshot_store import column_dtypes, restore_dtypes
+from utils.validation import ValidationError, enforce_rules, parse_rules
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS presence (
+    project_id TEXT NOT NULL REFERENCES projects(project_id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,
+    last_activity TEXT NOT NULL,
+    PRIMARY KEY (project_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sheets (
+    project_id TEXT NOT NULL REFERENCES projects(project_id) ON DELETE CASCADE,
+    sheet_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    dtypes TEXT,
+    PRIMARY KEY (project_id, sheet_name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    project_id TEXT NOT NULL,
+    sheet_name TEXT NOT NULL,
+    row_idx INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (project_id, sheet_name, row_idx),
+    FOREIGN KEY (project_id, sheet_name) REFERENCES sheets(project_id, sheet_name) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS validation_rules (
+    project_id TEXT PRIMARY KEY REFERENCES projects(project_id) ON DELETE CASCADE,
+    config TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _serialize_rows(df: pd.DataFrame) -> List[str]:
+    """DataFrame 행을 컬럼 순서의 JSON 배열 문자열로 변환"""
+    rows = json.loads(df.to_json(orient="values", date_format="iso", force_ascii=False))
+    return [json.dumps(row, ensure_ascii=False) for row in rows]
+
+
+def _fits_dtype(values: pd.Series, dtype: str) -> bool:
+    """값들을 열 타입으로 그대로 읽을 수 있는지"""
+    try:
+        converted = values.astype(dtype)
+    except (TypeError, ValueError):
+        return False
+    kept = values.isna().to_numpy() | (converted.astype(object) == values.astype(object)).to_numpy()
+    return bool(kept.all())
+
+
+def _widen_dtype(values: pd.Series, dtype: str) -> str:
+    """새 값들이 들어간 열의 타입 (빈 값이 들어간 int 열은 float64, 맞지 않는 값이 들어가면 object)"""
+    missing = values.isna()
+    if missing.any() and pd.api.types.pandas_dtype(dtype).kind in "iub":
+        # numpy 정수/bool 열은 빈 값을 담을 수 없음
+        dtype = "float64" if pd.api.types.pandas_dtype(dtype).kind in "iu" else "object"
+    return dtype if _fits_dtype(values[~missing], dtype) else "object"
+
+
+class SQLiteCollaborationManager(CollaborationManager):
+    """SQLite(WAL 모드) 기반 프로젝트 저장소
+
+    읽기는 쓰기 중에도 막히지 않고, 셀/행 단위 수정은 해당 행만 다시 씀
+    """
+
+    def __init__(self, project_dir="shared_projects", db_filename="projects.sqlite3"):
+        super().__init__(project_dir)
+        self.db_path = os.path.join(project_dir, db_filename)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        # 열 타입을 저장하기 전에 만든 데이터베이스
+        if "dtypes" not in {column[1] for column in conn.execute("PRAGMA table_info(sheets)")}:
+            conn.execute("ALTER TABLE sheets ADD COLUMN dtypes TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 연결 (WAL 모드)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """쓰기 트랜잭션 (시작할 때 쓰기 잠금 획득)"""
+        conn = self._connection()
+        started = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        self._record_lock_wait(time.perf_counter() - started)
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """읽기 트랜잭션 (여러 SELECT가 같은 스냅샷을 보도록 묶음)"""
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def create_project(self, excel_data: Dict[str, pd.DataFrame], filename: str, project_id: str = None) -> str:
+        """새 프로젝트 생성 (project_id를 주면 그 ID 사용)"""
+        project_id = project_id or self._generate_project_id()
+        now = datetime.now().isoformat()
+
+        with self._write_transaction() as conn:
+            conn.execute(
+                "INSERT INTO projects (project_id, filename, created_at, last_modified, version) VALUES (?, ?, ?, ?, 1)",
+                (project_id, filename, now, now)
+            )
+            self._write_sheets(conn, project_id, excel_data)
+
+        if self.search_index.is_built:
+            self.search_index.index_project(project_id, 1, excel_data, filename)
+
+        return project_id
+
+    def join_project(self, project_id: str, user_id: str = None) -> bool:
+        """프로젝트에 참여"""
+        if not user_id:
+            user_id = self._generate_user_id()
+
+        with self._write_transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+            if not exists:
+                return False
+            self._touch_user(conn, project_id, user_id)
+        return True
+
+    def get_project_data(self, project_id: str) -> Optional[Dict]:
+        """프로젝트 데이터 가져오기"""
+        try:
+            with self._read_transaction() as conn:
+                metadata = self._read_metadata_row(conn, project_id)
+                if metadata is None:
+                    return None
+                excel_data = self._read_sheets(conn, project_id)
+            return {
+                "metadata": metadata,
+                "excel_data": excel_data
+            }
+        except Exception as e:
+            print(f"프로젝트 데이터 로드 오류: {e}")
+            return None
+
+    def get_sheet_rows(self, project_id: str, sheet_name: str, start: int = 0,
+                       stop: Optional[int] = None) -> Optional[Tuple[pd.DataFrame, int]]:
+        """시트의 행 범위와 전체 행 수 (범위에 해당하는 행만 조회)"""
+        try:
+            with self._read_transaction() as conn:
+                sheet = conn.execute(
+                    "SELECT columns, row_count, dtypes FROM sheets WHERE project_id = ? AND sheet_name = ?",
+                    (project_id, sheet_name)
+                ).fetchone()
+                if sheet is None:
+                    return None
+                columns, row_count, dtypes = json.loads(sheet[0]), sheet[1], json.loads(sheet[2] or "{}")
+                start, stop, _ = slice(start, stop).indices(row_count)
+                rows = [
+                    json.loads(data)
+                    for (data,) in conn.execute(
+                        "SELECT data FROM sheet_rows WHERE project_id = ? AND sheet_name = ? "
+                        "AND row_idx >= ? AND row_idx < ? ORDER BY row_idx",
+                        (project_id, sheet_name, start, stop)
+                    )
+                ]
+            df = pd.DataFrame(rows, columns=columns) if rows else pd.DataFrame(columns=columns)
+            return restore_dtypes(df, dtypes), row_count
+        except Exception as e:
+            print(f"시트 범위 로드 오류: {e}")
+            return None
+
+    def update_project_data(self, project_id: str, excel_data: Dict[str, pd.DataFrame], user_id: str = None,
+                            changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None) -> bool:
+        """프로젝트 데이터 업데이트 (내용이 바뀐 행만 다시 씀)
+
+        changes: {시트: 변경된 셀 목록 또는 구조 변경이면 None}, 주면 목록에 없는 시트는 바뀌지 않은 것으로 보고
+        변경된 셀이 있는 행만 다시 씀 (없으면 저장된 행과 비교)
+        """
+        try:
+            with self._write_transaction() as conn:
+                row = conn.execute("SELECT filename FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+                if row is None:
+                    return False
+                validation = self._read_validation(conn, project_id)
+                if validation.get("reject_invalid"):
+                    # 저장된 시트는 구조가 바뀐 시트가 있을 때만 로드
+                    enforce_rules(validation, lambda: self._read_sheets(conn, project_id), excel_data, changes)
+                self._write_sheets(conn, project_id, excel_data, changes)
+                version = self._bump_version(conn, project_id, user_id)
+
+            if self.search_index.is_built:
+                self.search_index.index_project(project_id, version, excel_data, row[0])
+            return True
+        except ValidationError:
+            raise
+        except Exception as e:
+            print(f"프로젝트 데이터 업데이트 오류: {e}")
+            return False
+
+    def patch_sheet(self, project_id: str, sheet_name: str, cells: List[Dict] = None,
+                    append_rows: List[Dict] = None, user_id: str = None) -> Optional[int]:
+        """셀/행 단위 수정 (수정된 행만 UPDATE, 추가된 행만 INSERT)"""
+        with self._write_transaction() as conn:
+            if not conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone():
+                return None
+            sheet = conn.execute(
+                "SELECT columns, row_count, dtypes FROM sheets WHERE project_id = ? AND sheet_name = ?",
+                (project_id, sheet_name)
+            ).fetchone()
+            if sheet is None:
+                raise ValueError(f"존재하지 않는 시트: {sheet_name}")
+            columns, row_count, dtypes = json.loads(sheet[0]), sheet[1], json.loads(sheet[2] or "{}")
+            validation = self._read_validation(conn, project_id)
+            enforce = bool(validation.get("reject_invalid"))
+            # 행을 추가하면 시트 전체를 검사하므로 수정 전 시트를 보관
+            previous = {sheet_name: self._read_sheet(conn, project_id, sheet_name)} if enforce and append_rows else None
+
+            cell_changes = []
+            rows_by_index: Dict[int, List] = {}
+            for cell in cells or []:
+                row, column = cell["row"], cell["column"]
+                if column not in columns:
+                    raise ValueError(f"존재하지 않는 컬럼: {column}")
+                if not 0 <= row < row_count:
+                    raise ValueError(f"행 범위를 벗어났습니다: {row}")
+                if row not in rows_by_index:
+                    data = conn.execute(
+                        "SELECT data FROM sheet_rows WHERE project_id = ? AND sheet_name = ? AND row_idx = ?",
+                        (project_id, sheet_name, row)
+                    ).fetchone()[0]
+                    rows_by_index[row] = json.loads(data)
+                values = rows_by_index[row]
+                values.extend([None] * (len(columns) - len(values)))
+                cell_changes.append((row, column, values[columns.index(column)], cell["value"]))
+                values[columns.index(column)] = cell["value"]
+                if column in dtypes:
+                    # 파일 저장소처럼 컬럼 타입과 맞지 않는 값이 들어오면 열 타입을 넓힘
+                    dtypes[column] = _widen_dtype(pd.Series([cell["value"]], dtype=object), dtypes[column])
+
+            conn.executemany(
+                "UPDATE sheet_rows SET data = ? WHERE project_id = ? AND sheet_name = ? AND row_idx = ?",
+                [(json.dumps(values, ensure_ascii=False, default=str), project_id, sheet_name, row) for row, values in rows_by_index.items()]
+            )
+
+            if append_rows:
+                appended = pd.DataFrame(append_rows)
+                new_columns = [column for column in appended.columns if column not in columns]
+                if new_columns:
+                    columns = columns + [str(column) for column in new_columns]
+                    # 기존 행의 JSON 배열도 새 컬럼 수만큼 null로 채움 (범위 조회는 행 길이가 컬럼 수와 같아야 함)
+                    padding = ", ".join(["'$[#]', NULL"] * len(new_columns))
+                    conn.execute(
+                        f"UPDATE sheet_rows SET data = json_insert(data, {padding}) WHERE project_id = ? AND sheet_name = ?",
+                        (project_id, sheet_name)
+                    )
+                appended = appended.reindex(columns=columns)
+                for column in appended.columns:
+                    if column in dtypes:
+                        dtypes[column] = _widen_dtype(appended[column].astype(object), dtypes[column])
+                conn.executemany(
+                    "INSERT INTO sheet_rows (project_id, sheet_name, row_idx, data) VALUES (?, ?, ?, ?)",
+                    [
+                        (project_id, sheet_name, row_count + offset, data)
+                        for offset, data in enumerate(_serialize_rows(appended))
+                    ]
+                )
+                row_count += len(appended)
+                conn.execute(
+                    "UPDATE sheets SET columns = ?, row_count = ? WHERE project_id = ? AND sheet_name = ?",
+                    (json.dumps(columns, ensure_ascii=False), row_count, project_id, sheet_name)
+                )
+            conn.execute(
+                "UPDATE sheets SET dtypes = ? WHERE project_id = ? AND sheet_name = ?",
+                (json.dumps(dtypes, ensure_ascii=False), project_id, sheet_name)
+            )
+
+            if enforce:
+                # 트랜잭션 안에서 수정 후 상태와 비교 (위반이 늘면 예외로 롤백, 셀 수정은 바뀐 셀만 검사)
+                enforce_rules(
+                    validation, previous, lambda: {sheet_name: self._read_sheet(conn, project_id, sheet_name)},
+                    {sheet_name: None if append_rows else cell_changes}
+                )
+            version = self._bump_version(conn, project_id, user_id)
+
+        if self.search_index.is_built:
+            project_data = self.get_project_data(project_id)
+            if project_data:
+                self.search_index.index_project(
+                    project_id, version, project_data["excel_data"], project_data["metadata"]["filename"]
+                )
+        return version
+
+    def update_cell(self, project_id: str, sheet_name: str, row: int, column: str, value, user_id: str = None) -> Optional[int]:
+        """셀 하나 수정 (행 하나만 다시 씀)"""
+        return self.patch_sheet(project_id, sheet_name, cells=[{"row": row, "column": column, "value": value}], user_id=user_id)
+
+    def get_validation_config(self, project_id: str) -> Dict:
+        """컬럼 검증 규칙 설정"""
+        return self._read_validation(self._connection(), project_id)
+
+    def set_validation_config(self, project_id: str, config: Dict) -> bool:
+        """컬럼 검증 규칙 설정 저장 (데이터 버전은 올리지 않음)"""
+        parse_rules(config)
+        with self._write_transaction() as conn:
+            if not conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone():
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO validation_rules (project_id, config) VALUES (?, ?)",
+                (project_id, json.dumps(config, ensure_ascii=False))
+            )
+        return True
+
+    def get_active_users(self, project_id: str) -> List[Dict]:
+        """활성 사용자 목록 가져오기 (5분 이내 활동)"""
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - 300).isoformat()
+        rows = self._connection().execute(
+            "SELECT user_id, last_activity FROM presence WHERE project_id = ? AND julianday(last_activity) > julianday(?)",
+            (project_id, cutoff)
+        ).fetchall()
+        return [{"user_id": user_id, "last_activity": last_activity} for user_id, last_activity in rows]
+
+    def list_projects(self) -> List[Dict]:
+        """모든 프로젝트 목록 가져오기"""
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - 300).isoformat()
+        rows = self._connection().execute(
+            """
+            SELECT p.project_id, p.filename, p.created_at, p.last_modified,
+                   (SELECT COUNT(*) FROM presence u
+                    WHERE u.project_id = p.project_id AND julianday(u.last_activity) > julianday(?))
+            FROM projects p
+            ORDER BY julianday(p.last_modified) DESC
+            """,
+            (cutoff,)
+        ).fetchall()
+        return [
+            {
+                "project_id": project_id,
+                "filename": filename,
+                "created_at": created_at,
+                "last_modified": last_modified,
+                "active_users_count": active_users_count
+            }
+            for project_id, filename, created_at, last_modified, active_users_count in rows
+        ]
+
+    def get_project_version(self, project_id: str) -> int:
+        """프로젝트 버전 가져오기"""
+        row = self._connection().execute("SELECT version FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return row[0] if row else 0
+
+    def refresh_search_index(self):
+        """버전이 바뀐 프로젝트만 다시 색인"""
+        versions = dict(self._connection().execute("SELECT project_id, version FROM projects").fetchall())
+        for project_id, version in versions.items():
+            if self.search_index.project_version(project_id) != version:
+                project_data = self.get_project_data(project_id)
+                if project_data:
+                    self.search_index.index_project(
+                        project_id, version, project_data["excel_data"], project_data["metadata"]["filename"]
+                    )
+        for project_id in set(self.search_index.indexed_projects()) - set(versions):
+            self.search_index.remove_project(project_id)
+
+        self.search_index.is_built = True
+        self.search_index.last_refreshed = datetime.now().timestamp()
+
+    def run_maintenance(self, presence_ttl: float, project_ttl: float = 0, archive: bool = True) -> Dict:
+        """오래된 접속 기록 / 방치된 프로젝트 정리 후 WAL 체크포인트 (정리 작업에서 호출)"""
+        size_before = self._database_size()
+        now = datetime.now().timestamp()
+        report = {"expired_users": 0, "archived_projects": 0, "deleted_projects": 0}
+
+        with self._write_transaction() as conn:
+            report["expired_users"] = conn.execute(
+                "DELETE FROM presence WHERE julianday(last_activity) < julianday(?)",
+                (datetime.fromtimestamp(now - presence_ttl).isoformat(),)
+            ).rowcount
+
+        if project_ttl:
+            cutoff = datetime.fromtimestamp(now - project_ttl).isoformat()
+            idle_projects = [
+                project_id for (project_id,) in self._connection().execute(
+                    """
+                    SELECT project_id FROM projects p
+                    WHERE julianday(last_modified) < julianday(?)
+                      AND NOT EXISTS (SELECT 1 FROM presence u WHERE u.project_id = p.project_id)
+                    """,
+                    (cutoff,)
+                )
+            ]
+            archive_dir = os.path.join(self.project_dir, "_archive")
+            for project_id in idle_projects:
+                if archive:
+                    project_data = self.get_project_data(project_id)
+                    if project_data is None:
+                        continue
+                    os.makedirs(archive_dir, exist_ok=True)
+                    with gzip.open(os.path.join(archive_dir, f"{project_id}.json.gz"), "wt", encoding="utf-8") as f:
+                        json.dump({
+                            "metadata": project_data["metadata"],
+                            "excel_data": {
+                                sheet_name: json.loads(df.to_json(orient="split", date_format="iso", force_ascii=False))
+                                for sheet_name, df in project_data["excel_data"].items()
+                            }
+                        }, f, ensure_ascii=False)
+                with self._write_transaction() as conn:
+                    # 보관하는 사이 수정된 프로젝트는 남겨둠
+                    deleted = conn.execute(
+                        "DELETE FROM projects WHERE project_id = ? AND julianday(last_modified) < julianday(?)",
+                        (project_id, cutoff)
+                    ).rowcount
+                if deleted:
+                    report["archived_projects" if archive else "deleted_projects"] += 1
+                    self.search_index.remove_project(project_id)
+
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        report["reclaimed_bytes"] = max(size_before - self._database_size(), 0)
+        return report
+
+    def _database_size(self) -> int:
+        """데이터베이스 + WAL 파일 크기"""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.db_path, self.db_path + "-wal")
+            if os.path.exists(path)
+        )
+
+    def _read_metadata_row(self, conn: sqlite3.Connection, project_id: str) -> Optional[Dict]:
+        """파일 저장소와 같은 형태의 메타데이터"""
+        row = conn.execute(
+            "SELECT filename, created_at, last_modified, version FROM projects WHERE project_id = ?",
+            (project_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        active_users = dict(conn.execute(
+            "SELECT user_id, last_activity FROM presence WHERE project_id = ?", (project_id,)
+        ).fetchall())
+        return {
+            "project_id": project_id,
+            "filename": row[0],
+            "created_at": row[1],
+            "last_modified": row[2],
+            "active_users": active_users,
+            "version": row[3],
+            "validation": self._read_validation(conn, project_id)
+        }
+
+    def _read_validation(self, conn: sqlite3.Connection, project_id: str) -> Dict:
+        """검증 규칙 설정 (없으면 빈 dict)"""
+        row = conn.execute("SELECT config FROM validation_rules WHERE project_id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _read_sheets(self, conn: sqlite3.Connection, project_id: str) -> Dict[str, pd.DataFrame]:
+        """모든 시트를 DataFrame으로 로드"""
+        sheets = conn.execute(
+            "SELECT sheet_name FROM sheets WHERE project_id = ? ORDER BY position", (project_id,)
+        ).fetchall()
+        return {sheet_name: self._read_sheet(conn, project_id, sheet_name) for (sheet_name,) in sheets}
+
+    def _read_sheet(self, conn: sqlite3.Connection, project_id: str, sheet_name: str) -> pd.DataFrame:
+        """시트 하나를 DataFrame으로 로드"""
+        columns, dtypes = conn.execute(
+            "SELECT columns, dtypes FROM sheets WHERE project_id = ? AND sheet_name = ?", (project_id, sheet_name)
+        ).fetchone()
+        columns = json.loads(columns)
+        rows = [
+            json.loads(data)
+            for (data,) in conn.execute(
+                "SELECT data FROM sheet_rows WHERE project_id = ? AND sheet_name = ? ORDER BY row_idx",
+                (project_id, sheet_name)
+            )
+        ]
+        df = pd.DataFrame(rows, columns=columns) if rows else pd.DataFrame(columns=columns)
+        return restore_dtypes(df, json.loads(dtypes or "{}"))
+
+    def _write_sheets(self, conn: sqlite3.Connection, project_id: str, excel_data: Dict[str, pd.DataFrame],
+                      changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None):
+        """시트 저장 (변경된 셀 목록이 있으면 그 행만, 없으면 기존 행과 비교해서 바뀐 행만 씀)"""
+        existing_sheets = {
+            sheet_name: (json.loads(columns), row_count)
+            for sheet_name, columns, row_count in conn.execute(
+                "SELECT sheet_name, columns, row_count FROM sheets WHERE project_id = ?", (project_id,)
+            )
+        }
+        for sheet_name in set(existing_sheets) - set(excel_data):
+            conn.execute("DELETE FROM sheets WHERE project_id = ? AND sheet_name = ?", (project_id, sheet_name))
+
+        for position, (sheet_name, df) in enumerate(excel_data.items()):
+            columns = [str(column) for column in df.columns]
+            conn.execute(
+                """
+                INSERT INTO sheets (project_id, sheet_name, position, columns, row_count, dtypes) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (project_id, sheet_name) DO UPDATE SET
+                    position = excluded.position, columns = excluded.columns,
+                    row_count = excluded.row_count, dtypes = excluded.dtypes
+                """,
+                (project_id, sheet_name, position, json.dumps(columns, ensure_ascii=False), len(df),
+                 json.dumps(column_dtypes(df), ensure_ascii=False))
+            )
+
+            # 저장된 구조와 같을 때만 변경 목록을 믿음 (시트 추가, 행/열 변경은 전체 비교)
+            same_shape = existing_sheets.get(sheet_name) == (columns, len(df))
+            if changes is not None and same_shape and sheet_name not in changes:
+                continue
+            sheet_changes = changes.get(sheet_name) if changes is not None and same_shape else None
+            if sheet_changes is not None:
+                positions = sorted({row for row, _, _, _ in sheet_changes})
+                conn.executemany(
+                    "UPDATE sheet_rows SET data = ? WHERE project_id = ? AND sheet_name = ? AND row_idx = ?",
+                    [
+                        (data, project_id, sheet_name, row_idx)
+                        for row_idx, data in zip(positions, _serialize_rows(df.iloc[positions]))
+                    ]
+                )
+                continue
+
+            rows = _serialize_rows(df)
+            current = dict(conn.execute(
+                "SELECT row_idx, data FROM sheet_rows WHERE project_id = ? AND sheet_name = ?",
+                (project_id, sheet_name)
+            ).fetchall())
+            changed = [
+                (project_id, sheet_name, row_idx, data)
+                for row_idx, data in enumerate(rows)
+                if current.get(row_idx) != data
+            ]
+            conn.executemany(
+                """
+                INSERT INTO sheet_rows (project_id, sheet_name, row_idx, data) VALUES (?, ?, ?, ?)
+                ON CONFLICT (project_id, sheet_name, row_idx) DO UPDATE SET data = excluded.data
+                """,
+                changed
+            )
+            if len(current) > len(rows):
+                conn.execute(
+                    "DELETE FROM sheet_rows WHERE project_id = ? AND sheet_name = ? AND row_idx >= ?",
+                    (project_id, sheet_name, len(rows))
+                )
+
+    def _bump_version(self, conn: sqlite3.Connection, project_id: str, user_id: str = None) -> int:
+        """버전 증가 및 수정 시각 / 사용자 활동 기록"""
+        conn.execute(
+            "UPDATE projects SET version = version + 1, last_modified = ? WHERE project_id = ?",
+            (datetime.now().isoformat(), project_id)
+        )
+        if user_id:
+            self._touch_user(conn, project_id, user_id)
+        return conn.execute("SELECT version FROM projects WHERE project_id = ?", (project_id,)).fetchone()[0]
+
+    def _touch_user(self, conn: sqlite3.Connection, project_id: str, user_id: str):
+        """사용자 활동 시간 업데이트"""
+        conn.execute(
+            """
+            INSERT INTO presence (project_id, user_id, last_activity) VALUES (?, ?, ?)
+            ON CONFLICT (project_id, user_id) DO UPDATE SET last_activity = excluded.last_activity
+            """,
+            (project_id, user_id, datetime.now().isoformat())
+        )
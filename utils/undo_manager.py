@@ -0,0 +1,212 @@
+import sys
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.sheet_diff import diff_sheets, hash_rows
+
+# 사용자(세션)별 실행 취소 기록 한도
+DEFAULT_UNDO_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_UNDO_MAX_STEPS = 200
+
+
+def _is_missing(value: Any) -> bool:
+    return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    """셀 값 비교 (양쪽 모두 결측값이면 같음)"""
+    a_missing, b_missing = _is_missing(a), _is_missing(b)
+    if a_missing or b_missing:
+        return a_missing and b_missing
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return str(a) == str(b)
+
+
+def _sheet_hash(df: pd.DataFrame) -> int:
+    """시트 내용 전체의 해시 (열 이름 포함, 숫자 타입 차이는 hash_rows에서 무시)"""
+    return hash((tuple(str(column) for column in df.columns), len(df), hash_rows(df).tobytes()))
+
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: Dict[Any, Any]) -> pd.DataFrame:
+    """열 타입을 수정 당시 타입으로 되돌림 (값이 바뀌지 않고 변환되는 열만)"""
+    for column, dtype in dtypes.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        try:
+            converted = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            continue
+        same = converted.isna().to_numpy() & df[column].isna().to_numpy()
+        same |= (converted.astype(object) == df[column].astype(object)).to_numpy(dtype=bool)
+        if same.all():
+            df[column] = converted
+    return df
+
+
+class SheetPatch:
+    """시트 한 번의 수정 내역 (이전 <-> 이후로 양방향 적용 가능)
+
+    바뀐 셀과 추가/삭제된 행만 보관하고, 열 구성이 바뀐 경우에만 시트 전체를 보관함
+    """
+
+    def __init__(self, sheet_name: str, old_df: pd.DataFrame, new_df: pd.DataFrame,
+                 changes: Optional[List[Tuple[int, str, Any, Any]]] = None):
+        self.sheet_name = sheet_name
+        # (이전 행 위치, 이후 행 위치, 컬럼, 이전 값, 이후 값)
+        self.cells: List[Tuple[int, int, Any, Any, Any]] = []
+        self.deleted_rows: Optional[pd.DataFrame] = None
+        self.inserted_rows: Optional[pd.DataFrame] = None
+        self.old_frame: Optional[pd.DataFrame] = None
+        self.new_frame: Optional[pd.DataFrame] = None
+        self.old_hash = _sheet_hash(old_df)
+        self.new_hash = _sheet_hash(new_df)
+        # 되돌린 결과의 열 타입 (행을 다시 붙이면 int 열이 float이 되는 등 타입이 바뀔 수 있음)
+        self.old_dtypes = old_df.dtypes.to_dict()
+        self.new_dtypes = new_df.dtypes.to_dict()
+
+        if changes is not None:
+            self.cells = [(row, row, column, old, new) for row, column, old, new in changes]
+        elif [str(column) for column in old_df.columns] != [str(column) for column in new_df.columns]:
+            self.old_frame, self.new_frame = old_df, new_df
+        else:
+            diff = diff_sheets(old_df, new_df)
+            labels = {str(column): column for column in new_df.columns}
+            old_positions = dict((new_position, old_position) for old_position, new_position in diff.modified_rows)
+            self.cells = [
+                (old_positions[row], row, labels[column], old, new)
+                for row, column, old, new in diff.changed_cells
+            ]
+            self.deleted_rows = old_df.reset_index(drop=True).iloc[diff.deleted_rows]
+            self.inserted_rows = new_df.reset_index(drop=True).iloc[diff.inserted_rows]
+
+    @property
+    def is_empty(self) -> bool:
+        return self.old_hash == self.new_hash
+
+    def nbytes(self) -> int:
+        """보관 중인 값의 대략적인 메모리 크기"""
+        size = sys.getsizeof(self.cells) + sum(
+            sys.getsizeof(old) + sys.getsizeof(new) for _, _, _, old, new in self.cells
+        )
+        for frame in (self.deleted_rows, self.inserted_rows, self.old_frame, self.new_frame):
+            if frame is not None:
+                size += int(frame.memory_usage(index=True, deep=True).sum())
+        return size
+
+    def apply(self, df: pd.DataFrame, undo: bool) -> pd.DataFrame:
+        """undo=True면 이후 -> 이전, False면 이전 -> 이후로 변환한 새 DataFrame
+
+        다른 사용자가 이후에 같은 시트를 수정했다면 ValueError (셀만 바뀐 경우는 같은 셀을 건드리지 않았으면 적용)
+        """
+        expected_hash = self.new_hash if undo else self.old_hash
+        if self.old_frame is not None:
+            if _sheet_hash(df) != expected_hash:
+                raise ValueError("다른 사용자가 이후에 시트 구성을 바꿔서 되돌릴 수 없습니다.")
+            return (self.old_frame if undo else self.new_frame).copy()
+
+        has_rows = self.deleted_rows is not None and (len(self.deleted_rows) or len(self.inserted_rows))
+        if has_rows and _sheet_hash(df) != expected_hash:
+            raise ValueError("다른 사용자가 이후에 행을 바꿔서 되돌릴 수 없습니다.")
+
+        result = df.reset_index(drop=True).copy()
+        conflicts = []
+        for old_position, new_position, column, old, new in self.cells:
+            position, current, target = (new_position, new, old) if undo else (old_position, old, new)
+            if column not in result.columns or position >= len(result):
+                conflicts.append((position, column))
+                continue
+            if not _same_value(result.at[position, column], current):
+                conflicts.append((position, column))
+                continue
+            try:
+                result.iat[position, result.columns.get_loc(column)] = target
+            except (TypeError, ValueError):
+                # 컬럼 타입과 맞지 않는 값은 object 컬럼으로 바꿔서 저장
+                result[column] = result[column].astype(object)
+                result.iat[position, result.columns.get_loc(column)] = target
+        if conflicts and len(conflicts) == len(self.cells):
+            raise ValueError("다른 사용자가 같은 셀을 이후에 수정해서 되돌릴 수 없습니다.")
+
+        if has_rows:
+            remove, restore = (self.inserted_rows, self.deleted_rows) if undo else (self.deleted_rows, self.inserted_rows)
+            kept = result.drop(index=remove.index)
+            restored_positions = set(restore.index)
+            kept.index = [
+                position for position in range(len(kept) + len(restore)) if position not in restored_positions
+            ]
+            result = pd.concat([kept, restore]).sort_index().reset_index(drop=True)
+        return _restore_dtypes(result, self.old_dtypes if undo else self.new_dtypes)
+
+
+class UndoManager:
+    """사용자별 실행 취소 / 다시 실행 스택 (전체 복사본이 아닌 수정 내역을 보관, 메모리 한도 초과 시 오래된 것부터 삭제)"""
+
+    def __init__(self, max_bytes: int = DEFAULT_UNDO_MAX_BYTES, max_steps: int = DEFAULT_UNDO_MAX_STEPS):
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self._undo: Deque[Tuple[SheetPatch, int]] = deque()
+        self._redo: Deque[Tuple[SheetPatch, int]] = deque()
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(size for _, size in self._undo) + sum(size for _, size in self._redo)
+
+    def record(self, sheet_name: str, old_df: pd.DataFrame, new_df: pd.DataFrame,
+               changes: Optional[List[Tuple[int, str, Any, Any]]] = None) -> Optional[SheetPatch]:
+        """새 수정 기록 (다시 실행 스택은 비움)"""
+        patch = SheetPatch(sheet_name, old_df, new_df, changes)
+        if patch.is_empty:
+            return None
+        self._redo.clear()
+        self._push(self._undo, patch)
+        return patch
+
+    def undo(self, excel_data: Dict[str, pd.DataFrame]) -> Optional[Tuple[str, pd.DataFrame]]:
+        """마지막 수정을 되돌린 (시트 이름, 새 DataFrame) (되돌릴 것이 없으면 None, 충돌이면 ValueError)"""
+        return self._move(self._undo, self._redo, excel_data, undo=True)
+
+    def redo(self, excel_data: Dict[str, pd.DataFrame]) -> Optional[Tuple[str, pd.DataFrame]]:
+        """마지막으로 되돌린 수정을 다시 적용한 (시트 이름, 새 DataFrame)"""
+        return self._move(self._redo, self._undo, excel_data, undo=False)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def _move(self, source: Deque, target: Deque, excel_data: Dict[str, pd.DataFrame],
+              undo: bool) -> Optional[Tuple[str, pd.DataFrame]]:
+        if not source:
+            return None
+        patch, _ = source[-1]
+        if patch.sheet_name not in excel_data:
+            source.pop()
+            raise ValueError(f"시트가 삭제되어 되돌릴 수 없습니다: {patch.sheet_name}")
+        try:
+            result = patch.apply(excel_data[patch.sheet_name], undo)
+        except ValueError:
+            # 적용할 수 없는 기록은 버림
+            source.pop()
+            raise
+        source.pop()
+        self._push(target, patch)
+        return patch.sheet_name, result
+
+    def _push(self, stack: Deque, patch: SheetPatch):
+        stack.append((patch, patch.nbytes()))
+        while len(self._undo) + len(self._redo) > self.max_steps or (
+            self.nbytes > self.max_bytes and len(self._undo) + len(self._redo) > 1
+        ):
+            # 가장 오래된 실행 취소 기록부터 삭제
+            (self._undo or self._redo).popleft()
@@ -0,0 +1,417 @@
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.query_engine import hash_key
+
+RULE_TYPES = ["number", "integer", "text", "date", "bool"]
+RULE_KEYS = ["type", "required", "min", "max", "pattern", "allowed", "unique"]
+# 화면 / 오류 메시지에 표시할 최대 위반 건수
+MAX_REPORTED_VIOLATIONS = 500
+
+
+class ValidationError(ValueError):
+    """검증 규칙을 새로 위반하는 수정"""
+
+    def __init__(self, message: str, violations: Dict[Tuple[str, str, str], Tuple[int, int]] = None):
+        super().__init__(message)
+        self.violations = violations or {}
+
+
+class ColumnRule:
+    """컬럼 하나의 검증 규칙 (비어 있는 셀은 required일 때만 위반)"""
+
+    def __init__(self, column: str, type: Optional[str] = None, required: bool = False,
+                 min: Optional[float] = None, max: Optional[float] = None, pattern: Optional[str] = None,
+                 allowed: Optional[List[Any]] = None, unique: bool = False):
+        if type is not None and type not in RULE_TYPES:
+            raise ValueError(f"지원하지 않는 타입: {type} (가능: {', '.join(RULE_TYPES)})")
+        self.column = column
+        self.type = type
+        self.required = required
+        self.min = None if min is None else float(min)
+        self.max = None if max is None else float(max)
+        try:
+            self.pattern = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f"잘못된 정규식 ({column}): {e}")
+        self.allowed = list(allowed) if allowed is not None else None
+        self.unique = unique
+
+    @classmethod
+    def from_dict(cls, column: str, spec: Dict) -> "ColumnRule":
+        unknown = [key for key in spec if key not in RULE_KEYS]
+        if unknown:
+            raise ValueError(f"알 수 없는 규칙 ({column}): {', '.join(unknown)}")
+        return cls(column, **spec)
+
+    def to_dict(self) -> Dict:
+        spec = {
+            "type": self.type,
+            "required": self.required or None,
+            "min": self.min,
+            "max": self.max,
+            "pattern": self.pattern.pattern if self.pattern else None,
+            "allowed": self.allowed,
+            "unique": self.unique or None
+        }
+        return {key: value for key, value in spec.items() if value is not None}
+
+    def check(self, series: pd.Series) -> pd.Series:
+        """셀별 첫 번째 위반 규칙 이름 (위반 없으면 None), unique 제외 (벡터 연산)"""
+        series = series.reset_index(drop=True)
+        result = pd.Series([None] * len(series), dtype=object)
+        missing = series.isna().to_numpy()
+        present = ~missing
+
+        def mark(name: str, invalid: np.ndarray):
+            result[invalid & result.isna().to_numpy()] = name
+
+        if self.required:
+            mark("required", missing)
+
+        numeric = None
+        if self.type is not None:
+            if self.type in ("number", "integer"):
+                numeric = series if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) \
+                    else pd.to_numeric(series, errors="coerce")
+                invalid = numeric.isna().to_numpy()
+                if self.type == "integer":
+                    invalid = invalid | (numeric.fillna(0) % 1 != 0).to_numpy()
+            elif self.type == "text":
+                invalid = ~series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+            elif self.type == "date":
+                if pd.api.types.is_datetime64_any_dtype(series):
+                    invalid = np.zeros(len(series), dtype=bool)
+                else:
+                    invalid = pd.to_datetime(series, errors="coerce", format="mixed").isna().to_numpy()
+            else:
+                invalid = ~series.map(lambda value: isinstance(value, (bool, np.bool_))).to_numpy(dtype=bool)
+            mark("type", invalid & present)
+
+        if self.min is not None or self.max is not None:
+            if numeric is None:
+                numeric = pd.to_numeric(series, errors="coerce")
+            values = numeric.to_numpy(dtype=float, na_value=np.nan)
+            out_of_range = np.zeros(len(series), dtype=bool)
+            with np.errstate(invalid="ignore"):
+                if self.min is not None:
+                    out_of_range |= values < self.min
+                if self.max is not None:
+                    out_of_range |= values > self.max
+            mark("range", out_of_range & present)
+
+        if self.pattern is not None:
+            matched = series.astype(str).str.fullmatch(self.pattern).fillna(False).to_numpy(dtype=bool)
+            mark("pattern", ~matched & present)
+
+        if self.allowed is not None:
+            allowed = series.isin(self.allowed) | series.astype(str).isin([str(value) for value in self.allowed])
+            mark("allowed", ~allowed.to_numpy(dtype=bool) & present)
+
+        return result
+
+    def describe(self, rule_name: str) -> str:
+        """위반 메시지"""
+        if rule_name == "required":
+            return "값이 비어 있습니다"
+        if rule_name == "type":
+            return f"{self.type} 형식이 아닙니다"
+        if rule_name == "range":
+            low = "" if self.min is None else f"{self.min:g} 이상"
+            high = "" if self.max is None else f"{self.max:g} 이하"
+            return f"범위를 벗어났습니다 ({' '.join(part for part in [low, high] if part)})"
+        if rule_name == "pattern":
+            return f"형식({self.pattern.pattern})과 맞지 않습니다"
+        if rule_name == "allowed":
+            return f"허용되지 않은 값입니다 ({', '.join(str(value) for value in self.allowed[:10])})"
+        return "중복된 값입니다"
+
+
+def parse_rules(config: Optional[Dict]) -> Dict[str, List[ColumnRule]]:
+    """{"rules": {시트: {컬럼: 규칙}}} 형식의 설정을 시트별 규칙 목록으로 변환 (잘못된 규칙은 ValueError)"""
+    rules = {}
+    for sheet_name, columns in ((config or {}).get("rules") or {}).items():
+        rules[sheet_name] = [ColumnRule.from_dict(column, spec) for column, spec in columns.items()]
+    return rules
+
+
+def _violation_counts(excel_data: Dict[str, pd.DataFrame], rules: Dict[str, List[ColumnRule]]) -> Counter:
+    """(시트, 컬럼, 규칙)별 위반 건수 (전체 벡터 검사)"""
+    counts = Counter()
+    for sheet_name, sheet_rules in rules.items():
+        df = excel_data.get(sheet_name)
+        if df is None:
+            continue
+        for rule in sheet_rules:
+            if rule.column not in df.columns:
+                continue
+            series = df[rule.column]
+            for rule_name, count in rule.check(series).value_counts().items():
+                counts[(sheet_name, rule.column, rule_name)] += int(count)
+            if rule.unique:
+                counts[(sheet_name, rule.column, "unique")] += int(series.dropna().duplicated(keep=False).sum())
+    return counts
+
+
+def _is_missing(value: Any) -> bool:
+    return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+
+
+def _changed_cell_counts(rule: ColumnRule, old_values: List[Any], new_values: List[Any]) -> Tuple[Counter, Counter]:
+    """바뀐 셀들만 검사한 수정 전/후 규칙별 위반 건수 (unique 제외)"""
+    before = Counter(rule.check(pd.Series(old_values, dtype=object)).value_counts().to_dict())
+    after = Counter(rule.check(pd.Series(new_values, dtype=object)).value_counts().to_dict())
+    return before, after
+
+
+def _duplicate_counts(series: pd.Series, old_values: List[Any], new_values: List[Any]) -> Tuple[int, int]:
+    """바뀐 셀의 이전/새 값에 해당하는 행들의 수정 전/후 중복 건수 (다른 값의 중복 건수는 바뀌지 않음)"""
+    removed = Counter(value for value in old_values if not _is_missing(value))
+    added = Counter(value for value in new_values if not _is_missing(value))
+    keys = list(set(removed) | set(added))
+    if not keys:
+        return 0, 0
+    current = series[series.isin(keys)].value_counts().to_dict()
+    before = after = 0
+    for key in keys:
+        count = int(current.get(key, 0))
+        previous = count - added[key] + removed[key]
+        after += count if count > 1 else 0
+        before += previous if previous > 1 else 0
+    return before, after
+
+
+def enforce_rules(config: Optional[Dict],
+                  old_data: Union[Dict[str, pd.DataFrame], Callable[[], Dict[str, pd.DataFrame]], None],
+                  new_data: Union[Dict[str, pd.DataFrame], Callable[[], Dict[str, pd.DataFrame]]],
+                  changes: Optional[Dict[str, Optional[List[Tuple[int, str, Any, Any]]]]] = None):
+    """reject_invalid가 켜져 있으면 새로 생긴 위반이 있는 커밋을 ValidationError로 거부
+
+    이미 있던 위반은 허용하므로 규칙을 나중에 추가해도 기존 데이터를 고치는 수정은 저장됨
+    old_data / new_data는 {시트: DataFrame} 또는 그것을 불러오는 함수 (필요할 때만 호출)
+    changes: {시트: 변경된 셀 목록 (행 위치, 컬럼, 이전 값, 새 값) 또는 구조 변경이면 None}
+    - 주면 목록에 없는 시트는 검사하지 않고, 셀 목록이 있는 시트는 바뀐 셀만 검사함 (구조 변경만 전체 검사)
+    """
+    if not config or not config.get("reject_invalid"):
+        return
+    rules = parse_rules(config)
+    if not rules:
+        return
+
+    loaded = {}
+
+    def load(name: str, data) -> Dict[str, pd.DataFrame]:
+        if name not in loaded:
+            loaded[name] = (data() if callable(data) else data) or {}
+        return loaded[name]
+
+    increased = {}
+    for sheet_name, sheet_rules in rules.items():
+        if changes is not None and sheet_name not in changes:
+            continue
+        sheet_changes = changes.get(sheet_name) if changes is not None else None
+        if sheet_changes is None:
+            # 행/열이 바뀐 시트는 전체 검사
+            before = _violation_counts(load("old", old_data), {sheet_name: sheet_rules})
+            after = _violation_counts(load("new", new_data), {sheet_name: sheet_rules})
+            increased.update({key: (before[key], count) for key, count in after.items() if count > before[key]})
+            continue
+
+        for rule in sheet_rules:
+            cells = [(old, new) for _, column, old, new in sheet_changes if column == rule.column]
+            if not cells:
+                continue
+            old_values = [old for old, _ in cells]
+            new_values = [new for _, new in cells]
+            before, after = _changed_cell_counts(rule, old_values, new_values)
+            if rule.unique:
+                df = load("new", new_data).get(sheet_name)
+                if df is not None and rule.column in df.columns:
+                    before["unique"], after["unique"] = _duplicate_counts(df[rule.column], old_values, new_values)
+            grown = [rule_name for rule_name, count in after.items() if count > before[rule_name]]
+            if grown:
+                # 거부할 때만 전체 건수를 세서 메시지에 표시 (바뀌지 않은 셀의 위반 건수는 같음)
+                totals = _violation_counts(load("new", new_data), {sheet_name: [rule]})
+                for rule_name in grown:
+                    key = (sheet_name, rule.column, rule_name)
+                    increased[key] = (totals[key] - after[rule_name] + before[rule_name], totals[key])
+
+    if increased:
+        details = ", ".join(
+            f"{sheet_name}/{column} {rule_name} {old}→{new}건"
+            for (sheet_name, column, rule_name), (old, new) in list(increased.items())[:5]
+        )
+        raise ValidationError(f"검증 규칙 위반으로 저장할 수 없습니다: {details}", increased)
+
+
+class _SheetValidation:
+    """시트 하나의 위반 상태 (셀별 위반 + unique 컬럼의 값 -> 행 위치 색인)
+
+    처음에는 벡터 연산으로 전체를 검사하고, 값 -> 행 위치 색인은 첫 수정 때 만듦
+    """
+
+    def __init__(self, df: pd.DataFrame, version: int, rules: List[ColumnRule]):
+        self.df = df
+        self.version = version
+        self.rules = {rule.column: rule for rule in rules if rule.column in df.columns}
+        self.cell_errors: Dict[Tuple[int, Any], str] = {}
+        self.unique_index: Dict[Any, Dict[Any, Set[int]]] = {}
+        self.duplicates: Set[Tuple[int, Any]] = set()
+        for column, rule in self.rules.items():
+            failed = rule.check(df[column])
+            for position, rule_name in failed.dropna().items():
+                self.cell_errors[(int(position), column)] = rule_name
+            if rule.unique:
+                series = df[column].reset_index(drop=True)
+                duplicated = series.notna() & series.duplicated(keep=False)
+                self.duplicates.update((int(position), column) for position in duplicated.to_numpy().nonzero()[0])
+
+    def _check_rows(self, column: Any, positions: np.ndarray):
+        """지정한 행들만 다시 검사"""
+        rule = self.rules[column]
+        failed = rule.check(self.df[column].iloc[positions])
+        for position, rule_name in zip(positions, failed.tolist()):
+            key = (int(position), column)
+            if rule_name is None:
+                self.cell_errors.pop(key, None)
+            else:
+                self.cell_errors[key] = rule_name
+
+    def _build_unique_index(self, column: Any):
+        index: Dict[Any, Set[int]] = {}
+        for position, value in enumerate(self.df[column].tolist()):
+            key = hash_key(value)
+            if key is not None:
+                index.setdefault(key, set()).add(position)
+        self.unique_index[column] = index
+
+    def _refresh_group(self, column: Any, key: Any):
+        """값 하나의 중복 여부 갱신"""
+        positions = self.unique_index[column].get(key, set())
+        for position in positions:
+            if len(positions) > 1:
+                self.duplicates.add((position, column))
+            else:
+                self.duplicates.discard((position, column))
+        if not positions:
+            self.unique_index[column].pop(key, None)
+
+    def apply_changes(self, df: pd.DataFrame, changes: List[Tuple[int, str, Any, Any]]):
+        """바뀐 셀만 다시 검사하고 unique 색인 갱신"""
+        for column in {column for _, column, _, _ in changes}:
+            rule = self.rules.get(column)
+            if rule is not None and rule.unique and column not in self.unique_index:
+                # 수정 전 데이터로 색인 생성
+                self._build_unique_index(column)
+        self.df = df
+        by_column: Dict[Any, List[int]] = {}
+        for position, column, old_value, new_value in changes:
+            if column not in self.rules:
+                continue
+            by_column.setdefault(column, []).append(position)
+            if column in self.unique_index:
+                old_key, new_key = hash_key(old_value), hash_key(new_value)
+                if old_key is not None:
+                    self.unique_index[column].get(old_key, set()).discard(position)
+                self.duplicates.discard((position, column))
+                if new_key is not None:
+                    self.unique_index[column].setdefault(new_key, set()).add(position)
+                for key in (old_key, new_key):
+                    if key is not None:
+                        self._refresh_group(column, key)
+        for column, positions in by_column.items():
+            self._check_rows(column, np.array(sorted(set(positions))))
+
+    def counts(self) -> Counter:
+        """(컬럼, 규칙)별 위반 건수"""
+        counts = Counter((column, rule_name) for (_, column), rule_name in self.cell_errors.items())
+        counts.update((column, "unique") for _, column in self.duplicates)
+        return counts
+
+    def violations(self, limit: int = MAX_REPORTED_VIOLATIONS) -> pd.DataFrame:
+        """위반 목록 (행 순서)"""
+        entries = [(position, column, rule_name) for (position, column), rule_name in self.cell_errors.items()]
+        entries.extend((position, column, "unique") for position, column in self.duplicates)
+        entries.sort(key=lambda entry: (entry[0], str(entry[1])))
+        rows = [
+            {
+                "행": position + 1,
+                "열": column,
+                "값": self.df[column].iat[position],
+                "오류": self.rules[column].describe(rule_name)
+            }
+            for position, column, rule_name in entries[:limit]
+        ]
+        return pd.DataFrame(rows, columns=["행", "열", "값", "오류"])
+
+    @property
+    def total(self) -> int:
+        return len(self.cell_errors) + len(self.duplicates)
+
+
+class ValidationEngine:
+    """시트별 검증 상태를 캐시하고, 수정된 셀만 다시 검사"""
+
+    def __init__(self):
+        self.rules: Dict[str, List[ColumnRule]] = {}
+        self._sheets: Dict[str, _SheetValidation] = {}
+        self._lock = threading.RLock()
+
+    def set_rules(self, rules: Dict[str, List[ColumnRule]]):
+        """규칙 교체 (캐시 폐기)"""
+        with self._lock:
+            self.rules = rules
+            self._sheets.clear()
+
+    def validate(self, sheet_name: str, df: pd.DataFrame, version: int) -> Optional[_SheetValidation]:
+        """시트 버전에 맞는 검증 상태 (규칙이 없으면 None, 처음에는 전체를 벡터 검사)"""
+        with self._lock:
+            if not self.rules.get(sheet_name):
+                return None
+            entry = self._sheets.get(sheet_name)
+            if entry is None or entry.version != version or entry.df is not df:
+                entry = _SheetValidation(df, version, self.rules[sheet_name])
+                self._sheets[sheet_name] = entry
+            return entry
+
+    def apply_changes(self, sheet_name: str, df: pd.DataFrame, changes: Optional[List[Tuple[int, str, Any, Any]]], version: int):
+        """셀 변경 내역을 캐시된 검증 상태에 반영 (구조 변경이면 캐시 폐기)"""
+        with self._lock:
+            entry = self._sheets.get(sheet_name)
+            if entry is None:
+                return
+            if entry.df is not df:
+                if changes is None or entry.df.shape != df.shape:
+                    del self._sheets[sheet_name]
+                    return
+                entry.apply_changes(df, changes)
+            entry.version = version
+
+    def new_violations(self, sheet_name: str, old_df: pd.DataFrame, new_df: pd.DataFrame,
+                       changes: Optional[List[Tuple[int, str, Any, Any]]], version: int) -> Dict[Tuple[str, str, str], Tuple[int, int]]:
+        """수정으로 늘어난 (시트, 컬럼, 규칙)별 (이전, 이후) 위반 건수 (검증 상태는 수정 후로 갱신됨)"""
+        with self._lock:
+            entry = self.validate(sheet_name, old_df, version)
+            if entry is None:
+                return {}
+            before = entry.counts()
+            self.apply_changes(sheet_name, new_df, changes, version)
+            after = self.validate(sheet_name, new_df, version).counts()
+            return {
+                (sheet_name, column, rule_name): (before[(column, rule_name)], count)
+                for (column, rule_name), count in after.items()
+                if count > before[(column, rule_name)]
+            }
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        """캐시 삭제"""
+        with self._lock:
+            if sheet_name is None:
+                self._sheets.clear()
+            else:
+                self._sheets.pop(sheet_name, None)